@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'access_management_api'
+
+    def ready(self):
+        from . import signals
+
+        # Load the type registry when the first request starts, never from management commands
+        if getattr(settings, "POKEMON_TYPES_WARM_LOAD", True):
+            request_started.connect(signals.warm_load_pokemon_types, dispatch_uid=signals.WARM_LOAD_UID)
@@ -0,0 +1,32 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from access_management_api.services.user_pokemon_types import read_claimed_pokemon_types
+
+
+class PokemonTokenUser(TokenUser):
+    """
+    Stateless user backed by an access token,
+    with the type groups the token claims as long as they are current.
+    """
+
+    @cached_property
+    def claimed_pokemon_types(self):
+        return read_claimed_pokemon_types(self.token, self.pk)
+
+
+class GroupClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates from the access token alone, without loading the user from the database.
+    Used by the Pokémon endpoints, which only need the id and the type groups of the user.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return PokemonTokenUser(validated_token)
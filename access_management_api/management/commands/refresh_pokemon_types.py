@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from access_management_api.services.load_pokemon_types import refresh_type_registry
+
+
+class Command(BaseCommand):
+    help = "Add the Pokémon types known to PokeAPI to the local type registry."
+
+    def handle(self, *args, **options):
+        try:
+            names = refresh_type_registry()
+        except Exception as exc:
+            raise CommandError(f"Could not refresh the Pokémon types: {exc}") from exc
+
+        self.stdout.write(self.style.SUCCESS(f"{len(names)} Pokémon types in the registry."))
@@ -1,5 +1,13 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User, PokemonTypeGroup
+from .services.load_pokemon_types import load_pokemon_types
+from .services.user_pokemon_types import (
+    GROUPS_REVISION_CLAIM,
+    POKEMON_TYPES_CLAIM,
+    get_user_groups_revision,
+    get_user_pokemon_types,
+)
 
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -14,3 +22,44 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "pokemon_groups"]
+
+
+class BulkGroupSerializer(serializers.Serializer):
+    """
+    Body of POST /api/group/bulk/: types to add and to remove, or the exact set of types to keep.
+    """
+    add = serializers.ListField(child=serializers.CharField(max_length=50), required=False, default=list)
+    remove = serializers.ListField(child=serializers.CharField(max_length=50), required=False, default=list)
+    set = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+
+    def validate(self, data):
+        if "set" in data and (data["add"] or data["remove"]):
+            raise serializers.ValidationError("Use either set, or add and remove.")
+        if "set" not in data and not (data["add"] or data["remove"]):
+            raise serializers.ValidationError("Nothing to add, remove or set.")
+
+        data = {key: {name.lower() for name in names} for key, names in data.items()}
+        invalid = set().union(*data.values()) - set(load_pokemon_types())
+        if invalid:
+            raise serializers.ValidationError(f"Invalid Pokémon types: {', '.join(sorted(invalid))}")
+        if data["add"] & data["remove"]:
+            raise serializers.ValidationError("A type cannot be both added and removed.")
+        return data
+
+
+class PokemonTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Embeds the type groups of the user and their revision in the tokens,
+    so the Pokémon endpoints authorize without querying the database.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Read the revision first: a change racing with the login makes the claims outdated, not wrong
+        token[GROUPS_REVISION_CLAIM] = get_user_groups_revision(user.pk)
+        token[POKEMON_TYPES_CLAIM] = sorted(get_user_pokemon_types(user))
+        # Read by the stateless token users, e.g. to return the Server-Timing of a request
+        if user.is_staff:
+            token["is_staff"] = True
+        return token
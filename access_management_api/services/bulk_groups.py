@@ -0,0 +1,43 @@
+from django.db import transaction
+
+from access_management_api.models import PokemonTypeGroup
+from access_management_api.services.user_pokemon_types import invalidate_user_pokemon_types
+
+Membership = PokemonTypeGroup.users.through
+
+
+def bulk_update_user_groups(user_id, add=(), remove=(), exact=None):
+    """
+    Add and remove many type groups of a user at once, or with `exact` keep exactly those groups.
+    Missing groups are created, memberships are written in one statement per direction,
+    all inside one transaction. Returns the sorted group names of the user afterwards.
+    """
+    with transaction.atomic():
+        current = set(
+            PokemonTypeGroup.objects.filter(users=user_id).values_list("name", flat=True)
+        )
+        if exact is not None:
+            add, remove = set(exact) - current, current - set(exact)
+        else:
+            add, remove = set(add) - current, set(remove) & current
+
+        if add:
+            PokemonTypeGroup.objects.bulk_create(
+                [PokemonTypeGroup(name=name) for name in add],
+                ignore_conflicts=True,
+            )
+            Membership.objects.bulk_create(
+                [
+                    Membership(user_id=user_id, pokemontypegroup_id=group_id)
+                    for group_id in PokemonTypeGroup.objects.filter(name__in=add).values_list("pk", flat=True)
+                ],
+                ignore_conflicts=True,
+            )
+        if remove:
+            Membership.objects.filter(user_id=user_id, pokemontypegroup__name__in=remove).delete()
+
+        # Through-table writes send no m2m_changed signal
+        if add or remove:
+            transaction.on_commit(lambda: invalidate_user_pokemon_types([user_id]))
+
+    return sorted((current | add) - remove)
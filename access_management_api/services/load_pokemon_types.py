@@ -1,27 +1,108 @@
-import requests
+import logging
+import threading
+import time
 
+from django.conf import settings
+from django.db import connection
+
+from pokemon_api.models import PokemonType
+from pokemon_api.services.pokeapi_client import pokeapi_get
+
+logger = logging.getLogger(__name__)
+
+# Frozenset of the known type names: the default ones and those of the type registry (the PokemonType table)
 POKEMON_TYPES = None
+_loaded_at = None
+_lock = threading.Lock()
+_refreshing = threading.Event()
 
-DEFAULT_POKEMON_TYPES = [
+DEFAULT_POKEMON_TYPES_TTL = 60 * 60
+
+DEFAULT_POKEMON_TYPES = frozenset([
     "normal", "fighting", "flying", "poison", "ground",
     "rock", "bug", "ghost", "steel", "fire",
     "water", "grass", "electric", "psychic", "ice",
     "dragon", "dark", "fairy", "stellar", "unknown"
-]
+])
+
+
+def fetch_type_registry():
+    """
+    Returns the frozenset of the default type names and of the ones stored in the registry.
+    The registry only ever adds types: the type index fills the same table, and a sync
+    of only some types must not make the others invalid.
+    """
+    return DEFAULT_POKEMON_TYPES.union(PokemonType.objects.values_list("name", flat=True))
+
+
+def reload_pokemon_types():
+    """
+    Replace the in-process type set with the content of the registry.
+    """
+    global POKEMON_TYPES, _loaded_at
+
+    names = fetch_type_registry()
+    with _lock:
+        POKEMON_TYPES, _loaded_at = names, time.monotonic()
+    return names
+
+
+def refresh_type_registry():
+    """
+    Download the type names from PokeAPI, add the new ones to the registry
+    and reload the in-process set. Raises UpstreamUnavailable when PokeAPI cannot answer.
+    """
+    response = pokeapi_get("type/?limit=100")
+    response.raise_for_status()
+    names = {t["name"] for t in response.json()["results"]}
+
+    PokemonType.objects.bulk_create(
+        [PokemonType(name=name) for name in names],
+        ignore_conflicts=True,
+    )
+    reload_pokemon_types()
+    return names
+
+
+def refresh_in_background():
+    """
+    Reload the type set from the registry in a background thread.
+    """
+    if _refreshing.is_set():
+        return
+    _refreshing.set()
+
+    def refresh():
+        try:
+            reload_pokemon_types()
+        except Exception:
+            logger.warning("Could not reload the Pokémon types", exc_info=True)
+        finally:
+            _refreshing.clear()
+            # The connection of this thread would otherwise stay open
+            connection.close()
+
+    threading.Thread(target=refresh, name="pokemon-types-refresh", daemon=True).start()
 
 
 def load_pokemon_types():
-    global POKEMON_TYPES
+    """
+    Returns the frozenset of known Pokémon type names without ever waiting on the network.
+    Served from memory, loaded from the registry on first use (or when the first request starts, see warm_load_pokemon_types)
+    and reloaded in the background every POKEMON_TYPES_TTL seconds.
+    """
+    global POKEMON_TYPES, _loaded_at
+
+    pokemon_types, loaded_at = POKEMON_TYPES, _loaded_at
 
-    if POKEMON_TYPES is not None:
-        return POKEMON_TYPES
+    if pokemon_types is None:
+        with _lock:
+            if POKEMON_TYPES is None:
+                POKEMON_TYPES, _loaded_at = fetch_type_registry(), time.monotonic()
+            return POKEMON_TYPES
 
-    try:
-        response = requests.get("https://pokeapi.co/api/v2/type/")
-        response.raise_for_status()
-        data = response.json()
-        POKEMON_TYPES = {t["name"] for t in data["results"]}
-    except Exception:
-        POKEMON_TYPES = DEFAULT_POKEMON_TYPES
+    ttl = getattr(settings, "POKEMON_TYPES_TTL", DEFAULT_POKEMON_TYPES_TTL)
+    if loaded_at is not None and time.monotonic() - loaded_at > ttl:
+        refresh_in_background()
 
-    return POKEMON_TYPES
+    return pokemon_types
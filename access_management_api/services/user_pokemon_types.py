@@ -0,0 +1,78 @@
+import time
+
+from django.core.cache import cache
+
+from access_management_api.models import PokemonTypeGroup
+
+USER_POKEMON_TYPES_TIMEOUT = 60 * 60
+
+# Access token claims carrying the type groups of a user, see PokemonTokenObtainPairSerializer
+POKEMON_TYPES_CLAIM = "pokemon_types"
+GROUPS_REVISION_CLAIM = "groups_rev"
+
+
+def user_pokemon_types_key(user_id):
+    return f"user_pokemon_types:{user_id}"
+
+
+def user_groups_revision_key(user_id):
+    return f"user_groups_rev:{user_id}"
+
+
+def new_groups_revision():
+    return time.time_ns()
+
+
+def get_user_groups_revision(user_id):
+    """
+    Revision of the memberships of a user, replaced whenever they change.
+    Tokens carry it, so group claims issued before a change are recognized as outdated.
+    """
+    return cache.get_or_set(user_groups_revision_key(user_id), new_groups_revision, timeout=None)
+
+
+def read_claimed_pokemon_types(token, user_id):
+    """
+    Returns the frozenset of type groups claimed by a token,
+    or None when it has no claims or they are older than the last membership change.
+    """
+    pokemon_types = token.get(POKEMON_TYPES_CLAIM)
+    revision = token.get(GROUPS_REVISION_CLAIM)
+
+    if pokemon_types is None or revision is None:
+        return None
+    if cache.get(user_groups_revision_key(user_id)) != revision:
+        return None
+
+    return frozenset(pokemon_types)
+
+
+def get_user_pokemon_types(user):
+    """
+    Returns the frozenset of Pokémon type group names of a user.
+    Taken from the token claims when they are current, otherwise cached per user,
+    the cache entry is dropped whenever the memberships change.
+    """
+    pokemon_types = getattr(user, "claimed_pokemon_types", None)
+    if pokemon_types is not None:
+        return pokemon_types
+
+    key = user_pokemon_types_key(user.pk)
+    pokemon_types = cache.get(key)
+
+    if pokemon_types is None:
+        # Filtered by pk, so stateless token users are served as well
+        pokemon_types = frozenset(
+            PokemonTypeGroup.objects.filter(users=user.pk).values_list("name", flat=True)
+        )
+        cache.set(key, pokemon_types, timeout=USER_POKEMON_TYPES_TIMEOUT)
+
+    return pokemon_types
+
+
+def invalidate_user_pokemon_types(user_ids):
+    cache.delete_many([user_pokemon_types_key(user_id) for user_id in user_ids])
+    cache.set_many(
+        {user_groups_revision_key(user_id): new_groups_revision() for user_id in user_ids},
+        timeout=None,
+    )
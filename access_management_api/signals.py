@@ -0,0 +1,55 @@
+import logging
+
+from django.core.signals import request_started
+from django.db import DatabaseError
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import PokemonTypeGroup
+from .services import load_pokemon_types
+from .services.user_pokemon_types import invalidate_user_pokemon_types
+
+logger = logging.getLogger(__name__)
+
+WARM_LOAD_UID = "access_management_api_warm_load_pokemon_types"
+
+
+@receiver(m2m_changed, sender=PokemonTypeGroup.users.through)
+def pokemon_group_memberships_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached type groups of every user whose memberships changed.
+    `reverse` is True when the change went through user.pokemon_groups.
+    """
+    if not reverse and action == "pre_clear":
+        # The members of a cleared group are gone once post_clear is sent
+        instance._cleared_user_ids = list(instance.users.values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == "post_clear":
+        user_ids = instance.__dict__.pop("_cleared_user_ids", [])
+    else:
+        user_ids = pk_set
+
+    invalidate_user_pokemon_types(user_ids)
+
+
+def warm_load_pokemon_types(sender, **kwargs):
+    """
+    request_started receiver loading the type registry once per process,
+    before the first request that validates a type needs it.
+    Connected by AccountsConfig.ready when POKEMON_TYPES_WARM_LOAD is on.
+    """
+    request_started.disconnect(dispatch_uid=WARM_LOAD_UID)
+    if load_pokemon_types.POKEMON_TYPES is not None:
+        return
+
+    try:
+        load_pokemon_types.reload_pokemon_types()
+    except DatabaseError:
+        # e.g. before the first migrate, the types are then loaded on first use
+        logger.info("Pokémon type registry not loaded on the first request", exc_info=True)
@@ -3,7 +3,9 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from access_management_api.models import PokemonTypeGroup
+from access_management_api.services.user_pokemon_types import get_user_pokemon_types
 from unittest.mock import patch
+from rest_framework_simplejwt.tokens import AccessToken
 
 User = get_user_model()
 
@@ -49,6 +51,21 @@ class AccountsAPITest(APITestCase):
         self.assertIn("access", response.data)
         self.assertIn("refresh", response.data)
 
+    def test_login_token_claims_pokemon_groups(self):
+        self.user.pokemon_groups.add(
+            PokemonTypeGroup.objects.create(name="water"),
+            PokemonTypeGroup.objects.create(name="fire"),
+        )
+        response = self.client.post(
+            self.login_url,
+            {"username": self.username, "password": self.password},
+            format="json"
+        )
+        token = AccessToken(response.data["access"])
+
+        self.assertEqual(token["pokemon_types"], ["fire", "water"])
+        self.assertIn("groups_rev", token)
+
     def test_login_fails_with_wrong_password(self):
         response = self.client.post(
             self.login_url,
@@ -163,3 +180,56 @@ class AccountsAPITest(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    # -----------------------------
+    # BULK GROUP TESTS
+    # -----------------------------
+
+    @patch("access_management_api.services.load_pokemon_types.POKEMON_TYPES", {"fire", "water", "grass", "ice"})
+    def test_bulk_add_and_remove_groups(self):
+        self.authenticate()
+        self.user.pokemon_groups.add(PokemonTypeGroup.objects.create(name="water"))
+        get_user_pokemon_types(self.user)
+
+        url = reverse("bulk_group")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"add": ["Fire", "grass"], "remove": ["water"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["pokemon_groups"], ["fire", "grass"])
+        self.assertEqual(get_user_pokemon_types(self.user), {"fire", "grass"})
+
+    @patch("access_management_api.services.load_pokemon_types.POKEMON_TYPES", {"fire", "water", "grass", "ice"})
+    def test_bulk_set_groups(self):
+        self.authenticate()
+        self.user.pokemon_groups.add(
+            PokemonTypeGroup.objects.create(name="water"),
+            PokemonTypeGroup.objects.create(name="fire"),
+        )
+
+        url = reverse("bulk_group")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"set": ["fire", "ice"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(self.user.pokemon_groups.values_list("name", flat=True)),
+            ["fire", "ice"],
+        )
+
+    @patch("access_management_api.services.load_pokemon_types.POKEMON_TYPES", {"fire", "water"})
+    def test_bulk_groups_rejects_invalid_types(self):
+        self.authenticate()
+        url = reverse("bulk_group")
+
+        response = self.client.post(url, {"add": ["fire", "unknown"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {"set": ["fire"], "add": ["water"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertFalse(PokemonTypeGroup.objects.filter(name="fire").exists())
+
+    def test_bulk_groups_requires_authentication(self):
+        response = self.client.post(reverse("bulk_group"), {"add": ["fire"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,61 +1,153 @@
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 import access_management_api.services.load_pokemon_types as pokemon_types
+from django.core.signals import request_started
+
+from access_management_api.models import PokemonTypeGroup
+from access_management_api.signals import WARM_LOAD_UID, warm_load_pokemon_types
+from access_management_api.services.user_pokemon_types import get_user_pokemon_types
+from pokemon_api.models import PokemonType
+from pokemon_api.services.type_index import store_type_members
+
+User = get_user_model()
 
 
 class LoadPokemonTypesTest(TestCase):
     def setUp(self):
+        self.reset_pokemon_types()
+        self.addCleanup(self.reset_pokemon_types)
+
+    def reset_pokemon_types(self):
         pokemon_types.POKEMON_TYPES = None
+        pokemon_types._loaded_at = None
+
+    def test_registry_is_loaded_when_the_first_request_starts(self):
+        PokemonType.objects.create(name="shadow")
+        request_started.connect(warm_load_pokemon_types, dispatch_uid=WARM_LOAD_UID)
+        self.addCleanup(request_started.disconnect, dispatch_uid=WARM_LOAD_UID)
 
-    @patch("access_management_api.services.load_pokemon_types.requests.get")
-    def test_load_pokemon_types_success(self, mock_get):
+        with patch.object(
+            pokemon_types, "reload_pokemon_types", wraps=pokemon_types.reload_pokemon_types
+        ) as reload_types:
+            request_started.send(sender=None)
+            request_started.send(sender=None)
+
+        reload_types.assert_called_once_with()
+        self.assertEqual(pokemon_types.POKEMON_TYPES, pokemon_types.DEFAULT_POKEMON_TYPES | {"shadow"})
+
+    @patch("access_management_api.services.load_pokemon_types.pokeapi_get")
+    def test_refresh_type_registry_success(self, mock_get):
+        PokemonType.objects.create(name="fire")
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
             "results": [
                 {"name": "fire"},
                 {"name": "water"},
-                {"name": "grass"},
+                {"name": "shadow"},
             ]
         }
         mock_get.return_value = mock_response
 
-        result = pokemon_types.load_pokemon_types()
+        pokemon_types.refresh_type_registry()
 
-        self.assertEqual(result, {"fire", "water", "grass"})
-        self.assertEqual(pokemon_types.POKEMON_TYPES, {"fire", "water", "grass"})
+        self.assertEqual(
+            set(PokemonType.objects.values_list("name", flat=True)),
+            {"fire", "water", "shadow"},
+        )
+        self.assertEqual(pokemon_types.POKEMON_TYPES, pokemon_types.DEFAULT_POKEMON_TYPES | {"shadow"})
 
-    @patch("access_management_api.services.load_pokemon_types.requests.get")
-    def test_load_pokemon_types_api_failure(self, mock_get):
+    @patch("access_management_api.services.load_pokemon_types.pokeapi_get")
+    def test_refresh_type_registry_api_failure(self, mock_get):
+        PokemonType.objects.create(name="fire")
         mock_response = MagicMock()
-        mock_response.status_code = 500
+        mock_response.raise_for_status.side_effect = requests.HTTPError("500")
         mock_get.return_value = mock_response
 
+        with self.assertRaises(requests.HTTPError):
+            pokemon_types.refresh_type_registry()
+
+        self.assertEqual(pokemon_types.load_pokemon_types(), pokemon_types.DEFAULT_POKEMON_TYPES)
+
+    @patch("access_management_api.services.load_pokemon_types.pokeapi_get")
+    def test_load_pokemon_types_reads_the_registry(self, mock_get):
+        PokemonType.objects.create(name="shadow")
+        PokemonType.objects.create(name="water", synced_at=timezone.now())
+
         result = pokemon_types.load_pokemon_types()
 
-        self.assertEqual(result, set())
-        self.assertEqual(pokemon_types.POKEMON_TYPES, set())
+        self.assertEqual(result, pokemon_types.DEFAULT_POKEMON_TYPES | {"shadow"})
+        mock_get.assert_not_called()
 
-    @patch("access_management_api.services.load_pokemon_types.requests.get")
-    def test_load_pokemon_types_invalid_json(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.side_effect = ValueError("Invalid JSON")
-        mock_get.return_value = mock_response
+        # Served from memory afterwards
+        with self.assertNumQueries(0):
+            pokemon_types.load_pokemon_types()
 
+    @patch("access_management_api.services.load_pokemon_types.pokeapi_get")
+    def test_load_pokemon_types_empty_registry(self, mock_get):
         result = pokemon_types.load_pokemon_types()
 
-        self.assertEqual(result, set())
-        self.assertEqual(pokemon_types.POKEMON_TYPES, set())
+        self.assertEqual(result, pokemon_types.DEFAULT_POKEMON_TYPES)
+        self.assertIsInstance(result, frozenset)
+        mock_get.assert_not_called()
 
-    @patch("access_management_api.services.load_pokemon_types.requests.get")
-    def test_load_pokemon_types_empty_results(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"results": []}
-        mock_get.return_value = mock_response
+    @override_settings(POKEMON_TYPES_TTL=0)
+    @patch("access_management_api.services.load_pokemon_types.refresh_in_background")
+    def test_load_pokemon_types_refreshes_after_ttl(self, mock_refresh):
+        pokemon_types.load_pokemon_types()
+        mock_refresh.assert_not_called()
+
+        pokemon_types.load_pokemon_types()
+        mock_refresh.assert_called_once()
+
+    def test_partial_type_index_sync_keeps_every_type_valid(self):
+        store_type_members("fire", [{"name": "charmander", "url": "https://pokeapi.co/api/v2/pokemon/4/"}])
+        store_type_members("ice", [])
 
         result = pokemon_types.load_pokemon_types()
 
-        self.assertEqual(result, set())
-        self.assertEqual(pokemon_types.POKEMON_TYPES, set())
+        self.assertEqual(result, pokemon_types.DEFAULT_POKEMON_TYPES)
+        self.assertIn("water", result)
+
+
+class UserPokemonTypesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpassword123")
+        self.fire = PokemonTypeGroup.objects.create(name="fire")
+        self.water = PokemonTypeGroup.objects.create(name="water")
+
+    def test_user_pokemon_types_are_cached(self):
+        self.user.pokemon_groups.add(self.fire)
+        get_user_pokemon_types(self.user)
+
+        with self.assertNumQueries(0):
+            result = get_user_pokemon_types(self.user)
+
+        self.assertEqual(result, {"fire"})
+
+    def test_cache_follows_user_side_changes(self):
+        self.user.pokemon_groups.add(self.fire)
+        get_user_pokemon_types(self.user)
+
+        self.user.pokemon_groups.add(self.water)
+        self.assertEqual(get_user_pokemon_types(self.user), {"fire", "water"})
+
+        self.user.pokemon_groups.remove(self.fire)
+        self.assertEqual(get_user_pokemon_types(self.user), {"water"})
+
+        self.user.pokemon_groups.clear()
+        self.assertEqual(get_user_pokemon_types(self.user), set())
+
+    def test_cache_follows_group_side_changes(self):
+        get_user_pokemon_types(self.user)
+
+        self.fire.users.add(self.user)
+        self.assertEqual(get_user_pokemon_types(self.user), {"fire"})
+
+        self.fire.users.clear()
+        self.assertEqual(get_user_pokemon_types(self.user), set())
@@ -3,8 +3,9 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import PokemonTypeGroup
-from .serializers import UserSerializer
+from .serializers import BulkGroupSerializer, UserSerializer
 from django.contrib.auth import get_user_model
+from access_management_api.services.bulk_groups import bulk_update_user_groups
 from access_management_api.services.load_pokemon_types import load_pokemon_types
 
 User = get_user_model()
@@ -70,3 +71,30 @@ class RemoveGroupView(APIView):
                 {"error": "Group not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+
+class BulkGroupView(APIView):
+    """
+        POST /api/group/bulk/
+        Adds and removes many Pokémon type groups of the user at once with {"add": [...], "remove": [...]},
+        or keeps exactly the given groups with {"set": [...]}.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkGroupSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        pokemon_groups = bulk_update_user_groups(
+            request.user.pk,
+            add=data["add"],
+            remove=data["remove"],
+            exact=data.get("set"),
+        )
+        return Response(
+            {"pokemon_groups": pokemon_groups},
+            status=status.HTTP_200_OK
+        )
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class PokemonApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pokemon_api'
+
+    def ready(self):
+        from pokemon_api.services.metrics import install_query_counter
+
+        # Count the queries of every request, see MetricsMiddleware
+        connection_created.connect(install_query_counter, dispatch_uid="pokemon_api_query_counter")
@@ -0,0 +1,258 @@
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+
+from access_management_api.authentication import GroupClaimsJWTAuthentication
+from access_management_api.services.user_pokemon_types import get_user_pokemon_types
+from pokemon_api.conditional import apply_validators, conditional_response, make_etag, mark_stale
+from pokemon_api.pagination import PokemonCursorPagination
+from pokemon_api.services.circuit_breaker import UpstreamUnavailable
+from pokemon_api.services.fan_out import async_fan_out
+from pokemon_api.services.fetch_pokemon import afetch_pokemon_or_stale, apeek_pokemon
+from pokemon_api.services.fetch_pokemon_by_type import afetch_pokemon_by_type_or_stale
+from pokemon_api.services.list_cache import (
+    cache_pokemon_list,
+    get_cached_pokemon_list,
+    make_pokemon_list_entry,
+)
+from pokemon_api.services.pokemon_access import acheck_pokemon_access
+from pokemon_api.services.pokemon_cache import measure_payload
+from pokemon_api.services.project_fields import parse_field_paths, project_fields
+from pokemon_api.services.server_timing import timed_phase
+from pokemon_api.services.token_bucket import (
+    UpstreamBudgetExceeded,
+    consume_request_budget,
+    upstream_budget_scope,
+)
+from pokemon_api.services.type_masks import aget_type_mask_engine
+from pokemon_api.views import (
+    UPSTREAM_BUDGET_EXCEEDED_MESSAGE,
+    UPSTREAM_UNAVAILABLE_MESSAGE,
+    mark_incomplete,
+    merge_fetched_names,
+    pokemon_entry,
+    raise_if_throttled,
+    retry_after,
+    stale_types_of,
+)
+
+
+def authenticate_pokemon_request(request):
+    """
+    Authenticate a request from its access token and return (user, the user's type groups).
+    Raises AuthenticationFailed and NotAuthenticated like DRF authentication does.
+    """
+    with timed_phase("auth"):
+        result = GroupClaimsJWTAuthentication().authenticate(request)
+    if result is None:
+        raise exceptions.NotAuthenticated()
+
+    user, _token = result
+    with timed_phase("groups"):
+        pokemon_types = get_user_pokemon_types(user)
+    return user, pokemon_types
+
+
+def error_response(message, status_code):
+    return JsonResponse({"error": message}, status=status_code)
+
+
+def throttled_response(wait, message=None):
+    response = JsonResponse(
+        {"detail": message or "Request was throttled."},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
+class AsyncPokemonView(View):
+    """
+    Base of the async Pokémon views: DRF views cannot be async,
+    so these are plain Django views authenticating and throttling like the sync ones.
+    Under ASGI, one worker keeps many upstream calls in flight at once.
+    """
+    throttle_scope = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user, self.allowed_types = await sync_to_async(authenticate_pokemon_request)(request)
+        except (exceptions.AuthenticationFailed, exceptions.NotAuthenticated) as exc:
+            response = JsonResponse(
+                exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+            response["WWW-Authenticate"] = GroupClaimsJWTAuthentication().authenticate_header(request)
+            return response
+
+        request.user = user
+        with timed_phase("throttle"):
+            wait, budget = await sync_to_async(consume_request_budget, thread_sensitive=False)(
+                self.throttle_scope, user.pk
+            )
+        if wait:
+            return throttled_response(wait)
+
+        with upstream_budget_scope(budget):
+            try:
+                return await super().dispatch(request, *args, **kwargs)
+            except UpstreamBudgetExceeded as exc:
+                return throttled_response(exc.wait, UPSTREAM_BUDGET_EXCEEDED_MESSAGE)
+            except exceptions.APIException as exc:
+                # e.g. NotFound for an invalid cursor, answered like DRF answers the sync views
+                return JsonResponse(
+                    exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail},
+                    status=exc.status_code,
+                )
+
+
+class AsyncPokemonListView(AsyncPokemonView):
+    """
+    GET /api/async/pokemon/
+    Async version of GET /api/pokemon/, with cursor pagination but without NDJSON streaming.
+    """
+    throttle_scope = "pokemon_list"
+    pagination_class = PokemonCursorPagination
+
+    async def get(self, request):
+        allowed_types = self.allowed_types
+
+        # Users with the same type groups share one cached list with the sync view
+        if allowed_types:
+            list_entry = await sync_to_async(get_cached_pokemon_list)(allowed_types)
+        else:
+            list_entry = make_pokemon_list_entry(allowed_types, [])
+        missing_types, stale_types = set(), set()
+
+        if list_entry is None:
+            pokemon_list, missing_types, stale_types = await self.build_pokemon_list(allowed_types)
+            if missing_types or stale_types:
+                list_entry = make_pokemon_list_entry(allowed_types, pokemon_list)
+            else:
+                list_entry = await sync_to_async(cache_pokemon_list)(allowed_types, pokemon_list)
+
+        if missing_types or stale_types:
+            response = self.list_response(request, list_entry.pokemon_list)
+            return mark_incomplete(response, missing_types, stale_types)
+
+        etag = make_etag(list_entry.digest, request.get_full_path())
+        not_modified = conditional_response(request, etag, list_entry.created_at)
+        if not_modified is not None:
+            return not_modified
+
+        response = self.list_response(request, list_entry.pokemon_list)
+        return apply_validators(response, etag, int(list_entry.created_at))
+
+    def list_response(self, request, pokemon_list):
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(pokemon_list, Request(request), view=self)
+
+        if page is not None:
+            return JsonResponse({"next": paginator.get_next_link(), "results": page})
+        return JsonResponse(pokemon_list, safe=False)
+
+    async def build_pokemon_list(self, allowed_types):
+        """
+        Returns (pokemon_list, missing_types, stale_types) for the given type groups.
+        """
+        engine = await aget_type_mask_engine()
+        names, indexed_types = engine.accessible_names(allowed_types)
+        missing_types, stale_types = set(), set()
+        unindexed_types = allowed_types - indexed_types
+
+        if unindexed_types:
+            with timed_phase("fan_out"):
+                pokemon_by_type, missing_types = await async_fan_out(
+                    afetch_pokemon_by_type_or_stale, unindexed_types
+                )
+            await sync_to_async(raise_if_throttled, thread_sensitive=False)(missing_types)
+            stale_types = stale_types_of(pokemon_by_type)
+            names = merge_fetched_names(names, pokemon_by_type)
+
+        return [pokemon_entry(name) for name in names], missing_types, stale_types
+
+
+class AsyncPokemonDetailView(AsyncPokemonView):
+    """
+    GET /api/async/pokemon/<identifier>/
+    Async version of GET /api/pokemon/<identifier>/, with the same fields and exclude parameters.
+    """
+    throttle_scope = "pokemon_detail"
+
+    async def get(self, request, identifier):
+        allowed_types = self.allowed_types
+        fields = request.GET.get("fields", "")
+        exclude = request.GET.get("exclude", "")
+        projection = f"fields={fields}&exclude={exclude}"
+
+        access = await acheck_pokemon_access(identifier, allowed_types)
+
+        if access is False:
+            return error_response(
+                "Forbidden: you do not have access to this Pokémon",
+                status.HTTP_403_FORBIDDEN,
+            )
+
+        cache_entry = await apeek_pokemon(identifier)
+
+        if access and cache_entry is not None and cache_entry.payload is not None:
+            etag = make_etag(cache_entry.digest, projection, *sorted(allowed_types))
+            not_modified = conditional_response(request, etag, cache_entry.stored_at)
+            if not_modified is not None:
+                return not_modified
+
+        try:
+            pokemon_data, stale = await afetch_pokemon_or_stale(identifier)
+        except UpstreamBudgetExceeded:
+            raise
+        except UpstreamUnavailable:
+            response = error_response(UPSTREAM_UNAVAILABLE_MESSAGE, status.HTTP_503_SERVICE_UNAVAILABLE)
+            response["Retry-After"] = retry_after()
+            return response
+
+        if pokemon_data is None:
+            return error_response("Pokémon not found", status.HTTP_404_NOT_FOUND)
+
+        pokemon_types = {
+            t["type"]["name"]
+            for t in pokemon_data.get("types", [])
+        }
+
+        if access is None and not (pokemon_types & allowed_types):
+            return error_response(
+                "Forbidden: you do not have access to this Pokémon",
+                status.HTTP_403_FORBIDDEN,
+            )
+
+        if stale:
+            pokemon_data = project_fields(
+                pokemon_data,
+                fields=parse_field_paths(fields),
+                exclude=parse_field_paths(exclude),
+            )
+            return mark_stale(JsonResponse(pokemon_data))
+
+        if cache_entry is not None and cache_entry.payload is not None:
+            digest, last_modified = cache_entry.digest, cache_entry.stored_at
+        else:
+            _size, digest = measure_payload(pokemon_data)
+            last_modified = time.time()
+
+        etag = make_etag(digest, projection, *sorted(allowed_types))
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        pokemon_data = project_fields(
+            pokemon_data,
+            fields=parse_field_paths(fields),
+            exclude=parse_field_paths(exclude),
+        )
+
+        response = JsonResponse(pokemon_data)
+        return apply_validators(response, etag, int(last_modified))
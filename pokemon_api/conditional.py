@@ -0,0 +1,56 @@
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+DEFAULT_HTTP_CACHE_MAX_AGE = 60
+
+
+def make_etag(*parts):
+    """
+    Strong ETag built from the given parts, e.g. a payload digest and the user's type groups.
+    """
+    return '"%s"' % hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def apply_validators(response, etag, last_modified=None):
+    """
+    Set ETag, Last-Modified and Cache-Control on a response.
+    Responses depend on the user's type groups, so they are private and vary on the token.
+    """
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+
+    max_age = getattr(settings, "POKEMON_HTTP_CACHE_MAX_AGE", DEFAULT_HTTP_CACHE_MAX_AGE)
+    patch_cache_control(response, private=True, max_age=max_age)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Returns a 304 Not Modified response when the client's copy matches
+    If-None-Match / If-Modified-Since, or None when the full response is needed.
+    """
+    if last_modified is not None:
+        last_modified = int(last_modified)
+
+    validators = apply_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=validators
+    )
+    return response if response is not validators else None
+
+
+def mark_stale(response):
+    """
+    Flag a response built from the last known data because PokeAPI could not answer.
+    Clients must not reuse it without asking again.
+    """
+    response["X-Stale-Response"] = "true"
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from pokemon_api.services.benchmark import (
+    DRIVERS,
+    SCENARIOS,
+    baseline_record,
+    compare_results,
+    create_benchmark_user,
+    load_records,
+    make_record,
+    run_benchmark,
+    store_record,
+)
+from pokemon_api.services.fake_pokeapi import FakePokeAPI, load_fixtures, synthetic_fixtures
+
+
+def comma_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the login, Pokémon list and Pokémon detail endpoints through WSGI and ASGI "
+        "against a local fake PokeAPI, in a throwaway test database. Results are appended to "
+        "--output with the current commit and compared with the last run of another commit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drivers",
+            type=comma_list,
+            default=list(DRIVERS),
+            help="Comma-separated handlers to drive: wsgi, asgi.",
+        )
+        parser.add_argument(
+            "--scenarios",
+            type=comma_list,
+            default=list(SCENARIOS),
+            help="Comma-separated scenarios: login, list, detail.",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+        parser.add_argument(
+            "--types",
+            type=comma_list,
+            default=["fire", "water", "grass"],
+            help="Comma-separated type groups of the benchmark user.",
+        )
+        parser.add_argument(
+            "--fixtures",
+            help=(
+                "JSON file mapping PokeAPI paths to payloads, or directory of recorded fixtures "
+                "(see POKEAPI_CLIENT['TRANSPORT']), instead of generated fixtures."
+            ),
+        )
+        parser.add_argument(
+            "--pokemon-per-type",
+            type=int,
+            default=50,
+            help="Pokémon per type of the generated fixtures.",
+        )
+        parser.add_argument("--latency", type=float, default=0.05, help="Fake PokeAPI latency, in seconds.")
+        parser.add_argument("--jitter", type=float, default=0.01, help="Fake PokeAPI latency jitter, in seconds.")
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="Share of fake PokeAPI answers replaced by a 503, between 0 and 1.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the latency and error injection.")
+        parser.add_argument(
+            "--output",
+            default=str(settings.BASE_DIR / "benchmarks" / "results.jsonl"),
+            help="JSON Lines file the results are appended to.",
+        )
+        parser.add_argument("--no-store", action="store_true", help="Do not store the results.")
+
+    def handle(self, *args, **options):
+        for driver in options["drivers"]:
+            if driver not in DRIVERS:
+                raise CommandError(f"Unknown driver {driver!r}, use one of {', '.join(DRIVERS)}")
+        for scenario in options["scenarios"]:
+            if scenario not in SCENARIOS:
+                raise CommandError(f"Unknown scenario {scenario!r}, use one of {', '.join(SCENARIOS)}")
+
+        if options["fixtures"]:
+            fixtures = load_fixtures(options["fixtures"])
+        else:
+            fixtures = synthetic_fixtures(options["types"], pokemon_per_type=options["pokemon_per_type"])
+
+        config = {
+            key: options[key]
+            for key in (
+                "drivers", "scenarios", "requests", "concurrency", "types", "fixtures",
+                "pokemon_per_type", "latency", "jitter", "error_rate", "seed",
+            )
+        }
+
+        fake = FakePokeAPI(
+            fixtures,
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            seed=options["seed"],
+        )
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            create_benchmark_user(options["types"])
+            with fake:
+                results = run_benchmark(
+                    fake,
+                    fixtures,
+                    options["types"],
+                    drivers=options["drivers"],
+                    scenarios=options["scenarios"],
+                    requests=options["requests"],
+                    concurrency=options["concurrency"],
+                )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        record = make_record(config, results)
+        baseline = baseline_record(load_records(options["output"]), record)
+        self.report(record, baseline)
+
+        if not options["no_store"]:
+            store_record(options["output"], record)
+            self.stdout.write(f"Results appended to {options['output']}")
+
+    def report(self, record, baseline):
+        self.stdout.write(
+            f"{'driver':<6} {'scenario':<8} {'requests':>8} {'errors':>6} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'upstream':>8}"
+        )
+        for result in record["results"]:
+            line = (
+                f"{result['driver']:<6} {result['scenario']:<8} {result['requests']:>8} {result['errors']:>6} "
+                f"{result['rps']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+                f"{sum(result['upstream_calls'].values()):>8}"
+            )
+            change = compare_results(result, baseline) if baseline is not None else None
+            if change is not None:
+                line += f"  p95 {format_change(change['p95_ms'])}, rps {format_change(change['rps'])}"
+            self.stdout.write(line)
+
+        if baseline is not None:
+            self.stdout.write(f"Compared with {baseline['commit']}{' (dirty)' if baseline['dirty'] else ''}")
+
+
+def format_change(change):
+    return "n/a" if change is None else f"{change:+.1f}%"
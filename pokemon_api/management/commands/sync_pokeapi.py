@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon_api.services.sync_pokeapi import pokemon_to_sync, sync_pokemon_documents
+from pokemon_api.services.type_index import sync_type_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Mirror PokeAPI locally: types, type <-> Pokémon relations and Pokémon documents. "
+        "Re-running it resumes an interrupted sync."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Maximum number of concurrent downloads.",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            help="Also re-download documents mirrored more than this many hours ago.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Re-download every document.",
+        )
+        parser.add_argument(
+            "--skip-types",
+            action="store_true",
+            help="Do not re-sync the types and their members.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["skip_types"]:
+            try:
+                missing = sync_type_index()
+            except Exception as exc:
+                raise CommandError(f"Could not sync the type index: {exc}") from exc
+            if missing:
+                self.stderr.write(f"Types not synced: {', '.join(sorted(missing))}")
+            self.stdout.write("Type index synced.")
+
+        max_age = timedelta(hours=options["max_age"]) if options["max_age"] is not None else None
+        pokemon = pokemon_to_sync(max_age=max_age, full=options["full"])
+        self.stdout.write(f"Downloading {len(pokemon)} Pokémon documents...")
+
+        stored = []
+
+        def on_stored(name):
+            stored.append(name)
+            if len(stored) % 100 == 0:
+                self.stdout.write(f"  {len(stored)}/{len(pokemon)}")
+
+        failed = sync_pokemon_documents(pokemon, workers=options["workers"], on_stored=on_stored)
+
+        if failed:
+            self.stderr.write(f"Documents not downloaded: {', '.join(sorted(failed))}")
+        self.stdout.write(self.style.SUCCESS(f"Mirrored {len(stored)} Pokémon documents."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon_api.services.type_index import sync_type_index
+
+
+class Command(BaseCommand):
+    help = "Sync the local type <-> Pokémon index from PokeAPI."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "types",
+            nargs="*",
+            help="Only sync these types (default: all types known to PokeAPI).",
+        )
+        parser.add_argument(
+            "--deadline",
+            type=float,
+            default=120,
+            help="Seconds to wait for all types to be downloaded.",
+        )
+
+    def handle(self, *args, **options):
+        type_names = options["types"] or None
+
+        try:
+            missing = sync_type_index(type_names, deadline=options["deadline"])
+        except Exception as exc:
+            raise CommandError(f"Could not sync the type index: {exc}") from exc
+
+        if missing:
+            self.stderr.write(f"Types not synced: {', '.join(sorted(missing))}")
+        self.stdout.write(self.style.SUCCESS("Type index synced."))
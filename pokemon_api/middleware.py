@@ -0,0 +1,156 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from rest_framework import exceptions
+
+from access_management_api.authentication import GroupClaimsJWTAuthentication
+from pokemon_api.services.metrics import (
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUESTS,
+    registry,
+    start_query_count,
+    stop_query_count,
+)
+from pokemon_api.services.server_timing import (
+    get_timings,
+    is_timing_requested,
+    profile_request,
+    report_slow_request,
+    should_sample,
+    start_timings,
+    stop_timings,
+)
+
+
+def endpoint_label(request):
+    """
+    The URL name of the view that served the request, so the label stays bounded.
+    """
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return "unmatched"
+    return resolver_match.view_name or "unnamed"
+
+
+def claims_staff(request):
+    """
+    Whether the request carries a valid access token of a staff user,
+    read before the view authenticates the request.
+    """
+    try:
+        result = GroupClaimsJWTAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+def is_timed(request, sampled):
+    # The timings reveal what is cached, so users only get them for sampled requests
+    return sampled or (is_timing_requested(request) and claims_staff(request))
+
+
+class MetricsMiddleware:
+    """
+    Record the status, latency and database queries of every request (see /metrics).
+    Works for sync and async views alike. Streaming responses are timed until
+    the response object is returned, not until the last line is sent.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        counter, token = start_query_count()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_query_count(token)
+
+        self.record(request, response, started, counter.count)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        counter, token = start_query_count()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_query_count(token)
+
+        self.record(request, response, started, counter.count)
+        return response
+
+    def record(self, request, response, started, query_count):
+        endpoint = endpoint_label(request)
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+        REQUEST_QUERIES.observe(query_count, endpoint=endpoint)
+        registry.maybe_write_snapshot()
+
+
+class ServerTimingMiddleware:
+    """
+    Time the phases of sampled requests, and of the requests of staff users sending
+    the REQUEST_HEADER, and return them in a Server-Timing header (see POKEMON_SERVER_TIMING).
+    Slow timed requests are logged and, with a PROFILER, their profile is written to PROFILE_DIR.
+    Async requests are timed but never profiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not is_timed(request, should_sample()):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        timings, token = start_timings()
+        try:
+            with profile_request() as profiler:
+                response = self.get_response(request)
+        finally:
+            stop_timings(token)
+
+        return self.finish(request, response, timings, time.perf_counter() - started, profiler)
+
+    async def __acall__(self, request):
+        if not is_timed(request, should_sample()):
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        timings, token = start_timings()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timings(token)
+
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered once the view returned, the post-render callbacks run right after
+        timings = get_timings()
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: timings.add("render", time.perf_counter() - started))
+        return response
+
+    def finish(self, request, response, timings, seconds, profiler=None):
+        response["Server-Timing"] = timings.header(seconds)
+        report_slow_request(endpoint_label(request), seconds, timings, profiler)
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pokemon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('pokeapi_id', models.PositiveIntegerField(blank=True, null=True, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PokemonType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('pokemon', models.ManyToManyField(related_name='types', to='pokemon_api.pokemon')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PokemonDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField()),
+                ('synced_at', models.DateTimeField()),
+                ('pokemon', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='document', to='pokemon_api.pokemon')),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def encode_payloads(apps, schema_editor):
+    from pokemon_api.services.payload_codec import encode_payload
+
+    PokemonDocument = apps.get_model('pokemon_api', 'PokemonDocument')
+    for document in PokemonDocument.objects.iterator():
+        document.encoded_payload = encode_payload(document.payload)
+        document.size = len(document.encoded_payload)
+        document.save(update_fields=['encoded_payload', 'size'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon_api', '0002_pokemondocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemondocument',
+            name='encoded_payload',
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='pokemondocument',
+            name='size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(encode_payloads, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='pokemondocument',
+            name='payload',
+        ),
+        migrations.RenameField(
+            model_name='pokemondocument',
+            old_name='encoded_payload',
+            new_name='payload',
+        ),
+    ]
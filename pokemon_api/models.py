@@ -1,3 +1,39 @@
 from django.db import models
 
-# Create your models here.
+
+class Pokemon(models.Model):
+    """
+    Local index entry of a PokeAPI Pokémon, filled by the type index sync.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    pokeapi_id = models.PositiveIntegerField(unique=True, null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PokemonType(models.Model):
+    """
+    Local index entry of a PokeAPI type and the Pokémon belonging to it.
+    A type counts as indexed once it has been synced at least once.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    pokemon = models.ManyToManyField(Pokemon, related_name="types")
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PokemonDocument(models.Model):
+    """
+    Mirrored PokeAPI detail document of a Pokémon, filled by the sync_pokeapi command.
+    The payload is stored encoded (see services.payload_codec), `size` is its length in bytes.
+    """
+    pokemon = models.OneToOneField(Pokemon, on_delete=models.CASCADE, related_name="document")
+    payload = models.BinaryField()
+    size = models.PositiveIntegerField(default=0)
+    synced_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.pokemon.name
@@ -0,0 +1,89 @@
+import bisect
+from base64 import b64decode, b64encode
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class PokemonCursorPagination(BasePagination):
+    """
+    Cursor pagination over a list of Pokémon entries sorted by name.
+    The cursor is the last name of the previous page, so pages stay stable
+    while Pokémon are added to or removed from the list.
+    Pagination only applies when the client asks for it with `limit` or `cursor`.
+    """
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    default_limit = 100
+    max_limit = 500
+    invalid_cursor_message = "Invalid cursor"
+
+    def is_requested(self, request):
+        return (
+            self.limit_query_param in request.query_params
+            or self.cursor_query_param in request.query_params
+        )
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def encode_cursor(self, name):
+        return b64encode(name.encode(), altchars=b"-_").decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            return b64decode(f"{encoded}{padding}".encode(), altchars=b"-_", validate=True).decode()
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        `queryset` is a list of {"name": ...} entries sorted by name.
+        Returns the page, or None when the client did not ask for pagination.
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        limit = self.get_limit(request)
+        after = self.decode_cursor(request)
+
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(queryset, after, key=lambda entry: entry["name"])
+
+        page = queryset[start:start + limit]
+        self.next_name = page[-1]["name"] if start + limit < len(queryset) else None
+        return page
+
+    def get_next_link(self):
+        if self.next_name is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_name))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import math
+import os
+import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import cycle, islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from access_management_api.models import PokemonTypeGroup
+from pokemon_api.services.circuit_breaker import reset_circuit_breaker
+from pokemon_api.services.pokeapi_client import reset_session
+from pokemon_api.services.pokemon_cache import reset_pokemon_cache
+from pokemon_api.services.token_bucket import reset_bucket_store
+
+DRIVERS = ("wsgi", "asgi")
+SCENARIOS = ("login", "list", "detail")
+
+BENCHMARK_USERNAME = "benchmark"
+BENCHMARK_PASSWORD = "benchmark-password"
+
+# Throttling would measure the budgets instead of the endpoints
+UNLIMITED_BUDGET = {"CAPACITY": 10 ** 9, "RATE": 10 ** 9}
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of already sorted values, e.g. fraction=0.95 for p95.
+    """
+    if not sorted_values:
+        return 0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, statuses, elapsed):
+    """
+    Returns the statistics of a scenario run: request count, error count,
+    statuses, requests per second and p50, p95 and p99 latencies in milliseconds.
+    """
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status_code, count in statuses.items() if status_code >= 400),
+        "statuses": {str(status_code): count for status_code, count in sorted(statuses.items())},
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def fixture_pokemon_ids(fixtures, pokemon_types):
+    """
+    Returns the sorted ids of the fixture Pokémon belonging to one of the given types.
+    """
+    ids = set()
+    for pokemon_type in pokemon_types:
+        for member in fixtures.get(f"type/{pokemon_type}/", {}).get("pokemon", []):
+            ids.add(int(member["pokemon"]["url"].rstrip("/").rsplit("/", 1)[-1]))
+    return sorted(ids)
+
+
+def create_benchmark_user(pokemon_types):
+    """
+    Create the benchmark user, member of the given type groups.
+    """
+    user = get_user_model().objects.create_user(username=BENCHMARK_USERNAME, password=BENCHMARK_PASSWORD)
+    for pokemon_type in pokemon_types:
+        group, _created = PokemonTypeGroup.objects.get_or_create(name=pokemon_type)
+        user.pokemon_groups.add(group)
+    return user
+
+
+def scenario_plan(scenario, driver, requests, pokemon_ids):
+    """
+    Returns the (method, path, JSON body) of every request of a scenario.
+    The ASGI driver calls the async versions of the Pokémon endpoints.
+    """
+    prefix = "async_" if driver == "asgi" else ""
+
+    if scenario == "login":
+        body = json.dumps({"username": BENCHMARK_USERNAME, "password": BENCHMARK_PASSWORD})
+        return [("POST", reverse("login"), body)] * requests
+    if scenario == "list":
+        return [("GET", reverse(f"{prefix}pokemon_list"), None)] * requests
+    if scenario == "detail":
+        return [
+            ("GET", reverse(f"{prefix}pokemon_detail", args=[pokemon_id]), None)
+            for pokemon_id in islice(cycle(pokemon_ids), requests)
+        ]
+    raise ValueError(f"Unknown scenario {scenario!r}, use one of {', '.join(SCENARIOS)}")
+
+
+def run_wsgi(plan, concurrency, headers):
+    """
+    Send the requests of a plan through the WSGI handler from `concurrency` threads.
+    Returns (latencies, statuses, elapsed seconds).
+    """
+    local = threading.local()
+    lock = threading.Lock()
+    latencies = []
+    statuses = Counter()
+
+    def send(request):
+        if not hasattr(local, "client"):
+            local.client = Client()
+        method, path, body = request
+        started = time.perf_counter()
+        response = local.client.generic(
+            method, path, data=body or "", content_type="application/json", headers=headers,
+        )
+        latency = time.perf_counter() - started
+        with lock:
+            latencies.append(latency)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, plan))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def run_asgi(plan, concurrency, headers):
+    """
+    Send the requests of a plan through the ASGI handler from `concurrency` tasks of one event loop.
+    Returns (latencies, statuses, elapsed seconds).
+    """
+    latencies = []
+    statuses = Counter()
+
+    async def worker(requests):
+        client = AsyncClient()
+        for method, path, body in requests:
+            started = time.perf_counter()
+            response = await client.generic(
+                method, path, data=body or "", content_type="application/json", headers=headers,
+            )
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    async def main():
+        requests = iter(plan)
+        await asyncio.gather(*(worker(requests) for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return latencies, statuses, time.perf_counter() - started
+
+
+RUNNERS = {"wsgi": run_wsgi, "asgi": run_asgi}
+
+
+def reset_state():
+    """
+    Empty the caches and per-process state, so every driver starts cold.
+    """
+    cache.clear()
+    reset_pokemon_cache()
+    reset_circuit_breaker()
+    reset_bucket_store()
+    reset_session()
+
+
+@contextmanager
+def benchmark_settings(fake):
+    """
+    Point the PokeAPI client at the fake server, without throttling.
+    """
+    client_settings = {**getattr(settings, "POKEAPI_CLIENT", {}), "BASE_URL": fake.url, "TRANSPORT": "live"}
+    throttle_settings = {
+        **getattr(settings, "POKEMON_THROTTLE", {}),
+        "REQUESTS": UNLIMITED_BUDGET,
+        "UPSTREAM": UNLIMITED_BUDGET,
+    }
+    with override_settings(POKEAPI_CLIENT=client_settings, POKEMON_THROTTLE=throttle_settings, POKEAPI_OFFLINE=False):
+        reset_state()
+        try:
+            yield
+        finally:
+            reset_state()
+
+
+def run_benchmark(fake, fixtures, pokemon_types, drivers=DRIVERS, scenarios=SCENARIOS, requests=200, concurrency=8):
+    """
+    Drive the scenarios through every driver against the fake PokeAPI server.
+    Expects the benchmark user to exist (see create_benchmark_user).
+    Returns one result per driver and scenario, with the upstream calls per resource.
+    """
+    pokemon_ids = fixture_pokemon_ids(fixtures, pokemon_types)
+    results = []
+
+    with benchmark_settings(fake):
+        for driver in drivers:
+            reset_state()
+            login = Client().post(
+                reverse("login"),
+                {"username": BENCHMARK_USERNAME, "password": BENCHMARK_PASSWORD},
+                content_type="application/json",
+            )
+            headers = {"Authorization": f"Bearer {login.json()['access']}"}
+
+            for scenario in scenarios:
+                plan = scenario_plan(scenario, driver, requests, pokemon_ids)
+                fake.reset_calls()
+                latencies, statuses, elapsed = RUNNERS[driver](plan, concurrency, headers)
+                results.append({
+                    "driver": driver,
+                    "scenario": scenario,
+                    **summarize(latencies, statuses, elapsed),
+                    "upstream_calls": dict(sorted(fake.calls.items())),
+                })
+
+    return results
+
+
+def git_revision():
+    """
+    Returns (short commit hash, whether the work tree has uncommitted changes), None for both outside git.
+    """
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+
+    try:
+        return git("rev-parse", "--short", "HEAD"), bool(git("status", "--porcelain", "--untracked-files=no"))
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def make_record(config, results):
+    commit, dirty = git_revision()
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": config,
+        "results": results,
+    }
+
+
+def load_records(path):
+    """
+    Returns the stored benchmark runs, oldest first.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def store_record(path, record):
+    """
+    Append a benchmark run to the JSON Lines file at path.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def baseline_record(records, record):
+    """
+    Returns the latest stored run of another commit with the same configuration, or None.
+    """
+    for previous in reversed(records):
+        if previous["config"] == record["config"] and (
+            previous["commit"] != record["commit"] or previous["dirty"] != record["dirty"]
+        ):
+            return previous
+    return None
+
+
+def compare_results(result, baseline):
+    """
+    Returns the relative change of p95 latency and requests per second
+    of a result against the same driver and scenario of a baseline run, None when absent.
+    """
+    for previous in baseline["results"]:
+        if (previous["driver"], previous["scenario"]) == (result["driver"], result["scenario"]):
+            return {
+                "p95_ms": relative_change(previous["p95_ms"], result["p95_ms"]),
+                "rps": relative_change(previous["rps"], result["rps"]),
+            }
+    return None
+
+
+def relative_change(before, after):
+    return round((after - before) / before * 100, 1) if before else None
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CIRCUIT_BREAKER_SETTINGS = {
+    # Consecutive upstream failures that open the circuit
+    "FAILURE_THRESHOLD": 5,
+    # Seconds the circuit stays open before a single probe request is let through
+    "RESET_TIMEOUT": 30,
+}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+class UpstreamUnavailable(Exception):
+    """
+    PokeAPI could not answer: connection error, timeout, 429 or 5xx status,
+    or an open circuit. Unlike a 404, it says nothing about the resource itself.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling upstream after `failure_threshold` consecutive failures.
+    Once `reset_timeout` seconds have passed, one probe request is let through:
+    its success closes the circuit again, its failure keeps it open.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Returns whether a request may be sent upstream now.
+        While half-open, only the probe request is allowed.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            # A probe that never reported back does not keep the circuit half-open forever
+            if self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.opened_at = self.clock()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("PokeAPI answered again, closing the circuit")
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                if self.state == CLOSED:
+                    logger.warning("PokeAPI failed %d times in a row, opening the circuit", self.failures)
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    def retry_after(self):
+        """
+        Returns the seconds until the next probe, 0 when the circuit is closed.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return 0
+            return max(0, self.reset_timeout - (self.clock() - self.opened_at))
+
+
+def get_circuit_breaker_settings():
+    return {**DEFAULT_CIRCUIT_BREAKER_SETTINGS, **getattr(settings, "POKEAPI_CIRCUIT_BREAKER", {})}
+
+
+def get_circuit_breaker():
+    """
+    Returns the per-process breaker shared by the sync and async PokeAPI clients.
+    """
+    global _breaker
+
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                breaker_settings = get_circuit_breaker_settings()
+                _breaker = CircuitBreaker(
+                    failure_threshold=breaker_settings["FAILURE_THRESHOLD"],
+                    reset_timeout=breaker_settings["RESET_TIMEOUT"],
+                )
+    return _breaker
+
+
+def reset_circuit_breaker():
+    global _breaker
+
+    with _breaker_lock:
+        _breaker = None
@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pokemon_api.services.fixture_store import FixtureStore
+from pokemon_api.services.metrics import upstream_resource
+
+API_PREFIX = "/api/v2/"
+
+
+def synthetic_fixtures(pokemon_types, pokemon_per_type=50, moves_per_pokemon=80):
+    """
+    Returns PokeAPI-shaped fixtures {path: payload} for the given types: each type
+    lists `pokemon_per_type` Pokémon, reachable by id and by name. Detail payloads
+    carry `moves_per_pokemon` moves, to be about as large as the real ones.
+    """
+    fixtures = {}
+    type_list = []
+    pokemon_id = 0
+
+    for type_id, pokemon_type in enumerate(sorted(pokemon_types), start=1):
+        type_list.append({"name": pokemon_type, "url": f"https://pokeapi.co/api/v2/type/{type_id}/"})
+        members = []
+
+        for _ in range(pokemon_per_type):
+            pokemon_id += 1
+            name = f"{pokemon_type}mon-{pokemon_id}"
+            members.append({
+                "pokemon": {"name": name, "url": f"https://pokeapi.co/api/v2/pokemon/{pokemon_id}/"},
+                "slot": 1,
+            })
+            payload = {
+                "id": pokemon_id,
+                "name": name,
+                "height": 7,
+                "weight": 69,
+                "base_experience": 64,
+                "types": [{"slot": 1, "type": {"name": pokemon_type, "url": type_list[-1]["url"]}}],
+                "abilities": [{"ability": {"name": "overgrow", "url": "https://pokeapi.co/api/v2/ability/65/"}}],
+                "stats": [
+                    {"base_stat": 45, "effort": 0, "stat": {"name": stat, "url": "https://pokeapi.co/api/v2/stat/"}}
+                    for stat in ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+                ],
+                "moves": [
+                    {
+                        "move": {"name": f"move-{move}", "url": f"https://pokeapi.co/api/v2/move/{move}/"},
+                        "version_group_details": [{
+                            "level_learned_at": move % 50,
+                            "move_learn_method": {"name": "level-up", "url": "https://pokeapi.co/api/v2/move-learn-method/1/"},
+                            "version_group": {"name": "red-blue", "url": "https://pokeapi.co/api/v2/version-group/1/"},
+                        }],
+                    }
+                    for move in range(1, moves_per_pokemon + 1)
+                ],
+                "sprites": {"front_default": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{pokemon_id}.png"},
+            }
+            fixtures[f"pokemon/{pokemon_id}/"] = fixtures[f"pokemon/{name}/"] = payload
+
+        fixtures[f"type/{pokemon_type}/"] = {"id": type_id, "name": pokemon_type, "pokemon": members}
+
+    fixtures["type/?limit=100"] = {"count": len(type_list), "results": type_list}
+    return fixtures
+
+
+def load_fixtures(path):
+    """
+    Read fixtures from a JSON file mapping PokeAPI paths, e.g. "pokemon/pikachu/", to payloads,
+    or from a FixtureStore directory filled by the record transport mode.
+    """
+    if os.path.isdir(path):
+        return FixtureStore(path).payloads()
+    with open(path) as f:
+        return json.load(f)
+
+
+class FakePokeAPI:
+    """
+    Local stand-in for PokeAPI serving fixtures over HTTP, for benchmarks and offline development.
+    Every answer is delayed by `latency` ± `jitter` seconds and an `error_rate` share of them
+    are replaced by `error_status`. `calls` counts the requests received per resource.
+    """
+
+    def __init__(self, fixtures, latency=0, jitter=0, error_rate=0, error_status=503, seed=None, port=0):
+        self.fixtures = {path: json.dumps(payload).encode() for path, payload in fixtures.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self.handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status_code, body = fake.answer(self.path)
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def answer(self, request_path):
+        """
+        Returns (status code, body) for a request path, e.g. "/api/v2/type/fire/".
+        """
+        path = request_path[len(API_PREFIX):] if request_path.startswith(API_PREFIX) else request_path.lstrip("/")
+
+        with self._lock:
+            self.calls[upstream_resource(path)] += 1
+            delay = max(0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return self.error_status, b'{"detail": "Injected error"}'
+
+        # PokeAPI accepts paths with and without their trailing slash
+        body = self.fixtures.get(path) or self.fixtures.get(f"{path.split('?', 1)[0].rstrip('/')}/")
+        if body is None:
+            return 404, b'{"detail": "Not found."}'
+        return 200, body
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-pokeapi", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+from django.conf import settings
+from django.db import connections
+
+from pokemon_api.services.metrics import FAN_OUT_DURATION, FAN_OUT_KEYS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAN_OUT_SETTINGS = {
+    "MAX_WORKERS": 8,
+    "DEADLINE": 5.0,
+    "ASYNC_LIMIT": 32,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_fan_out_settings():
+    return {**DEFAULT_FAN_OUT_SETTINGS, **getattr(settings, "POKEMON_FAN_OUT", {})}
+
+
+def get_executor():
+    """
+    Returns the per-process thread pool. Its size is the concurrency
+    limit for upstream lookups across all requests of this process.
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_fan_out_settings()["MAX_WORKERS"],
+                    thread_name_prefix="pokeapi-fan-out",
+                )
+    return _executor
+
+
+def run_in_worker(context, fetch, key):
+    """
+    Run fetch(key) on a pool thread in the caller's context. The database connections
+    the lookup opened on this thread, e.g. reading the mirror in offline mode, are closed:
+    request signals only close the connections of the request thread.
+    """
+    try:
+        return context.run(fetch, key)
+    finally:
+        connections.close_all()
+
+
+def iter_fan_out(fetch, keys, deadline=None):
+    """
+    Run fetch(key) for every key concurrently and yield (key, value, ok)
+    as soon as each lookup completes. Keys that failed or missed the
+    `deadline` (in seconds) are yielded with ok=False.
+    Lookups run in the caller's context, e.g. under its upstream budget.
+    """
+    if deadline is None:
+        deadline = get_fan_out_settings()["DEADLINE"]
+
+    started = time.perf_counter()
+    executor = get_executor()
+    futures = {executor.submit(run_in_worker, contextvars.copy_context(), fetch, key): key for key in keys}
+    pending = set(futures)
+
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            pending.discard(future)
+            key = futures[future]
+            try:
+                value = future.result()
+            except Exception as exc:
+                logger.warning("Upstream lookup for %r failed: %r", key, exc)
+                FAN_OUT_KEYS.inc(result="missing")
+                yield key, None, False
+            else:
+                FAN_OUT_KEYS.inc(result="ok")
+                yield key, value, True
+    except TimeoutError:
+        pass
+
+    for future in pending:
+        # Queued lookups are dropped, running ones finish in the background
+        future.cancel()
+        FAN_OUT_KEYS.inc(result="missing")
+        yield futures[future], None, False
+
+    FAN_OUT_DURATION.observe(time.perf_counter() - started)
+
+
+def fan_out(fetch, keys, deadline=None):
+    """
+    Run fetch(key) for every key concurrently and wait at most `deadline`
+    seconds for all of them.
+    Returns (results, missing): results maps each completed key to its
+    value, missing is the set of keys that failed or missed the deadline.
+    """
+    results = {}
+    missing = set()
+
+    for key, value, ok in iter_fan_out(fetch, keys, deadline):
+        if ok:
+            results[key] = value
+        else:
+            missing.add(key)
+
+    return results, missing
+
+
+async def async_fan_out(fetch, keys, deadline=None, limit=None):
+    """
+    Async fan_out: await fetch(key) for every key with at most `limit` lookups
+    in flight and wait at most `deadline` seconds for all of them.
+    Lookups still running at the deadline are cancelled.
+    Returns (results, missing) like fan_out.
+    """
+    fan_out_settings = get_fan_out_settings()
+    if deadline is None:
+        deadline = fan_out_settings["DEADLINE"]
+    semaphore = asyncio.Semaphore(limit or fan_out_settings["ASYNC_LIMIT"])
+    started = time.perf_counter()
+
+    async def run(key):
+        async with semaphore:
+            return await fetch(key)
+
+    tasks = {key: asyncio.ensure_future(run(key)) for key in keys}
+
+    try:
+        await asyncio.wait_for(asyncio.gather(*tasks.values(), return_exceptions=True), deadline)
+    except asyncio.TimeoutError:
+        pass
+
+    results = {}
+    missing = set()
+
+    for key, task in tasks.items():
+        if task.cancelled():
+            missing.add(key)
+        elif task.exception() is not None:
+            logger.warning("Upstream lookup for %r failed: %r", key, task.exception())
+            missing.add(key)
+        else:
+            results[key] = task.result()
+
+    FAN_OUT_KEYS.inc(len(results), result="ok")
+    FAN_OUT_KEYS.inc(len(missing), result="missing")
+    FAN_OUT_DURATION.observe(time.perf_counter() - started)
+    return results, missing
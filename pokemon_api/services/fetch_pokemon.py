@@ -1,15 +1,147 @@
+import httpx
 import requests
+from asgiref.sync import sync_to_async
+
+from pokemon_api.services.circuit_breaker import UpstreamUnavailable
+from pokemon_api.services.identifiers import canonical_pokemon_key, remember_pokemon_identifiers
+from pokemon_api.services.mirror import fetch_pokemon_from_mirror, is_offline
+from pokemon_api.services.pokeapi_client import pokeapi_aget, pokeapi_get
+from pokemon_api.services.pokemon_access import remember_pokemon_types
+from pokemon_api.services.pokemon_cache import get_pokemon_cache
+from pokemon_api.services.singleflight import pokeapi_async_flight, pokeapi_flight
+from pokemon_api.services.token_bucket import UpstreamBudgetExceeded
+
+
+def fetch_pokemon_from_pokeapi(identifier):
+    """
+    Fetch a Pokémon from the official PokeAPI, bypassing the cache.
+    Returns None if not found, raises UpstreamUnavailable when PokeAPI cannot answer.
+    """
+    response = pokeapi_get(f"pokemon/{identifier}/")
+
+    if response.status_code == 404:
+        return None
+
+    response.raise_for_status()
+    pokemon_data = response.json()
+    remember_pokemon_types(pokemon_data)
+    remember_pokemon_identifiers(pokemon_data)
+    return pokemon_data
+
+
+def share_under_id(key, pokemon_data):
+    """
+    A Pokémon fetched by name is also cached under its id, the key later lookups resolve to.
+    """
+    if pokemon_data is not None and pokemon_data.get("id") is not None and str(pokemon_data["id"]) != key:
+        get_pokemon_cache().put(str(pokemon_data["id"]), pokemon_data)
+    return pokemon_data
 
 
 def fetch_pokemon(identifier):
     """
-    Fetch a Pokémon from the official PokeAPI.
-    Returns None if not found.
+    Fetch a Pokémon, served from the detail cache when possible.
+    Ids and names of the same Pokémon share one cache entry and one upstream call,
+    and identifiers the complete local index does not know are not looked up at all.
+    Concurrent misses for the same Pokémon share a single upstream call.
+    In offline mode misses are read from the local mirror instead of PokeAPI.
+    Returns None if not found, raises UpstreamUnavailable when PokeAPI cannot
+    answer and the Pokémon was never cached.
+    """
+    return fetch_pokemon_or_stale(identifier)[0]
+
+
+def fetch_pokemon_or_stale(identifier):
+    """
+    fetch_pokemon returning (pokemon_data, stale), stale telling that PokeAPI
+    could not answer and the last cached version was served instead.
+    UpstreamBudgetExceeded is always raised, like by fetch_pokemon_by_type_or_stale.
     """
-    url = f"https://pokeapi.co/api/v2/pokemon/{identifier}/"
-    response = requests.get(url)
+    key = canonical_pokemon_key(identifier)
+    if key is None:
+        return None, False
+
+    if is_offline():
+        return get_pokemon_cache().lookup(
+            key,
+            lambda: fetch_pokemon_from_mirror(key),
+        )
+
+    try:
+        return get_pokemon_cache().lookup(
+            key,
+            lambda: share_under_id(key, pokeapi_flight.do(
+                f"pokemon/{key}",
+                lambda: fetch_pokemon_from_pokeapi(key),
+            )),
+            stale_on=(UpstreamUnavailable,),
+            # A spent upstream budget is not an outage
+            raise_on=(UpstreamBudgetExceeded,),
+        )
+    except requests.HTTPError:
+        # PokeAPI rejected the identifier itself
+        return None, False
 
-    if response.status_code != 200:
+
+def peek_pokemon(identifier):
+    """
+    Returns the cache entry of a Pokémon without calling upstream, or None if it is not cached.
+    """
+    key = canonical_pokemon_key(identifier)
+    return get_pokemon_cache().peek(key) if key is not None else None
+
+
+async def afetch_pokemon_from_pokeapi(identifier):
+    """
+    Async fetch_pokemon_from_pokeapi, raises UpstreamUnavailable when PokeAPI cannot answer.
+    """
+    response = await pokeapi_aget(f"pokemon/{identifier}/")
+
+    if response.status_code == 404:
         return None
 
-    return response.json()
+    response.raise_for_status()
+    pokemon_data = response.json()
+    await sync_to_async(remember_pokemon_types, thread_sensitive=False)(pokemon_data)
+    remember_pokemon_identifiers(pokemon_data)
+    return pokemon_data
+
+
+async def afetch_pokemon(identifier):
+    """
+    Async fetch_pokemon, sharing the detail cache with it. Returns None if not found.
+    """
+    return (await afetch_pokemon_or_stale(identifier))[0]
+
+
+async def afetch_pokemon_or_stale(identifier):
+    """
+    Async fetch_pokemon_or_stale.
+    """
+    key = await sync_to_async(canonical_pokemon_key)(identifier)
+    if key is None:
+        return None, False
+
+    if is_offline():
+        return await get_pokemon_cache().alookup(
+            key,
+            lambda: sync_to_async(fetch_pokemon_from_mirror)(key),
+        )
+
+    async def fetch():
+        pokemon_data = await pokeapi_async_flight.do(
+            f"pokemon/{key}",
+            lambda: afetch_pokemon_from_pokeapi(key),
+        )
+        return await sync_to_async(share_under_id, thread_sensitive=False)(key, pokemon_data)
+
+    try:
+        return await get_pokemon_cache().alookup(
+            key, fetch, stale_on=(UpstreamUnavailable,), raise_on=(UpstreamBudgetExceeded,)
+        )
+    except httpx.HTTPStatusError:
+        return None, False
+
+
+async def apeek_pokemon(identifier):
+    return await sync_to_async(peek_pokemon)(identifier)
@@ -1,18 +1,121 @@
+import httpx
 import requests
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from pokemon_api.services.circuit_breaker import UpstreamUnavailable
+from pokemon_api.services.mirror import fetch_pokemon_by_type_from_mirror, is_offline
+from pokemon_api.services.pokeapi_client import pokeapi_aget, pokeapi_get
+from pokemon_api.services.singleflight import pokeapi_async_flight, pokeapi_flight
+from pokemon_api.services.token_bucket import UpstreamBudgetExceeded
+
+
+def fetch_pokemon_by_type_from_pokeapi(pokemon_type):
+    """
+    Fetch all Pokémon belonging to a given type from the official PokeAPI.
+    Returns None if the type is not found, raises UpstreamUnavailable when PokeAPI cannot answer.
+    """
+    response = pokeapi_get(f"type/{pokemon_type}/")
+
+    if response.status_code == 404:
+        return None
+
+    response.raise_for_status()
+    data = response.json()
+    return [
+        entry["pokemon"]
+        for entry in data.get("pokemon", [])
+    ]
+
+
+def last_known_members_key(pokemon_type):
+    return f"pokemon_type_members:{pokemon_type}"
+
 
 def fetch_pokemon_by_type(pokemon_type):
     """
     Fetch all Pokémon belonging to a given type.
+    Concurrent calls for the same type share a single upstream call.
+    In offline mode the type is read from the local mirror instead of PokeAPI.
     Returns a list of dicts: [{ "name": "...", "url": "..." }, ...]
     """
-    url = f"https://pokeapi.co/api/v2/type/{pokemon_type}/"
-    response = requests.get(url)
+    return fetch_pokemon_by_type_or_stale(pokemon_type)[0]
+
+
+def fetch_pokemon_by_type_or_stale(pokemon_type):
+    """
+    fetch_pokemon_by_type returning (pokemon_entries, stale). When PokeAPI cannot answer,
+    the members it last returned for the type are served with stale=True,
+    and UpstreamUnavailable is only raised when there are none.
+    A spent upstream budget is not an outage: UpstreamBudgetExceeded is always raised.
+    """
+    if is_offline():
+        return fetch_pokemon_by_type_from_mirror(pokemon_type) or [], False
+
+    try:
+        pokemon_entries = pokeapi_flight.do(
+            f"type/{pokemon_type}",
+            lambda: fetch_pokemon_by_type_from_pokeapi(pokemon_type),
+        ) or []
+    except requests.HTTPError:
+        return [], False
+    except UpstreamBudgetExceeded:
+        raise
+    except UpstreamUnavailable:
+        pokemon_entries = cache.get(last_known_members_key(pokemon_type))
+        if pokemon_entries is None:
+            raise
+        return pokemon_entries, True
+
+    cache.set(last_known_members_key(pokemon_type), pokemon_entries, timeout=None)
+    return pokemon_entries, False
 
-    if response.status_code != 200:
-        return []
 
+async def afetch_pokemon_by_type_from_pokeapi(pokemon_type):
+    """
+    Async fetch_pokemon_by_type_from_pokeapi, raises UpstreamUnavailable when PokeAPI cannot answer.
+    """
+    response = await pokeapi_aget(f"type/{pokemon_type}/")
+
+    if response.status_code == 404:
+        return None
+
+    response.raise_for_status()
     data = response.json()
     return [
         entry["pokemon"]
         for entry in data.get("pokemon", [])
-    ]
\ No newline at end of file
+    ]
+
+
+async def afetch_pokemon_by_type(pokemon_type):
+    """
+    Async fetch_pokemon_by_type. Returns a list of dicts: [{ "name": "...", "url": "..." }, ...]
+    """
+    return (await afetch_pokemon_by_type_or_stale(pokemon_type))[0]
+
+
+async def afetch_pokemon_by_type_or_stale(pokemon_type):
+    """
+    Async fetch_pokemon_by_type_or_stale.
+    """
+    if is_offline():
+        return await sync_to_async(fetch_pokemon_by_type_from_mirror)(pokemon_type) or [], False
+
+    try:
+        pokemon_entries = await pokeapi_async_flight.do(
+            f"type/{pokemon_type}",
+            lambda: afetch_pokemon_by_type_from_pokeapi(pokemon_type),
+        ) or []
+    except httpx.HTTPStatusError:
+        return [], False
+    except UpstreamBudgetExceeded:
+        raise
+    except UpstreamUnavailable:
+        pokemon_entries = await cache.aget(last_known_members_key(pokemon_type))
+        if pokemon_entries is None:
+            raise
+        return pokemon_entries, True
+
+    await cache.aset(last_known_members_key(pokemon_type), pokemon_entries, timeout=None)
+    return pokemon_entries, False
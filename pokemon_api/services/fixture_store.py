@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+from urllib.parse import quote, unquote
+
+from pokemon_api.services.payload_codec import decode_payload, encode_payload
+
+FIXTURE_SUFFIX = ".bin"
+
+
+class FixtureStore:
+    """
+    Recorded PokeAPI answers, one file per path (e.g. "pokemon/pikachu/"), holding
+    its status and body encoded with the payload codec, so about a tenth of the JSON.
+    Written to by the record transport mode, read by the replay one.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+
+    def path_of(self, path):
+        return os.path.join(self.directory, quote(path, safe="") + FIXTURE_SUFFIX)
+
+    def get(self, path):
+        """
+        Returns the recorded (status code, body bytes) of a path, or None.
+        """
+        try:
+            with open(self.path_of(path), "rb") as f:
+                answer = decode_payload(f.read())
+        except FileNotFoundError:
+            return None
+
+        if "json" in answer:
+            return answer["status"], json.dumps(answer["json"]).encode()
+        return answer["status"], answer["text"].encode()
+
+    def put(self, path, status_code, body):
+        """
+        Record the answer to a path. JSON bodies are stored parsed, to be compressed without escaping.
+        """
+        try:
+            answer = {"status": status_code, "json": json.loads(body)}
+        except ValueError:
+            answer = {"status": status_code, "text": body.decode(errors="replace")}
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_path = self.path_of(path)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode_payload(answer))
+        os.replace(tmp_path, file_path)
+
+    def paths(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            unquote(name[:-len(FIXTURE_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(FIXTURE_SUFFIX)
+        )
+
+    def payloads(self):
+        """
+        Returns {path: payload} of the successful JSON answers, e.g. to serve them with FakePokeAPI.
+        """
+        payloads = {}
+        for path in self.paths():
+            status_code, body = self.get(path)
+            if status_code == 200:
+                try:
+                    payloads[path] = json.loads(body)
+                except ValueError:
+                    continue
+        return payloads
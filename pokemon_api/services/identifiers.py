@@ -0,0 +1,125 @@
+import threading
+
+from access_management_api.services.load_pokemon_types import DEFAULT_POKEMON_TYPES
+from pokemon_api.models import Pokemon, PokemonType
+from pokemon_api.services.list_cache import get_index_version
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def normalize_identifier(identifier):
+    """
+    "Pikachu " -> "pikachu", "025" -> "25".
+    """
+    identifier = str(identifier).strip().lower()
+    if identifier.isdigit():
+        return str(int(identifier))
+    return identifier
+
+
+def pokemon_lookup(identifier):
+    """
+    Returns the Pokemon filter kwargs for an id or a name.
+    """
+    identifier = normalize_identifier(identifier)
+    if identifier.isdigit():
+        return {"pokeapi_id": int(identifier)}
+    return {"name": identifier}
+
+
+class IdentifierIndex:
+    """
+    Bidirectional PokeAPI id <-> name index, built from the type index and
+    completed with the documents fetched since. It turns every identifier of a
+    Pokémon into the same canonical key, its id when known.
+    A complete index also knows which identifiers do not exist.
+    """
+
+    def __init__(self, pairs, complete=False, version=None):
+        """
+        `pairs` are (name, PokeAPI id or None) tuples.
+        """
+        self.version = version
+        self.complete = complete
+        self.ids_by_name = {}
+        self.names_by_id = {}
+        self._lock = threading.Lock()
+
+        for name, pokeapi_id in pairs:
+            self.add(pokeapi_id, name)
+
+    @classmethod
+    def from_index(cls, version=None):
+        """
+        The index is complete once every known type has been synced.
+        """
+        type_rows = list(PokemonType.objects.values_list("name", "synced_at"))
+        synced_types = {name for name, synced_at in type_rows if synced_at is not None}
+        known_types = DEFAULT_POKEMON_TYPES.union(name for name, _synced_at in type_rows)
+
+        return cls(
+            Pokemon.objects.values_list("name", "pokeapi_id"),
+            complete=known_types <= synced_types,
+            version=version,
+        )
+
+    def add(self, pokeapi_id, name):
+        name = normalize_identifier(name) if name is not None else None
+
+        with self._lock:
+            if name is not None:
+                self.ids_by_name[name] = pokeapi_id if pokeapi_id is not None else self.ids_by_name.get(name)
+            if pokeapi_id is not None:
+                self.names_by_id[int(pokeapi_id)] = name
+
+    def canonical_key(self, identifier):
+        """
+        Returns the key shared by every identifier of a Pokémon,
+        or None when the index is complete and the Pokémon does not exist.
+        """
+        identifier = normalize_identifier(identifier)
+
+        if identifier.isdigit():
+            known = int(identifier) in self.names_by_id
+            key = identifier
+        else:
+            known = identifier in self.ids_by_name
+            pokeapi_id = self.ids_by_name.get(identifier)
+            key = str(pokeapi_id) if pokeapi_id is not None else identifier
+
+        if not known and self.complete:
+            return None
+        return key
+
+
+def get_identifier_index():
+    """
+    Returns the identifier index of the current type index, rebuilt whenever its version changes.
+    """
+    global _index
+
+    version = get_index_version()
+    index = _index
+
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = IdentifierIndex.from_index(version=version)
+            index = _index
+
+    return index
+
+
+def canonical_pokemon_key(identifier):
+    return get_identifier_index().canonical_key(identifier)
+
+
+def remember_pokemon_identifiers(pokemon_data):
+    """
+    Add the id and name of a fetched document to the index, if it is loaded.
+    Runs on fetch threads, so it never loads the index from the database itself.
+    """
+    index = _index
+    if index is not None and pokemon_data.get("id") is not None and pokemon_data.get("name"):
+        index.add(pokemon_data["id"], pokemon_data["name"])
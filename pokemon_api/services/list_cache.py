@@ -0,0 +1,75 @@
+import hashlib
+import json
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from pokemon_api.services.metrics import CACHE_LOOKUPS
+
+DEFAULT_LIST_CACHE_TIMEOUT = 60 * 60
+
+LIST_VERSION_KEY = "pokemon_list:version"
+
+# `digest` identifies the list for a set of type groups, e.g. to build ETags
+PokemonListEntry = namedtuple("PokemonListEntry", ["pokemon_list", "digest", "created_at"])
+
+
+def group_set_key(pokemon_types):
+    """
+    Canonical cache key of a set of type groups: users with the same groups share it.
+    """
+    version = get_index_version()
+    digest = hashlib.sha1(",".join(sorted(pokemon_types)).encode()).hexdigest()
+    return f"pokemon_list:{version}:{digest}"
+
+
+def get_index_version():
+    """
+    Version of the type index, bumped by invalidate_pokemon_lists() whenever the index changes.
+    """
+    return cache.get_or_set(LIST_VERSION_KEY, new_list_version, timeout=None)
+
+
+async def aget_index_version():
+    return await cache.aget_or_set(LIST_VERSION_KEY, new_list_version, timeout=None)
+
+
+def new_list_version():
+    # Time based, so a lost version key never brings back lists cached before it was lost
+    return time.time_ns()
+
+
+def make_pokemon_list_entry(pokemon_types, pokemon_list):
+    encoded = json.dumps([sorted(pokemon_types), pokemon_list], separators=(",", ":")).encode()
+    return PokemonListEntry(pokemon_list, hashlib.sha1(encoded).hexdigest(), time.time())
+
+
+def get_cached_pokemon_list(pokemon_types):
+    """
+    Returns the cached PokemonListEntry for a set of type groups, or None.
+    """
+    entry = cache.get(group_set_key(pokemon_types))
+    CACHE_LOOKUPS.inc(cache="pokemon_list", result="hit" if entry is not None else "miss")
+    return entry
+
+
+def cache_pokemon_list(pokemon_types, pokemon_list):
+    """
+    Cache the list of a set of type groups and return its PokemonListEntry.
+    """
+    entry = make_pokemon_list_entry(pokemon_types, pokemon_list)
+    timeout = getattr(settings, "POKEMON_LIST_CACHE_TIMEOUT", DEFAULT_LIST_CACHE_TIMEOUT)
+    cache.set(group_set_key(pokemon_types), entry, timeout=timeout)
+    return entry
+
+
+def invalidate_pokemon_lists():
+    """
+    Drop every cached list and index snapshot at once, e.g. after the type index changed.
+    """
+    try:
+        cache.incr(LIST_VERSION_KEY)
+    except ValueError:
+        cache.set(LIST_VERSION_KEY, new_list_version(), timeout=None)
@@ -0,0 +1,321 @@
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from pokemon_api.services.server_timing import timed_phase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_SETTINGS = {
+    # Directory where every worker process writes its snapshot, None for a single process
+    "MULTIPROCESS_DIR": None,
+    # Seconds between two snapshots of a worker
+    "SNAPSHOT_INTERVAL": 5,
+    # Clients allowed to scrape /metrics
+    "ALLOWED_IPS": ["127.0.0.1", "::1"],
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Queries of the request being served, see count_query
+_query_counter = contextvars.ContextVar("query_counter", default=None)
+
+
+def get_metrics_settings():
+    return {**DEFAULT_METRICS_SETTINGS, **getattr(settings, "POKEMON_METRICS", {})}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters and histograms, rendered in the Prometheus text format.
+    Each worker process records its own samples and, with MULTIPROCESS_DIR, periodically
+    writes them to a snapshot file that /metrics sums with those of the other workers.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.counters = {}
+        self.histograms = {}
+        self.snapshot_at = 0
+
+    def _check_pid(self):
+        # Samples inherited from a parent process are its own, not this worker's
+        if self.pid != os.getpid():
+            self._reset()
+
+    def counter(self, name, documentation, labelnames=()):
+        self.metrics[name] = ("counter", documentation, tuple(labelnames), None)
+        return Counter(self, name, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.metrics[name] = ("histogram", documentation, tuple(labelnames), tuple(buckets))
+        return Histogram(self, name, labelnames, buckets)
+
+    def inc(self, name, labels, amount):
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, buckets, value):
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            sample = self.histograms.get(key)
+            if sample is None:
+                sample = self.histograms[key] = [[0] * len(buckets), 0, 0]
+            # Bucket counts are not cumulative here, render() adds them up
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                sample[0][index] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    def snapshot(self):
+        """
+        Returns the samples of this process as JSON-serializable data.
+        """
+        with self._lock:
+            self._check_pid()
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, list(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self.histograms.items()
+                ],
+            }
+
+    def write_snapshot(self, directory):
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+        self.snapshot_at = time.monotonic()
+
+    def maybe_write_snapshot(self):
+        """
+        Write the snapshot of this process when SNAPSHOT_INTERVAL passed since the last one.
+        """
+        metrics_settings = get_metrics_settings()
+        directory = metrics_settings["MULTIPROCESS_DIR"]
+        if directory and time.monotonic() - self.snapshot_at >= metrics_settings["SNAPSHOT_INTERVAL"]:
+            try:
+                self.write_snapshot(directory)
+            except OSError:
+                logger.warning("Could not write the metrics snapshot to %s", directory, exc_info=True)
+
+    def collect(self):
+        """
+        Returns the samples of every worker process, or of this one without MULTIPROCESS_DIR.
+        """
+        directory = get_metrics_settings()["MULTIPROCESS_DIR"]
+        if not directory:
+            return merge_snapshots([self.snapshot()])
+
+        self.write_snapshot(directory)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        counters, histograms = self.collect()
+        lines = []
+
+        for name, (kind, documentation, labelnames, buckets) in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            if kind == "counter":
+                for labels, value in sorted(counters.get(name, {}).items()):
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+                continue
+
+            for labels, (counts, total, count) in sorted(histograms.get(name, {}).items()):
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    le = labels + (("le", format_value(bound)),)
+                    lines.append(f"{name}_bucket{format_labels(le)} {cumulative}")
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+class Counter:
+
+    def __init__(self, registry, name, labelnames):
+        self.registry = registry
+        self.name = name
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, amount=1, **labels):
+        self.registry.inc(self.name, label_values(self.labelnames, labels), amount)
+
+
+class Histogram:
+
+    def __init__(self, registry, name, labelnames, buckets):
+        self.registry = registry
+        self.name = name
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        self.registry.observe(self.name, label_values(self.labelnames, labels), self.buckets, value)
+
+
+def label_values(labelnames, labels):
+    return tuple((name, str(labels[name])) for name in labelnames)
+
+
+def merge_snapshots(snapshots):
+    """
+    Sum the samples of several snapshots. Returns (counters, histograms),
+    both mapping metric names to {labels: sample}.
+    """
+    counters = {}
+    histograms = {}
+
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            samples = counters.setdefault(name, {})
+            labels = tuple(map(tuple, labels))
+            samples[labels] = samples.get(labels, 0) + value
+
+        for name, labels, counts, total, count in snapshot["histograms"]:
+            samples = histograms.setdefault(name, {})
+            labels = tuple(map(tuple, labels))
+            previous = samples.get(labels)
+            if previous is not None:
+                counts = [a + b for a, b in zip(previous[0], counts)]
+                total, count = previous[1] + total, previous[2] + count
+            samples[labels] = (counts, total, count)
+
+    return counters, histograms
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting the queries of the current request,
+    including the ones it runs in worker threads (see start_query_count),
+    and timing them when the request is timed (see timed_phase).
+    """
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+    with timed_phase("db"):
+        return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    connection_created receiver wrapping every new database connection with count_query.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def start_query_count():
+    """
+    Start counting the queries of the current context. Returns (counter, token for stop_query_count).
+    """
+    counter = QueryCounter()
+    return counter, _query_counter.set(counter)
+
+
+def stop_query_count(token):
+    _query_counter.reset(token)
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "http_requests_total", "Requests served, by endpoint, method and status.",
+    ["endpoint", "method", "status"],
+)
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Time to build the response, by endpoint.",
+    ["endpoint"],
+)
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries", "Database queries per request, by endpoint.",
+    ["endpoint"], buckets=COUNT_BUCKETS,
+)
+UPSTREAM_REQUESTS = registry.counter(
+    "pokeapi_requests_total",
+    "PokeAPI calls by resource and outcome: a status code, error, not_recorded, circuit_open or budget_exceeded.",
+    ["resource", "outcome"],
+)
+UPSTREAM_DURATION = registry.histogram(
+    "pokeapi_request_duration_seconds", "Duration of the PokeAPI calls that were sent, by resource.",
+    ["resource"],
+)
+UPSTREAM_COALESCED = registry.counter(
+    "pokeapi_coalesced_total", "PokeAPI calls saved by sharing a concurrent identical call.",
+)
+CACHE_LOOKUPS = registry.counter(
+    "pokemon_cache_lookups_total",
+    "Cache lookups by cache and result: hit, stale, negative_hit, miss or fallback.",
+    ["cache", "result"],
+)
+FAN_OUT_KEYS = registry.counter(
+    "pokemon_fan_out_keys_total", "Keys looked up concurrently, by result: ok or missing.",
+    ["result"],
+)
+FAN_OUT_DURATION = registry.histogram(
+    "pokemon_fan_out_duration_seconds", "Time until every key of a fan-out completed or the deadline passed.",
+)
+
+
+def upstream_resource(path):
+    """
+    "pokemon/pikachu/" -> "pokemon", so the label stays bounded.
+    """
+    return path.split("/", 1)[0].split("?", 1)[0] or "root"
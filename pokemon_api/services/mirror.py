@@ -0,0 +1,39 @@
+from django.conf import settings
+
+from pokemon_api.models import Pokemon, PokemonDocument, PokemonType
+from pokemon_api.services.identifiers import pokemon_lookup
+from pokemon_api.services.payload_codec import decode_payload
+from pokemon_api.services.pokeapi_client import get_client_settings
+
+
+def is_offline():
+    """
+    In offline mode (POKEAPI_OFFLINE) the services read the local mirror
+    filled by `manage.py sync_pokeapi` and never call PokeAPI.
+    """
+    return getattr(settings, "POKEAPI_OFFLINE", False)
+
+
+def fetch_pokemon_from_mirror(identifier):
+    """
+    Returns the mirrored detail document of a Pokémon, or None if it is not mirrored.
+    """
+    lookup = {f"pokemon__{field}": value for field, value in pokemon_lookup(identifier).items()}
+    payload = PokemonDocument.objects.filter(**lookup).values_list("payload", flat=True).first()
+    return decode_payload(payload) if payload is not None else None
+
+
+def fetch_pokemon_by_type_from_mirror(pokemon_type):
+    """
+    Returns the mirrored members of a type in the PokeAPI format, or None if the type is not mirrored.
+    """
+    if not PokemonType.objects.filter(name=pokemon_type, synced_at__isnull=False).exists():
+        return None
+
+    base_url = get_client_settings()["BASE_URL"]
+    return [
+        {"name": name, "url": f"{base_url}pokemon/{pokeapi_id}/"}
+        for name, pokeapi_id in Pokemon.objects.filter(
+            types__name=pokemon_type
+        ).values_list("name", "pokeapi_id")
+    ]
@@ -0,0 +1,54 @@
+import json
+import zlib
+
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+DEFAULT_PAYLOAD_CODEC = "zlib"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def _zstd_compress(data):
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def _zstd_decompress(data):
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+# name: (one byte tag stored in front of the payload, compress, decompress)
+CODECS = {
+    "json": (b"J", bytes, bytes),
+    "zlib": (b"Z", lambda data: zlib.compress(data, ZLIB_LEVEL), zlib.decompress),
+    "zstd": (b"S", _zstd_compress, _zstd_decompress),
+}
+
+CODECS_BY_TAG = {tag: codec for tag, *codec in CODECS.values()}
+
+
+def get_codec_name():
+    name = getattr(settings, "POKEMON_PAYLOAD_CODEC", DEFAULT_PAYLOAD_CODEC)
+    if name == "zstd" and zstandard is None:
+        return DEFAULT_PAYLOAD_CODEC
+    return name
+
+
+def encode_payload(value):
+    """
+    Encode a payload as compact JSON compressed with the POKEMON_PAYLOAD_CODEC codec
+    ("zlib" by default, "zstd" when the zstandard package is installed, or "json" for none).
+    The codec is recorded in the first byte, so stored payloads stay readable when it changes.
+    """
+    tag, compress, _decompress = CODECS[get_codec_name()]
+    return tag + compress(json.dumps(value, separators=(",", ":")).encode())
+
+
+def decode_payload(blob):
+    _compress, decompress = CODECS_BY_TAG[bytes(blob[:1])]
+    return json.loads(decompress(bytes(blob[1:])))
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pokemon_api.services.circuit_breaker import UpstreamUnavailable, get_circuit_breaker
+from pokemon_api.services.pokeapi_transport import (
+    RECORD,
+    REPLAY,
+    AsyncRecordingTransport,
+    AsyncReplayTransport,
+    FixtureNotFound,
+    RecordingAdapter,
+    ReplayAdapter,
+    get_fixture_store,
+)
+from pokemon_api.services.metrics import UPSTREAM_DURATION, UPSTREAM_REQUESTS, upstream_resource
+from pokemon_api.services.server_timing import add_timing
+from pokemon_api.services.token_bucket import UpstreamBudgetExceeded, charge_upstream
+
+DEFAULT_CLIENT_SETTINGS = {
+    "BASE_URL": "https://pokeapi.co/api/v2/",
+    "CONNECT_TIMEOUT": 3.05,
+    "READ_TIMEOUT": 10,
+    "MAX_RETRIES": 2,
+    "BACKOFF_FACTOR": 0.3,
+    "POOL_CONNECTIONS": 4,
+    "POOL_MAXSIZE": 16,
+    # Connections the async client may open at once, see pokeapi_aget
+    "ASYNC_MAX_CONNECTIONS": 100,
+    # "live", "record" (call PokeAPI and save its answers to FIXTURES_DIR) or "replay" (answer from FIXTURES_DIR only)
+    "TRANSPORT": "live",
+    "FIXTURES_DIR": None,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+# One async client per event loop, its connections cannot be shared across loops
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client_settings():
+    """
+    Returns the PokeAPI client settings, with the project's
+    POKEAPI_CLIENT overrides applied on top of the defaults.
+    """
+    return {**DEFAULT_CLIENT_SETTINGS, **getattr(settings, "POKEAPI_CLIENT", {})}
+
+
+def build_session(client_settings):
+    """
+    Build a requests session with a bounded keep-alive connection pool
+    and retries with exponential backoff for idempotent requests.
+    In record and replay modes its adapter goes through the fixture store.
+    """
+    store = get_fixture_store(client_settings)
+    session = requests.Session()
+
+    if client_settings["TRANSPORT"] == REPLAY:
+        adapter = ReplayAdapter(store, client_settings["BASE_URL"])
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    retry = Retry(
+        total=client_settings["MAX_RETRIES"],
+        backoff_factor=client_settings["BACKOFF_FACTOR"],
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter_options = {
+        "pool_connections": client_settings["POOL_CONNECTIONS"],
+        "pool_maxsize": client_settings["POOL_MAXSIZE"],
+        "max_retries": retry,
+    }
+    if client_settings["TRANSPORT"] == RECORD:
+        adapter = RecordingAdapter(store, client_settings["BASE_URL"], **adapter_options)
+    else:
+        adapter = HTTPAdapter(**adapter_options)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Returns the per-process session shared by all PokeAPI services.
+    It is created lazily so that forked workers never share sockets.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session(get_client_settings())
+    return _session
+
+
+def reset_session():
+    """
+    Close and drop the shared session, e.g. after settings changed.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def is_upstream_failure(status_code):
+    return status_code == 429 or status_code >= 500
+
+
+def record_upstream_call(path, outcome, started=None):
+    resource = upstream_resource(path)
+    UPSTREAM_REQUESTS.inc(resource=resource, outcome=outcome)
+    if started is not None:
+        duration = time.perf_counter() - started
+        UPSTREAM_DURATION.observe(duration, resource=resource)
+        add_timing("pokeapi", duration)
+
+
+def pokeapi_get(path):
+    """
+    GET a PokeAPI resource, e.g. pokeapi_get("pokemon/pikachu/").
+    Raises UpstreamUnavailable on connection errors, timeouts, 429 and 5xx answers
+    (once retries are exhausted) and, without calling PokeAPI, while the circuit is open.
+    Every call let through by the circuit is charged to the upstream budget of the current
+    request, which raises UpstreamBudgetExceeded once it is spent.
+    """
+    breaker = get_circuit_breaker()
+    if not breaker.allow_request():
+        record_upstream_call(path, "circuit_open")
+        raise UpstreamUnavailable("PokeAPI circuit is open")
+
+    # Only calls that reach PokeAPI are charged, not the ones the open circuit stops
+    try:
+        charge_upstream()
+    except UpstreamBudgetExceeded:
+        record_upstream_call(path, "budget_exceeded")
+        raise
+
+    client_settings = get_client_settings()
+    url = f"{client_settings['BASE_URL']}{path}"
+    started = time.perf_counter()
+    try:
+        response = get_session().get(
+            url,
+            timeout=(client_settings["CONNECT_TIMEOUT"], client_settings["READ_TIMEOUT"]),
+        )
+    except FixtureNotFound as exc:
+        # An unrecorded path says nothing about PokeAPI, the circuit stays closed
+        record_upstream_call(path, "not_recorded", started)
+        raise UpstreamUnavailable(f"PokeAPI request failed: {exc!r}") from exc
+    except requests.RequestException as exc:
+        record_upstream_call(path, "error", started)
+        breaker.record_failure()
+        raise UpstreamUnavailable(f"PokeAPI request failed: {exc!r}") from exc
+
+    record_upstream_call(path, response.status_code, started)
+
+    if is_upstream_failure(response.status_code):
+        breaker.record_failure()
+        raise UpstreamUnavailable(f"PokeAPI answered {response.status_code}")
+
+    breaker.record_success()
+    return response
+
+
+def build_async_client(client_settings):
+    """
+    Build an httpx client with a bounded keep-alive connection pool.
+    httpx only retries failed connection attempts, not error statuses.
+    In record and replay modes its transport goes through the fixture store.
+    """
+    store = get_fixture_store(client_settings)
+    transport = httpx.AsyncHTTPTransport(retries=client_settings["MAX_RETRIES"])
+
+    if client_settings["TRANSPORT"] == REPLAY:
+        transport = AsyncReplayTransport(store, client_settings["BASE_URL"])
+    elif client_settings["TRANSPORT"] == RECORD:
+        transport = AsyncRecordingTransport(store, client_settings["BASE_URL"], transport)
+
+    return httpx.AsyncClient(
+        base_url=client_settings["BASE_URL"],
+        timeout=httpx.Timeout(
+            client_settings["READ_TIMEOUT"],
+            connect=client_settings["CONNECT_TIMEOUT"],
+        ),
+        limits=httpx.Limits(
+            max_connections=client_settings["ASYNC_MAX_CONNECTIONS"],
+            max_keepalive_connections=client_settings["POOL_MAXSIZE"],
+        ),
+        transport=transport,
+    )
+
+
+def get_async_client():
+    """
+    Returns the async client of the running event loop, shared by all async PokeAPI services.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+
+    if client is None:
+        client = _async_clients[loop] = build_async_client(get_client_settings())
+    return client
+
+
+async def pokeapi_aget(path):
+    """
+    Async GET of a PokeAPI resource, e.g. await pokeapi_aget("pokemon/pikachu/").
+    Shares the circuit breaker and the upstream budgets of pokeapi_get and raises like it does.
+    """
+    breaker = get_circuit_breaker()
+    if not breaker.allow_request():
+        record_upstream_call(path, "circuit_open")
+        raise UpstreamUnavailable("PokeAPI circuit is open")
+
+    try:
+        await sync_to_async(charge_upstream, thread_sensitive=False)()
+    except UpstreamBudgetExceeded:
+        record_upstream_call(path, "budget_exceeded")
+        raise
+
+    started = time.perf_counter()
+    try:
+        response = await get_async_client().get(path)
+    except FixtureNotFound as exc:
+        record_upstream_call(path, "not_recorded", started)
+        raise UpstreamUnavailable(f"PokeAPI request failed: {exc!r}") from exc
+    except httpx.HTTPError as exc:
+        record_upstream_call(path, "error", started)
+        breaker.record_failure()
+        raise UpstreamUnavailable(f"PokeAPI request failed: {exc!r}") from exc
+
+    record_upstream_call(path, response.status_code, started)
+
+    if is_upstream_failure(response.status_code):
+        breaker.record_failure()
+        raise UpstreamUnavailable(f"PokeAPI answered {response.status_code}")
+
+    breaker.record_success()
+    return response
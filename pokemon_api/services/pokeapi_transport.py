@@ -0,0 +1,147 @@
+from http.client import responses
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from pokemon_api.services.fixture_store import FixtureStore
+
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+TRANSPORT_MODES = (LIVE, RECORD, REPLAY)
+
+
+class FixtureNotFound(Exception):
+    """
+    Replay mode has no recorded answer for a path. The clients report PokeAPI
+    as unavailable, without counting it as a failure of the circuit breaker.
+    """
+
+
+def get_fixture_store(client_settings):
+    """
+    Returns the FixtureStore of the record and replay modes, None in live mode.
+    """
+    mode = client_settings["TRANSPORT"]
+    if mode not in TRANSPORT_MODES:
+        raise ImproperlyConfigured(f"Unknown POKEAPI_CLIENT['TRANSPORT'] {mode!r}, use one of {', '.join(TRANSPORT_MODES)}")
+    if mode == LIVE:
+        return None
+    if not client_settings["FIXTURES_DIR"]:
+        raise ImproperlyConfigured(f"POKEAPI_CLIENT['FIXTURES_DIR'] is required in {mode} mode")
+    return FixtureStore(client_settings["FIXTURES_DIR"])
+
+
+def relative_path(url, base_url):
+    """
+    "https://pokeapi.co/api/v2/type/fire/", "https://pokeapi.co/api/v2/" -> "type/fire/"
+    """
+    url = str(url)
+    return url[len(base_url):] if url.startswith(base_url) else url
+
+
+def is_recordable(status_code):
+    # Transient upstream failures would be replayed forever
+    return status_code < 500 and status_code != 429
+
+
+def replayed_response(request, status_code, body):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers["Content-Type"] = "application/json"
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = responses.get(status_code, "")
+    return response
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Sends requests to PokeAPI and records every answer but transient failures to the fixture store.
+    """
+
+    def __init__(self, store, base_url, **kwargs):
+        self.store = store
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if is_recordable(response.status_code):
+            self.store.put(relative_path(request.url, self.base_url), response.status_code, response.content)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers requests from the fixture store, without any network access.
+    """
+
+    def __init__(self, store, base_url):
+        super().__init__()
+        self.store = store
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        path = relative_path(request.url, self.base_url)
+        answer = self.store.get(path)
+        if answer is None:
+            raise FixtureNotFound(f"No recorded answer for {path}")
+        return replayed_response(request, *answer)
+
+    def close(self):
+        pass
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx counterpart of RecordingAdapter, wrapping the transport that calls PokeAPI.
+    """
+
+    def __init__(self, store, base_url, transport):
+        self.store = store
+        self.base_url = base_url
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        response = await self.transport.handle_async_request(request)
+        body = await response.aread()
+        await response.aclose()
+
+        if is_recordable(response.status_code):
+            await sync_to_async(self.store.put, thread_sensitive=False)(
+                relative_path(request.url, self.base_url), response.status_code, body,
+            )
+        # The body was decoded while read, it is returned as is
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=body)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """
+    httpx counterpart of ReplayAdapter.
+    """
+
+    def __init__(self, store, base_url):
+        self.store = store
+        self.base_url = base_url
+
+    async def handle_async_request(self, request):
+        path = relative_path(request.url, self.base_url)
+        answer = await sync_to_async(self.store.get, thread_sensitive=False)(path)
+        if answer is None:
+            raise FixtureNotFound(f"No recorded answer for {path}")
+
+        status_code, body = answer
+        return httpx.Response(status_code, headers={"Content-Type": "application/json"}, content=body)
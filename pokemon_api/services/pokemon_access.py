@@ -0,0 +1,71 @@
+from django.core.cache import cache
+
+from pokemon_api.services.type_index import check_index_access
+from pokemon_api.services.type_masks import aget_type_mask_engine
+
+# Types of a Pokémon practically never change, keep them for a week
+POKEMON_TYPES_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def pokemon_types_key(identifier):
+    return f"pokemon_types:{str(identifier).strip().lower()}"
+
+
+def remember_pokemon_types(pokemon_data):
+    """
+    Remember the types of a downloaded Pokémon under its id and its name,
+    so later access checks do not need the full payload.
+    """
+    pokemon_types = [t["type"]["name"] for t in pokemon_data.get("types", [])]
+    keys = [
+        pokemon_types_key(identifier)
+        for identifier in (pokemon_data.get("id"), pokemon_data.get("name"))
+        if identifier is not None
+    ]
+    cache.set_many({key: pokemon_types for key in keys}, timeout=POKEMON_TYPES_TIMEOUT)
+
+
+def lookup_pokemon_types(identifier):
+    """
+    Returns the remembered set of types of a Pokémon, or None if unknown.
+    """
+    pokemon_types = cache.get(pokemon_types_key(identifier))
+    return set(pokemon_types) if pokemon_types is not None else None
+
+
+async def alookup_pokemon_types(identifier):
+    pokemon_types = await cache.aget(pokemon_types_key(identifier))
+    return set(pokemon_types) if pokemon_types is not None else None
+
+
+def check_pokemon_access(identifier, allowed_types):
+    """
+    Cheap access check run before the detail payload is downloaded.
+    Returns True or False, or None when neither the index nor the remembered
+    types know this Pokémon and the payload has to be fetched to decide.
+    """
+    access = check_index_access(identifier, allowed_types)
+    if access is not None:
+        return access
+
+    pokemon_types = lookup_pokemon_types(identifier)
+    if pokemon_types is None:
+        return None
+
+    return bool(pokemon_types & allowed_types)
+
+
+async def acheck_pokemon_access(identifier, allowed_types):
+    """
+    Async check_pokemon_access.
+    """
+    engine = await aget_type_mask_engine()
+    access = engine.check(identifier, allowed_types)
+    if access is not None:
+        return access
+
+    pokemon_types = await alookup_pokemon_types(identifier)
+    if pokemon_types is None:
+        return None
+
+    return bool(pokemon_types & allowed_types)
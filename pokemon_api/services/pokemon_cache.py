@@ -0,0 +1,473 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from pokemon_api.services.fan_out import get_executor
+from pokemon_api.services.metrics import CACHE_LOOKUPS
+from pokemon_api.services.payload_codec import decode_payload, encode_payload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SETTINGS = {
+    "BACKEND": "pokemon_api.services.pokemon_cache.MemoryCacheBackend",
+    "OPTIONS": {},
+    # Seconds an entry is served as fresh
+    "TTL": 24 * 60 * 60,
+    # Seconds after TTL during which the entry is still served while it is refreshed
+    "STALE_TTL": 7 * 24 * 60 * 60,
+    # Seconds a "not found" answer is remembered
+    "NEGATIVE_TTL": 60 * 60,
+}
+
+
+class CacheEntry(namedtuple("CacheEntry", ["payload", "size", "stored_at", "digest"])):
+    """
+    Cached payload, stored encoded (see payload_codec) and only decoded when served.
+    A payload of None records that upstream answered "not found".
+    `size` is the number of stored bytes, `digest` identifies the payload version, e.g. to build ETags.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_value(cls, value):
+        if value is None:
+            return cls(None, 0, time.time(), None)
+        payload = encode_payload(value)
+        return cls(payload, len(payload), time.time(), hashlib.sha1(payload).hexdigest())
+
+    @property
+    def value(self):
+        return decode_payload(self.payload) if self.payload is not None else None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def measure_payload(value):
+    """
+    Returns (size, digest) of a payload as it would be cached.
+    """
+    entry = CacheEntry.from_value(value)
+    return entry.size, entry.digest
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU store bounded by entry count and total payload bytes.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+
+            self._entries[key] = entry
+            self._bytes += entry.size
+
+            # Evict least recently used entries, but always keep the new one
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns the number of entries, the total stored bytes and the size of every entry.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "entry_sizes": {key: entry.size for key, entry in self._entries.items()},
+            }
+
+
+class DjangoCacheBackend:
+    """
+    Store entries in one of the project's CACHES, so that several worker
+    processes share them. Eviction is left to the configured cache backend
+    and entries never expire by default, since staleness is decided on read.
+    """
+
+    def __init__(self, alias="default", key_prefix="pokemon_detail", timeout=None):
+        self.alias = alias
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, key):
+        return f"{self.key_prefix}:{key}"
+
+    def get(self, key):
+        stored = self.cache.get(self.make_key(key))
+        return CacheEntry(*stored) if stored is not None else None
+
+    def set(self, key, entry):
+        self.cache.set(self.make_key(key), tuple(entry), timeout=self.timeout)
+
+    def delete(self, key):
+        self.cache.delete(self.make_key(key))
+
+    def clear(self):
+        # Point this backend at a dedicated alias: clearing empties the whole cache
+        self.cache.clear()
+
+
+class FileCacheBackend:
+    """
+    Local file store, one file per entry, bounded by entry count and
+    total payload bytes. Files are touched on read so eviction is LRU.
+    A file holds a JSON header line followed by the encoded payload.
+    """
+
+    def __init__(self, path, max_entries=4096, max_bytes=1024 * 1024 * 1024):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Entry count and bytes on disk, counted once then kept up to date by set and delete,
+        # so the directory is only scanned when a limit is exceeded
+        self._count = None
+        self._bytes = None
+        os.makedirs(self.path, exist_ok=True)
+
+    def file_path(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode()).hexdigest() + ".entry")
+
+    def get(self, key):
+        file_path = self.file_path(key)
+        try:
+            with open(file_path, "rb") as f:
+                header = json.loads(f.readline())
+                payload = f.read() if header["found"] else None
+            os.utime(file_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return CacheEntry(payload, header["size"], header["stored_at"], header["digest"])
+
+    def set(self, key, entry):
+        file_path = self.file_path(key)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        header = {
+            "found": entry.payload is not None,
+            "size": entry.size,
+            "stored_at": entry.stored_at,
+            "digest": entry.digest,
+        }
+        data = json.dumps(header).encode() + b"\n" + (entry.payload or b"")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            self._ensure_totals()
+            replaced_size = file_size(file_path)
+            os.replace(tmp_path, file_path)
+            if replaced_size is None:
+                self._count += 1
+            self._bytes += len(data) - (replaced_size or 0)
+
+            if self._count > self.max_entries or self._bytes > self.max_bytes:
+                self._evict(keep=file_path)
+
+    def _ensure_totals(self):
+        if self._count is None:
+            self._count, self._bytes = 0, 0
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".entry"):
+                    self._count += 1
+                    self._bytes += entry.stat().st_size
+
+    def _evict(self, keep):
+        """
+        Remove the least recently used entries until both limits hold. Rescans the
+        directory, which also corrects the totals for files other processes wrote.
+        """
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".entry"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        files.sort()
+        total_bytes = sum(size for _mtime, size, _path in files)
+        count = len(files)
+
+        for _mtime, size, file_path in files:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            if file_path == keep:
+                continue
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            count -= 1
+            total_bytes -= size
+
+        self._count, self._bytes = count, total_bytes
+
+    def delete(self, key):
+        file_path = self.file_path(key)
+        with self._lock:
+            size = file_size(file_path)
+            try:
+                os.remove(file_path)
+            except OSError:
+                return
+            if self._count is not None and size is not None:
+                self._count -= 1
+                self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".entry"):
+                    os.remove(entry.path)
+            self._count, self._bytes = 0, 0
+
+
+def file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+class PokemonCache:
+    """
+    TTL cache in front of an upstream fetch function. Expired entries are
+    served stale for STALE_TTL seconds while a background refresh runs,
+    and for as long as they are stored when upstream is down (see lookup).
+    """
+
+    def __init__(self, backend, ttl, stale_ttl, negative_ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._refresh_tasks = set()
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Returns the cached value for key, calling fetch() on a miss.
+        fetch() returns None for "not found" and raises on upstream errors,
+        which are never cached.
+        """
+        return self.lookup(key, fetch)[0]
+
+    def lookup(self, key, fetch, stale_on=(), raise_on=()):
+        """
+        get_or_fetch returning (value, stale). When fetch() raises one of the
+        `stale_on` exceptions, the last stored value is served with stale=True
+        whatever its age, and the exception is only raised when there is none.
+        Subclasses of them listed in `raise_on` are always raised.
+        """
+        entry = self.backend.get(key)
+
+        if entry is not None:
+            age = time.time() - entry.stored_at
+
+            if entry.payload is None:
+                if age < self.negative_ttl:
+                    CACHE_LOOKUPS.inc(cache="pokemon_detail", result="negative_hit")
+                    return None, False
+            elif age < self.ttl:
+                CACHE_LOOKUPS.inc(cache="pokemon_detail", result="hit")
+                return entry.value, False
+            elif age < self.ttl + self.stale_ttl:
+                CACHE_LOOKUPS.inc(cache="pokemon_detail", result="stale")
+                self.refresh_in_background(key, fetch)
+                return entry.value, False
+
+        CACHE_LOOKUPS.inc(cache="pokemon_detail", result="miss")
+
+        try:
+            return self.fetch_and_store(key, fetch), False
+        except stale_on as exc:
+            if entry is None or entry.payload is None or isinstance(exc, raise_on):
+                raise
+            logger.info("Serving the last known value of %r, upstream failed", key)
+            CACHE_LOOKUPS.inc(cache="pokemon_detail", result="fallback")
+            return entry.value, True
+
+    def peek(self, key):
+        """
+        Returns the entry stored for key, fresh or stale, without fetching anything.
+        """
+        entry = self.backend.get(key)
+        if entry is None or time.time() - entry.stored_at >= self.ttl + self.stale_ttl:
+            return None
+        return entry
+
+    def fetch_and_store(self, key, fetch):
+        return self.put(key, fetch())
+
+    def put(self, key, value):
+        self.backend.set(key, CacheEntry.from_value(value))
+        return value
+
+    def refresh_in_background(self, key, fetch):
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.fetch_and_store(key, fetch)
+            except Exception:
+                logger.warning("Background refresh of %r failed", key, exc_info=True)
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        get_executor().submit(refresh)
+
+    async def aget_or_fetch(self, key, fetch):
+        """
+        Async get_or_fetch, `fetch` being a coroutine function.
+        Backend calls run in a worker thread, as backends may block.
+        """
+        return (await self.alookup(key, fetch))[0]
+
+    async def alookup(self, key, fetch, stale_on=(), raise_on=()):
+        """
+        Async lookup, `fetch` being a coroutine function.
+        """
+        entry = await sync_to_async(self.backend.get, thread_sensitive=False)(key)
+
+        if entry is not None:
+            age = time.time() - entry.stored_at
+
+            if entry.payload is None:
+                if age < self.negative_ttl:
+                    CACHE_LOOKUPS.inc(cache="pokemon_detail", result="negative_hit")
+                    return None, False
+            elif age < self.ttl:
+                CACHE_LOOKUPS.inc(cache="pokemon_detail", result="hit")
+                return entry.value, False
+            elif age < self.ttl + self.stale_ttl:
+                CACHE_LOOKUPS.inc(cache="pokemon_detail", result="stale")
+                self.arefresh_in_background(key, fetch)
+                return entry.value, False
+
+        CACHE_LOOKUPS.inc(cache="pokemon_detail", result="miss")
+
+        try:
+            return await self.afetch_and_store(key, fetch), False
+        except stale_on as exc:
+            if entry is None or entry.payload is None or isinstance(exc, raise_on):
+                raise
+            logger.info("Serving the last known value of %r, upstream failed", key)
+            CACHE_LOOKUPS.inc(cache="pokemon_detail", result="fallback")
+            return entry.value, True
+
+    async def apeek(self, key):
+        return await sync_to_async(self.peek, thread_sensitive=False)(key)
+
+    async def afetch_and_store(self, key, fetch):
+        value = await fetch()
+        await sync_to_async(self.backend.set, thread_sensitive=False)(key, CacheEntry.from_value(value))
+        return value
+
+    def arefresh_in_background(self, key, fetch):
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self.afetch_and_store(key, fetch)
+            except Exception:
+                logger.warning("Background refresh of %r failed", key, exc_info=True)
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        # Keep a reference, the event loop only holds weak ones to its tasks
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def get_cache_settings():
+    return {**DEFAULT_CACHE_SETTINGS, **getattr(settings, "POKEMON_CACHE", {})}
+
+
+def get_pokemon_cache():
+    """
+    Returns the per-process Pokémon detail cache configured by POKEMON_CACHE.
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache_settings = get_cache_settings()
+                backend_class = import_string(cache_settings["BACKEND"])
+                _cache = PokemonCache(
+                    backend=backend_class(**cache_settings["OPTIONS"]),
+                    ttl=cache_settings["TTL"],
+                    stale_ttl=cache_settings["STALE_TTL"],
+                    negative_ttl=cache_settings["NEGATIVE_TTL"],
+                )
+    return _cache
+
+
+def reset_pokemon_cache():
+    """
+    Clear the cache and drop it, so the next access re-reads the settings.
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is not None:
+            _cache.clear()
+        _cache = None
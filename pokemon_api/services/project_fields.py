@@ -0,0 +1,60 @@
+# Marks a path that is selected (or excluded) as a whole
+WHOLE = None
+
+
+def parse_field_paths(value):
+    """
+    Parse a comma separated list of dotted paths, e.g. "id,name,sprites.front_default",
+    into a tree: {"id": WHOLE, "name": WHOLE, "sprites": {"front_default": WHOLE}}.
+    Returns None for an empty value.
+    """
+    paths = [path.strip() for path in (value or "").split(",") if path.strip()]
+    if not paths:
+        return None
+
+    tree = {}
+    for path in sorted(paths, key=len):
+        node = tree
+        *parents, leaf = path.split(".")
+        for part in parents:
+            if part in node and node[part] is WHOLE:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[leaf] = WHOLE
+
+    return tree
+
+
+def include_fields(value, tree):
+    if tree is WHOLE:
+        return value
+    if isinstance(value, list):
+        return [include_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: include_fields(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def exclude_fields(value, tree):
+    if isinstance(value, list):
+        return [exclude_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: item if key not in tree else exclude_fields(item, tree[key])
+            for key, item in value.items()
+            if key not in tree or tree[key] is not WHOLE
+        }
+    return value
+
+
+def project_fields(data, fields=None, exclude=None):
+    """
+    Sparse fieldset of a payload: keep only the `fields` paths, then drop the `exclude` paths.
+    Paths into lists apply to every item, e.g. "types.type.name".
+    """
+    if fields is not None:
+        data = include_fields(data, fields)
+    if exclude is not None:
+        data = exclude_fields(data, exclude)
+    return data
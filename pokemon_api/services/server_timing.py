@@ -0,0 +1,224 @@
+import contextvars
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import pyinstrument
+except ImportError:  # optional dependency
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVER_TIMING_SETTINGS = {
+    # Share of requests timed without being asked, between 0 and 1
+    "SAMPLE_RATE": 0,
+    # Request header with which staff users ask for the timings of one request
+    "REQUEST_HEADER": "X-Server-Timing",
+    # "cprofile" or "pyinstrument" to profile the timed requests, None to only time them
+    "PROFILER": None,
+    # Directory where the profiles of slow requests are written
+    "PROFILE_DIR": None,
+    # Timed requests slower than this (in milliseconds) are logged and their profile written
+    "SLOW_REQUEST_MS": 500,
+}
+
+# Timings of the request being served, None when it is not timed
+_timings = contextvars.ContextVar("server_timings", default=None)
+
+# A single request is profiled at a time, the others are only timed
+_profile_lock = threading.Lock()
+
+
+def get_server_timing_settings():
+    return {**DEFAULT_SERVER_TIMING_SETTINGS, **getattr(settings, "POKEMON_SERVER_TIMING", {})}
+
+
+class Timings:
+    """
+    Durations of the phases of one request, in the order they were first recorded.
+    Phases recorded several times, e.g. from fan-out threads, add up.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, count = self.phases.get(name, (0, 0))
+            self.phases[name] = (total + seconds, count + 1)
+
+    def header(self, total=None):
+        """
+        Returns the Server-Timing header value, durations in milliseconds.
+        """
+        with self._lock:
+            phases = list(self.phases.items())
+        if total is not None:
+            phases.append(("total", (total, 1)))
+
+        metrics = []
+        for name, (seconds, count) in phases:
+            metric = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                metric += f';desc="{count} calls"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+
+def start_timings():
+    """
+    Start timing the phases of the current context. Returns (timings, token for stop_timings).
+    """
+    timings = Timings()
+    return timings, _timings.set(timings)
+
+
+def stop_timings(token):
+    _timings.reset(token)
+
+
+def get_timings():
+    return _timings.get()
+
+
+def add_timing(name, seconds):
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed_phase(name):
+    """
+    Record the duration of the block as a phase of the current request, when it is timed.
+    """
+    if _timings.get() is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(name, time.perf_counter() - started)
+
+
+def should_sample():
+    sample_rate = get_server_timing_settings()["SAMPLE_RATE"]
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def is_timing_requested(request):
+    """
+    Whether the client asked for the timings with the REQUEST_HEADER.
+    Only honored for staff users, see ServerTimingMiddleware.
+    """
+    header = get_server_timing_settings()["REQUEST_HEADER"]
+    return request.headers.get(header, "").lower() in ("1", "true", "yes")
+
+
+class RequestProfiler:
+    """
+    Profile of the request served by the current thread, with cProfile or pyinstrument.
+    """
+
+    def __init__(self, profiler):
+        self.kind = profiler
+        if profiler == "cprofile":
+            import cProfile
+            self.profiler = cProfile.Profile()
+        elif profiler == "pyinstrument":
+            if pyinstrument is None:
+                raise ImproperlyConfigured("POKEMON_SERVER_TIMING['PROFILER'] is pyinstrument, install it")
+            self.profiler = pyinstrument.Profiler()
+        else:
+            raise ImproperlyConfigured(f"Unknown profiler {profiler!r}, use cprofile or pyinstrument")
+
+    def start(self):
+        if self.kind == "cprofile":
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        if self.kind == "cprofile":
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+    def write(self, directory, name):
+        """
+        Write the profile to directory: .prof files for pstats or snakeviz, .html for pyinstrument.
+        Returns the path of the file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if self.kind == "cprofile":
+            path = os.path.join(directory, f"{name}.prof")
+            self.profiler.dump_stats(path)
+        else:
+            path = os.path.join(directory, f"{name}.html")
+            with open(path, "w") as f:
+                f.write(self.profiler.output_html())
+        return path
+
+
+@contextmanager
+def profile_request():
+    """
+    Profile the block with the configured PROFILER, yields the RequestProfiler
+    or None when profiling is off or another request is being profiled.
+    """
+    profiler_name = get_server_timing_settings()["PROFILER"]
+    if not profiler_name or not _profile_lock.acquire(blocking=False):
+        yield None
+        return
+
+    try:
+        profiler = RequestProfiler(profiler_name)
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+    finally:
+        _profile_lock.release()
+
+
+def profile_name(endpoint, seconds):
+    """
+    "pokemon_list", 1.234 -> "20261018-101500-pokemon_list-1234ms-<pid>"
+    """
+    endpoint = re.sub(r"[^\w.-]", "_", endpoint)
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    return f"{timestamp}-{endpoint}-{round(seconds * 1000)}ms-{os.getpid()}"
+
+
+def report_slow_request(endpoint, seconds, timings, profiler=None):
+    """
+    Log a timed request slower than SLOW_REQUEST_MS with its phases,
+    and write its profile to PROFILE_DIR when it was profiled.
+    """
+    timing_settings = get_server_timing_settings()
+    if seconds * 1000 < timing_settings["SLOW_REQUEST_MS"]:
+        return
+
+    path = None
+    if profiler is not None and timing_settings["PROFILE_DIR"]:
+        try:
+            path = profiler.write(timing_settings["PROFILE_DIR"], profile_name(endpoint, seconds))
+        except OSError:
+            logger.warning("Could not write the profile to %s", timing_settings["PROFILE_DIR"], exc_info=True)
+
+    logger.warning(
+        "Slow request to %s: %s%s",
+        endpoint, timings.header(seconds), f", profile written to {path}" if path else "",
+    )
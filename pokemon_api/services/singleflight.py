@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+from pokemon_api.services.metrics import UPSTREAM_COALESCED
+
+
+class _Call:
+    def __init__(self):
+        self.owner = threading.get_ident()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls for the same key: the first caller runs the
+    function, callers arriving while it runs wait for and share its result
+    (or its exception). `coalesced` counts the calls that were saved,
+    also reported to the optional `coalesced_counter` metric.
+    """
+
+    def __init__(self, coalesced_counter=None):
+        self.coalesced = 0
+        self.coalesced_counter = coalesced_counter
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            elif call.owner == threading.get_ident():
+                # A nested call from the leader's own thread would wait for itself
+                leader = None
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if leader is False and self.coalesced_counter is not None:
+            self.coalesced_counter.inc()
+
+        if leader is None:
+            return fn()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines: callers awaiting the same key on the same
+    event loop share one task. A cancelled caller does not cancel the task.
+    """
+
+    def __init__(self, coalesced_counter=None):
+        self.coalesced = 0
+        self.coalesced_counter = coalesced_counter
+        self._tasks = {}
+
+    async def do(self, key, fn):
+        call_key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(call_key)
+
+        if task is None:
+            task = self._tasks[call_key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _task: self._tasks.pop(call_key, None))
+        else:
+            self.coalesced += 1
+            if self.coalesced_counter is not None:
+                self.coalesced_counter.inc()
+
+        return await asyncio.shield(task)
+
+
+# Shared by every service that calls PokeAPI
+pokeapi_flight = SingleFlight(UPSTREAM_COALESCED)
+pokeapi_async_flight = AsyncSingleFlight(UPSTREAM_COALESCED)
@@ -0,0 +1,79 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db.models import Q
+from django.utils import timezone
+
+from pokemon_api.models import Pokemon, PokemonDocument
+from pokemon_api.services.fetch_pokemon import fetch_pokemon_from_pokeapi
+from pokemon_api.services.list_cache import invalidate_pokemon_lists
+from pokemon_api.services.payload_codec import encode_payload
+
+logger = logging.getLogger(__name__)
+
+
+def pokemon_to_sync(max_age=None, full=False):
+    """
+    Returns [(pk, name)] of the indexed Pokémon whose document must be downloaded:
+    all of them with `full`, otherwise the ones never mirrored (so an interrupted
+    sync resumes where it stopped) and, with `max_age`, the ones mirrored longer ago.
+    """
+    queryset = Pokemon.objects.all()
+
+    if not full:
+        outdated = Q(document__isnull=True)
+        if max_age is not None:
+            outdated |= Q(document__synced_at__lt=timezone.now() - max_age)
+        queryset = queryset.filter(outdated)
+
+    return list(queryset.order_by("pk").values_list("pk", "name"))
+
+
+def store_pokemon_document(pokemon_pk, payload):
+    encoded = encode_payload(payload)
+    PokemonDocument.objects.update_or_create(
+        pokemon_id=pokemon_pk,
+        defaults={"payload": encoded, "size": len(encoded), "synced_at": timezone.now()},
+    )
+    if payload.get("id") is not None:
+        Pokemon.objects.filter(pk=pokemon_pk, pokeapi_id__isnull=True).update(pokeapi_id=payload["id"])
+
+
+def sync_pokemon_documents(pokemon, workers=8, on_stored=None):
+    """
+    Download the detail documents of the given [(pk, name)] with at most `workers`
+    concurrent requests. Each document is stored as soon as it arrives.
+    Returns the names that could not be downloaded.
+    """
+    failed = []
+    stored = False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pokeapi-sync") as executor:
+        futures = {
+            executor.submit(fetch_pokemon_from_pokeapi, name): (pk, name)
+            for pk, name in pokemon
+        }
+
+        # Documents are written from this thread only, as they complete
+        for future in as_completed(futures):
+            pk, name = futures[future]
+            try:
+                payload = future.result()
+            except Exception as exc:
+                logger.warning("Could not download %r: %r", name, exc)
+                payload = None
+
+            if payload is None:
+                failed.append(name)
+                continue
+
+            store_pokemon_document(pk, payload)
+            stored = True
+            if on_stored is not None:
+                on_stored(name)
+
+    # Documents may have filled in PokeAPI ids of the index
+    if stored:
+        invalidate_pokemon_lists()
+
+    return failed
@@ -0,0 +1,246 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from pokemon_api.services.circuit_breaker import UpstreamUnavailable
+
+DEFAULT_THROTTLE_SETTINGS = {
+    "STORE": "pokemon_api.services.token_bucket.MemoryBucketStore",
+    "OPTIONS": {},
+    # Every request of a user to an endpoint, served from cache or not
+    "REQUESTS": {"CAPACITY": 120, "RATE": 10},
+    # PokeAPI calls made for a user on an endpoint
+    "UPSTREAM": {"CAPACITY": 30, "RATE": 1},
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+# Upstream budget of the request being served, charged by pokeapi_get and pokeapi_aget
+_upstream_budget = contextvars.ContextVar("upstream_budget", default=None)
+
+
+class UpstreamBudgetExceeded(UpstreamUnavailable):
+    """
+    The user of the current request made too many PokeAPI calls.
+    `wait` is the number of seconds until the next call is allowed.
+    """
+
+    def __init__(self, wait):
+        super().__init__(f"Upstream budget exceeded, retry in {wait:.1f}s")
+        self.wait = wait
+
+
+def take_token(state, now, capacity, rate):
+    """
+    Refill a bucket state (tokens, updated_at) for the time elapsed and take one token.
+    Returns (new state, wait): wait is 0 when a token was taken, otherwise
+    the seconds until one is available. A missing state is a full bucket.
+    """
+    tokens, updated_at = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+def time_to_refill(state, now, capacity, rate):
+    """
+    Returns the seconds until a bucket state has a token, without taking it.
+    """
+    if state is None:
+        return 0
+    tokens, updated_at = state
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    return 0 if tokens >= 1 else (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    """
+    In-process buckets, bounded by the number of keys. Each worker process has its own.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        """
+        Take a token from the bucket of key. Returns the seconds to wait, 0 when allowed.
+        """
+        with self._lock:
+            self._states[key], wait = take_token(self._states.get(key), time.monotonic(), capacity, rate)
+            self._states.move_to_end(key)
+
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+
+        return wait
+
+    def wait(self, key, capacity, rate):
+        with self._lock:
+            return time_to_refill(self._states.get(key), time.monotonic(), capacity, rate)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets kept in one of the project's CACHES, shared by all worker processes.
+    The read-modify-write is not atomic, so concurrent requests of one user may
+    occasionally get a token more than the budget allows.
+    """
+
+    def __init__(self, alias="default", key_prefix="token_bucket"):
+        self.alias = alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, key):
+        return f"{self.key_prefix}:{key}"
+
+    def consume(self, key, capacity, rate):
+        cache_key = self.make_key(key)
+        state, wait = take_token(self.cache.get(cache_key), time.time(), capacity, rate)
+        # A bucket left alone until it is full again is the same as no bucket
+        self.cache.set(cache_key, state, timeout=int(capacity / rate) + 1)
+        return wait
+
+    def wait(self, key, capacity, rate):
+        return time_to_refill(self.cache.get(self.make_key(key)), time.time(), capacity, rate)
+
+    def clear(self):
+        # Point this store at a dedicated alias: clearing empties the whole cache
+        self.cache.clear()
+
+
+class UpstreamBudget:
+    """
+    The upstream bucket of one user on one endpoint.
+    """
+
+    def __init__(self, store, key, capacity, rate):
+        self.store = store
+        self.key = key
+        self.capacity = capacity
+        self.rate = rate
+
+    def charge(self):
+        """
+        Take a token for one PokeAPI call, raises UpstreamBudgetExceeded when there is none.
+        """
+        wait = self.store.consume(self.key, self.capacity, self.rate)
+        if wait:
+            raise UpstreamBudgetExceeded(wait)
+
+    def wait(self):
+        return self.store.wait(self.key, self.capacity, self.rate)
+
+
+def get_throttle_settings():
+    return {**DEFAULT_THROTTLE_SETTINGS, **getattr(settings, "POKEMON_THROTTLE", {})}
+
+
+def get_bucket_store():
+    """
+    Returns the per-process bucket store configured by POKEMON_THROTTLE.
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                throttle_settings = get_throttle_settings()
+                store_class = import_string(throttle_settings["STORE"])
+                _store = store_class(**throttle_settings["OPTIONS"])
+    return _store
+
+
+def reset_bucket_store():
+    global _store
+
+    with _store_lock:
+        if _store is not None:
+            _store.clear()
+        _store = None
+
+
+def consume_request_budget(scope, user_id):
+    """
+    Take a token from the request bucket of a user on an endpoint.
+    Returns (wait, upstream budget): wait is the seconds to wait, 0 when the request is allowed,
+    and the budget the PokeAPI calls of the request are charged to, see upstream_budget_scope.
+    """
+    throttle_settings = get_throttle_settings()
+    store = get_bucket_store()
+    key = f"{scope}:{user_id}"
+
+    requests_budget = throttle_settings["REQUESTS"]
+    upstream_budget = throttle_settings["UPSTREAM"]
+    wait = store.consume(f"{key}:requests", requests_budget["CAPACITY"], requests_budget["RATE"])
+    return wait, UpstreamBudget(store, f"{key}:upstream", upstream_budget["CAPACITY"], upstream_budget["RATE"])
+
+
+def get_upstream_budget():
+    return _upstream_budget.get()
+
+
+def set_upstream_budget(budget):
+    """
+    Charge the PokeAPI calls of the current context to budget, until the enclosing upstream_budget_scope ends.
+    """
+    _upstream_budget.set(budget)
+
+
+def charge_upstream():
+    """
+    Charge one PokeAPI call to the budget of the current request, if any.
+    """
+    budget = _upstream_budget.get()
+    if budget is not None:
+        budget.charge()
+
+
+def upstream_wait():
+    """
+    Returns the seconds until the current request may call PokeAPI again, 0 when it may now.
+    """
+    budget = _upstream_budget.get()
+    return budget.wait() if budget is not None else 0
+
+
+@contextmanager
+def upstream_budget_scope(budget=None):
+    """
+    Charge the PokeAPI calls of the block to budget. Budgets set inside the block
+    with set_upstream_budget end with it, e.g. with the request of a thread that serves many.
+    """
+    token = _upstream_budget.set(budget)
+    try:
+        yield
+    finally:
+        _upstream_budget.reset(token)
+
+
+def with_upstream_budget(budget, fn):
+    """
+    Wrap fn to run under the given budget, e.g. in a response generator
+    that runs after the request's own scope ended.
+    """
+    def wrapper(*args, **kwargs):
+        with upstream_budget_scope(budget):
+            return fn(*args, **kwargs)
+    return wrapper
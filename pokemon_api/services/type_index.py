@@ -0,0 +1,89 @@
+import re
+
+from django.db import transaction
+from django.utils import timezone
+
+from pokemon_api.models import Pokemon, PokemonType
+from pokemon_api.services.fan_out import fan_out
+from pokemon_api.services.fetch_pokemon_by_type import fetch_pokemon_by_type_from_pokeapi
+from pokemon_api.services.list_cache import invalidate_pokemon_lists
+from pokemon_api.services.pokeapi_client import pokeapi_get
+from pokemon_api.services.type_masks import get_type_mask_engine
+
+POKEMON_ID_IN_URL = re.compile(r"/pokemon/(\d+)/?$")
+
+
+def pokeapi_id_from_url(url):
+    """
+    Extract the numeric id from a PokeAPI Pokémon url, e.g. ".../pokemon/25/" -> 25.
+    """
+    match = POKEMON_ID_IN_URL.search(url or "")
+    return int(match.group(1)) if match else None
+
+
+def fetch_type_names_from_pokeapi():
+    response = pokeapi_get("type/?limit=100")
+    response.raise_for_status()
+    return [t["name"] for t in response.json()["results"]]
+
+
+def store_type_members(type_name, members):
+    """
+    Replace the indexed members of a type with the given PokeAPI entries.
+    """
+    Pokemon.objects.bulk_create(
+        [Pokemon(name=m["name"], pokeapi_id=pokeapi_id_from_url(m.get("url"))) for m in members],
+        ignore_conflicts=True,
+    )
+    pokemon_type, _created = PokemonType.objects.get_or_create(name=type_name)
+    pokemon_type.pokemon.set(Pokemon.objects.filter(name__in=[m["name"] for m in members]))
+    pokemon_type.synced_at = timezone.now()
+    pokemon_type.save(update_fields=["synced_at"])
+
+
+def sync_type_index(type_names=None, deadline=120):
+    """
+    Download the members of every type (or only of `type_names`) and store them in the local index.
+    Returns the set of types that could not be synced.
+    """
+    if type_names is None:
+        type_names = fetch_type_names_from_pokeapi()
+
+    members_by_type, missing = fan_out(fetch_pokemon_by_type_from_pokeapi, type_names, deadline=deadline)
+
+    with transaction.atomic():
+        for type_name, members in members_by_type.items():
+            if members is None:
+                missing.add(type_name)
+                continue
+            store_type_members(type_name, members)
+
+    if members_by_type:
+        invalidate_pokemon_lists()
+
+    return missing
+
+
+def get_indexed_pokemon_names(type_names):
+    """
+    Returns {type name: [Pokémon names]} for those of the given types that are indexed.
+    """
+    names_by_type = {}
+    rows = PokemonType.objects.filter(
+        name__in=type_names, synced_at__isnull=False
+    ).values_list("name", "pokemon__name")
+
+    for type_name, pokemon_name in rows:
+        names = names_by_type.setdefault(type_name, [])
+        if pokemon_name is not None:
+            names.append(pokemon_name)
+
+    return names_by_type
+
+
+def check_index_access(identifier, allowed_types):
+    """
+    Decide from the index alone whether a Pokémon belongs to one of the allowed types.
+    Returns None when the index cannot tell, i.e. the Pokémon or one of the allowed types is not indexed.
+    """
+    return get_type_mask_engine().check(identifier, allowed_types)
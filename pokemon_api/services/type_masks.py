@@ -0,0 +1,168 @@
+import threading
+from array import array
+from itertools import compress
+
+from asgiref.sync import sync_to_async
+
+from access_management_api.services.load_pokemon_types import load_pokemon_types
+from pokemon_api.models import Pokemon, PokemonType
+from pokemon_api.services.identifiers import pokemon_lookup
+from pokemon_api.services.list_cache import aget_index_version, get_index_version
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def indexed_type_names():
+    return PokemonType.objects.filter(synced_at__isnull=False).values_list("name", flat=True)
+
+
+def indexed_rows():
+    return Pokemon.objects.filter(
+        types__synced_at__isnull=False
+    ).values_list("name", "pokeapi_id", "types__name")
+
+
+def bit_order(known_types, indexed_types):
+    # Bits follow the known types, types only found in the index come after them
+    type_names = sorted(known_types)
+    return type_names + sorted(set(indexed_types) - set(type_names))
+
+
+class TypeMaskEngine:
+    """
+    In-memory snapshot of the type index where every type is one bit of an integer.
+    Pokémon masks are kept in an array parallel to the sorted Pokémon names,
+    so an access check is one AND and the accessible list one pass over the array.
+    """
+
+    def __init__(self, type_names, indexed_types, rows, version=None):
+        """
+        `rows` are (Pokémon name, PokeAPI id, type name) tuples of the indexed types.
+        """
+        self.version = version
+        self.bits = {name: 1 << bit for bit, name in enumerate(type_names)}
+        self.indexed_mask = self.mask_of(indexed_types)
+        self._group_masks = {}
+
+        masks_by_name = {}
+        names_by_id = {}
+        for name, pokeapi_id, type_name in rows:
+            masks_by_name[name] = masks_by_name.get(name, 0) | self.bits.get(type_name, 0)
+            if pokeapi_id is not None:
+                names_by_id[pokeapi_id] = name
+
+        self.names = sorted(masks_by_name)
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.rows_by_id = {pokeapi_id: self.rows[name] for pokeapi_id, name in names_by_id.items()}
+        # Up to 64 types fit the unsigned 64 bit array, more fall back to a list of ints
+        masks = (masks_by_name[name] for name in self.names)
+        self.masks = array("Q", masks) if len(self.bits) <= 64 else list(masks)
+
+    @classmethod
+    def from_index(cls, version=None):
+        indexed_types = set(indexed_type_names())
+        type_names = bit_order(load_pokemon_types(), indexed_types)
+        return cls(type_names, indexed_types, indexed_rows(), version=version)
+
+    @classmethod
+    async def afrom_index(cls, version=None):
+        """
+        from_index through the async ORM.
+        """
+        indexed_types = {name async for name in indexed_type_names()}
+        known_types = await sync_to_async(load_pokemon_types)()
+        rows = [row async for row in indexed_rows()]
+        return cls(bit_order(known_types, indexed_types), indexed_types, rows, version=version)
+
+    def mask_of(self, type_names):
+        mask = 0
+        for name in type_names:
+            mask |= self.bits.get(name, 0)
+        return mask
+
+    def group_mask(self, allowed_types):
+        """
+        Returns (mask, indexed) for a set of type groups, `indexed` telling whether all
+        of them are indexed. Computed once per set of groups and shared by its users.
+        """
+        allowed_types = frozenset(allowed_types)
+        result = self._group_masks.get(allowed_types)
+
+        if result is None:
+            mask = self.mask_of(allowed_types)
+            indexed = all(self.bits.get(name, 0) & self.indexed_mask for name in allowed_types)
+            result = self._group_masks[allowed_types] = (mask, indexed)
+
+        return result
+
+    def find_row(self, identifier):
+        lookup = pokemon_lookup(identifier)
+        if "pokeapi_id" in lookup:
+            return self.rows_by_id.get(lookup["pokeapi_id"])
+        return self.rows.get(lookup["name"])
+
+    def check(self, identifier, allowed_types):
+        """
+        Returns whether a Pokémon belongs to one of the allowed types, or None when
+        the index cannot tell, i.e. the Pokémon or one of the allowed types is not indexed.
+        """
+        mask, indexed = self.group_mask(allowed_types)
+        row = self.find_row(identifier)
+        if not indexed or row is None:
+            return None
+        return bool(self.masks[row] & mask)
+
+    def accessible_names(self, allowed_types):
+        """
+        Returns (sorted names of the Pokémon of the indexed allowed types, those indexed types).
+        """
+        mask, _indexed = self.group_mask(allowed_types)
+        mask &= self.indexed_mask
+        indexed_types = {name for name in allowed_types if self.bits.get(name, 0) & mask}
+
+        if not mask:
+            return [], indexed_types
+        return list(compress(self.names, (pokemon_mask & mask for pokemon_mask in self.masks))), indexed_types
+
+
+def get_type_mask_engine():
+    """
+    Returns the engine of the current index, rebuilt whenever the index version changes.
+    """
+    global _engine
+
+    version = get_index_version()
+    engine = _engine
+
+    if engine is None or engine.version != version:
+        with _engine_lock:
+            if _engine is None or _engine.version != version:
+                _engine = TypeMaskEngine.from_index(version=version)
+            engine = _engine
+
+    return engine
+
+
+async def aget_type_mask_engine():
+    """
+    Async get_type_mask_engine. Concurrent rebuilds are not coordinated, the last one wins.
+    """
+    global _engine
+
+    version = await aget_index_version()
+    engine = _engine
+
+    if engine is None or engine.version != version:
+        engine = await TypeMaskEngine.afrom_index(version=version)
+        with _engine_lock:
+            _engine = engine
+
+    return engine
+
+
+def reset_type_mask_engine():
+    global _engine
+
+    with _engine_lock:
+        _engine = None
@@ -1,10 +1,26 @@
-from unittest.mock import patch
+import json
+import os
+import tempfile
+from unittest.mock import patch, AsyncMock
+from urllib.parse import parse_qs, urlparse
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from django.utils import timezone
 
 from access_management_api.models import PokemonTypeGroup
+from pokemon_api.models import Pokemon, PokemonType
+from pokemon_api.services import pokeapi_client
+from pokemon_api.services.circuit_breaker import UpstreamUnavailable
+from pokemon_api.services.fetch_pokemon_by_type import last_known_members_key
+from pokemon_api.services.fixture_store import FixtureStore
+from pokemon_api.services.pokemon_access import remember_pokemon_types
+from pokemon_api.services.pokemon_cache import get_pokemon_cache, reset_pokemon_cache
+from pokemon_api.services.token_bucket import UpstreamBudgetExceeded, charge_upstream, reset_bucket_store
 
 User = get_user_model()
 
@@ -12,6 +28,11 @@ User = get_user_model()
 class PokemonAPITest(APITestCase):
 
     def setUp(self):
+        cache.clear()
+        reset_pokemon_cache()
+        reset_bucket_store()
+        self.addCleanup(reset_pokemon_cache)
+
         # Create a test user
         self.username = "testuser"
         self.password = "testpassword123"
@@ -35,7 +56,7 @@ class PokemonAPITest(APITestCase):
     # LIST VIEW TESTS
     # ---------------------------------------------------------
 
-    @patch("pokemon_api.views.fetch_pokemon_by_type")
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
     def test_list_pokemon_with_no_groups_returns_empty_list(self, mock_fetch):
         url = reverse("pokemon_list")
 
@@ -45,17 +66,17 @@ class PokemonAPITest(APITestCase):
         self.assertEqual(response.data, [])
         mock_fetch.assert_not_called()
 
-    @patch("pokemon_api.views.fetch_pokemon_by_type")
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
     def test_list_pokemon_with_one_group(self, mock_fetch):
         # User belongs to "fire"
         group = PokemonTypeGroup.objects.create(name="fire")
         self.user.pokemon_groups.add(group)
 
         # Mock PokeAPI response
-        mock_fetch.return_value = [
+        mock_fetch.return_value = ([
             {"name": "charmander", "url": "dummy"},
             {"name": "vulpix", "url": "dummy"},
-        ]
+        ], False)
 
         url = reverse("pokemon_list")
         response = self.client.get(url)
@@ -64,7 +85,7 @@ class PokemonAPITest(APITestCase):
         self.assertEqual(len(response.data), 2)
         self.assertEqual(response.data[0]["name"], "charmander")
 
-    @patch("pokemon_api.views.fetch_pokemon_by_type")
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
     def test_list_pokemon_deduplicates_across_types(self, mock_fetch):
         # User belongs to fire + flying
         fire = PokemonTypeGroup.objects.create(name="fire")
@@ -73,8 +94,8 @@ class PokemonAPITest(APITestCase):
 
         # Mock responses
         mock_fetch.side_effect = [
-            [{"name": "charizard", "url": "dummy"}],  # fire
-            [{"name": "charizard", "url": "dummy"}],  # flying
+            ([{"name": "charizard", "url": "dummy"}], False),  # fire
+            ([{"name": "charizard", "url": "dummy"}], False),  # flying
         ]
 
         url = reverse("pokemon_list")
@@ -84,42 +105,218 @@ class PokemonAPITest(APITestCase):
         self.assertEqual(len(response.data), 1)  # deduplicated
         self.assertEqual(response.data[0]["name"], "charizard")
 
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_marks_partial_response_when_a_type_fails(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        water = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(fire, water)
+
+        def fetch(pokemon_type):
+            if pokemon_type == "water":
+                raise RuntimeError("upstream failure")
+            return [{"name": "charmander", "url": "dummy"}], False
+
+        mock_fetch.side_effect = fetch
+
+        url = reverse("pokemon_list")
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["name"] for p in response.data], ["charmander"])
+        self.assertEqual(response["X-Partial-Response"], "true")
+        self.assertEqual(response["X-Missing-Types"], "water")
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_reads_indexed_types_locally(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        water = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(fire, water)
+
+        indexed_fire = PokemonType.objects.create(name="fire", synced_at=timezone.now())
+        indexed_fire.pokemon.add(Pokemon.objects.create(name="charmander", pokeapi_id=4))
+        mock_fetch.return_value = ([{"name": "squirtle", "url": "dummy"}], False)
+
+        url = reverse("pokemon_list")
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["name"] for p in response.data], ["charmander", "squirtle"])
+        mock_fetch.assert_called_once_with("water")
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_is_shared_between_users_with_the_same_groups(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(fire)
+        other_user = User.objects.create_user(username="otheruser", password="otherpassword123")
+        other_user.pokemon_groups.add(fire)
+        mock_fetch.return_value = ([{"name": "charmander", "url": "dummy"}], False)
+
+        url = reverse("pokemon_list")
+        self.client.get(url)
+        self.client.force_authenticate(other_user)
+        response = self.client.get(url)
+
+        self.assertEqual(response.data, [{"name": "charmander", "url": "/api/pokemon/charmander/"}])
+        mock_fetch.assert_called_once_with("fire")
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_follows_group_changes(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        water = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(fire)
+        mock_fetch.side_effect = lambda pokemon_type: ([
+            {"name": "charmander" if pokemon_type == "fire" else "squirtle", "url": "dummy"}
+        ], False)
+
+        url = reverse("pokemon_list")
+        self.client.get(url)
+        self.user.pokemon_groups.add(water)
+        response = self.client.get(url)
+
+        self.assertEqual([p["name"] for p in response.data], ["charmander", "squirtle"])
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_reads_groups_from_the_token(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(fire)
+        indexed_fire = PokemonType.objects.create(name="fire", synced_at=timezone.now())
+        indexed_fire.pokemon.add(Pokemon.objects.create(name="charmander", pokeapi_id=4))
+
+        # Log in again so the token claims the fire group
+        response = self.client.post(
+            reverse("login"),
+            {"username": self.username, "password": self.password},
+            format="json"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+        url = reverse("pokemon_list")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual([p["name"] for p in response.data], ["charmander"])
+        mock_fetch.assert_not_called()
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_ignores_outdated_group_claims(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(fire)
+        indexed_fire = PokemonType.objects.create(name="fire", synced_at=timezone.now())
+        indexed_fire.pokemon.add(Pokemon.objects.create(name="charmander", pokeapi_id=4))
+
+        response = self.client.post(
+            reverse("login"),
+            {"username": self.username, "password": self.password},
+            format="json"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.user.pokemon_groups.remove(fire)
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "charmander"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        mock_fetch.assert_not_called()
+
+    # ---------------------------------------------------------
+    # LIST VIEW PAGINATION AND STREAMING TESTS
+    # ---------------------------------------------------------
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_cursor_pagination(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ([
+            {"name": name, "url": "dummy"}
+            for name in ["vulpix", "charmander", "ponyta", "growlithe", "magmar"]
+        ], False)
+
+        url = reverse("pokemon_list")
+        first_page = self.client.get(url, {"limit": 2})
+        second_page = self.client.get(first_page.data["next"])
+        cursor = parse_qs(urlparse(second_page.data["next"]).query)["cursor"][0]
+        last_page = self.client.get(url, {"limit": 2, "cursor": cursor})
+
+        self.assertEqual([p["name"] for p in first_page.data["results"]], ["charmander", "growlithe"])
+        self.assertEqual([p["name"] for p in second_page.data["results"]], ["magmar", "ponyta"])
+        self.assertEqual([p["name"] for p in last_page.data["results"]], ["vulpix"])
+        self.assertIsNone(last_page.data["next"])
+
+    def test_list_pokemon_invalid_cursor(self):
+        url = reverse("pokemon_list")
+        response = self.client.get(url, {"cursor": "not a cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_streams_ndjson(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        flying = PokemonTypeGroup.objects.create(name="flying")
+        self.user.pokemon_groups.add(fire, flying)
+        mock_fetch.side_effect = lambda pokemon_type: ([
+            {"name": "charizard", "url": "dummy"},
+            {"name": "vulpix" if pokemon_type == "fire" else "pidgey", "url": "dummy"},
+        ], False)
+
+        url = reverse("pokemon_list")
+        response = self.client.get(url, {"stream": "ndjson"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            sorted(json.loads(line)["name"] for line in lines),
+            ["charizard", "pidgey", "vulpix"],
+        )
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_stream_reports_missing_types(self, mock_fetch):
+        water = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(water)
+        mock_fetch.side_effect = RuntimeError("upstream failure")
+
+        url = reverse("pokemon_list")
+        response = self.client.get(url, {"stream": "ndjson"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual([json.loads(line) for line in lines], [{"missing_types": ["water"]}])
+
     # ---------------------------------------------------------
     # DETAIL VIEW TESTS
     # ---------------------------------------------------------
 
-    @patch("pokemon_api.views.fetch_pokemon")
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
     def test_detail_pokemon_not_found(self, mock_fetch):
-        mock_fetch.return_value = None
+        mock_fetch.return_value = (None, False)
 
         url = reverse("pokemon_detail", kwargs={"identifier": "missingmon"})
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
-    @patch("pokemon_api.views.fetch_pokemon")
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
     def test_detail_pokemon_forbidden(self, mock_fetch):
         # User has no groups
-        mock_fetch.return_value = {
+        mock_fetch.return_value = ({
             "name": "squirtle",
             "types": [{"type": {"name": "water"}}]
-        }
+        }, False)
 
         url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
-    @patch("pokemon_api.views.fetch_pokemon")
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
     def test_detail_pokemon_allowed(self, mock_fetch):
         # User belongs to water
         group = PokemonTypeGroup.objects.create(name="water")
         self.user.pokemon_groups.add(group)
 
-        mock_fetch.return_value = {
+        mock_fetch.return_value = ({
             "name": "squirtle",
             "types": [{"type": {"name": "water"}}]
-        }
+        }, False)
 
         url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
         response = self.client.get(url)
@@ -127,19 +324,19 @@ class PokemonAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["name"], "squirtle")
 
-    @patch("pokemon_api.views.fetch_pokemon")
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
     def test_detail_pokemon_multi_type_allowed(self, mock_fetch):
         # User belongs to flying
         group = PokemonTypeGroup.objects.create(name="flying")
         self.user.pokemon_groups.add(group)
 
-        mock_fetch.return_value = {
+        mock_fetch.return_value = ({
             "name": "charizard",
             "types": [
                 {"type": {"name": "fire"}},
                 {"type": {"name": "flying"}}
             ]
-        }
+        }, False)
 
         url = reverse("pokemon_detail", kwargs={"identifier": "charizard"})
         response = self.client.get(url)
@@ -147,10 +344,384 @@ class PokemonAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["name"], "charizard")
 
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_indexed_pokemon_forbidden_without_fetching(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(group)
+
+        PokemonType.objects.create(name="fire", synced_at=timezone.now())
+        water = PokemonType.objects.create(name="water", synced_at=timezone.now())
+        water.pokemon.add(Pokemon.objects.create(name="squirtle", pokeapi_id=7))
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "7"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        mock_fetch.assert_not_called()
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_known_pokemon_forbidden_without_fetching(self, mock_fetch):
+        remember_pokemon_types({
+            "id": 7,
+            "name": "squirtle",
+            "types": [{"type": {"name": "water"}}]
+        })
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "Squirtle"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        mock_fetch.assert_not_called()
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_pokemon_field_projection(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ({
+            "id": 7,
+            "name": "squirtle",
+            "types": [{"slot": 1, "type": {"name": "water", "url": "dummy"}}],
+            "sprites": {"front_default": "front.png", "back_default": "back.png"},
+            "moves": [{"move": {"name": "tackle"}}],
+        }, False)
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
+        response = self.client.get(url, {"fields": "id,types.type.name,sprites.front_default"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            "id": 7,
+            "types": [{"type": {"name": "water"}}],
+            "sprites": {"front_default": "front.png"},
+        })
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_pokemon_field_exclusion(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ({
+            "name": "squirtle",
+            "types": [{"type": {"name": "water"}}],
+            "moves": [{"move": {"name": "tackle"}}],
+        }, False)
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
+        full = self.client.get(url)
+        response = self.client.get(url, {"exclude": "moves"})
+
+        self.assertEqual(response.data, {"name": "squirtle", "types": [{"type": {"name": "water"}}]})
+        self.assertNotEqual(response["ETag"], full["ETag"])
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_pokemon_upstream_unavailable(self, mock_fetch):
+        mock_fetch.side_effect = UpstreamUnavailable("PokeAPI circuit is open")
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn("Retry-After", response)
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_pokemon_marks_stale_response(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ({"name": "squirtle", "types": [{"type": {"name": "water"}}]}, True)
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Stale-Response"], "true")
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertNotIn("ETag", response)
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_marks_stale_types(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ([{"name": "charmander", "url": "dummy"}], True)
+
+        url = reverse("pokemon_list")
+        self.client.get(url)
+        response = self.client.get(url)
+
+        self.assertEqual([p["name"] for p in response.data], ["charmander"])
+        self.assertEqual(response["X-Stale-Types"], "fire")
+        # Stale lists are not cached
+        self.assertEqual(mock_fetch.call_count, 2)
+
+    # ---------------------------------------------------------
+    # THROTTLING TESTS
+    # ---------------------------------------------------------
+
+    @override_settings(POKEMON_THROTTLE={"REQUESTS": {"CAPACITY": 2, "RATE": 0.1}})
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_requests_are_throttled_per_user_and_endpoint(self, mock_fetch):
+        mock_fetch.return_value = ([], False)
+        list_url = reverse("pokemon_list")
+
+        self.client.get(list_url)
+        self.client.get(list_url)
+        throttled = self.client.get(list_url)
+        batch = self.client.get(reverse("pokemon_batch"))
+
+        self.assertEqual(throttled.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(throttled["Retry-After"], "10")
+        # Other endpoints have their own bucket
+        self.assertEqual(batch.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_throttled_when_the_upstream_budget_is_spent(self, mock_fetch):
+        mock_fetch.side_effect = UpstreamBudgetExceeded(wait=3.2)
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "4")
+
+    @override_settings(POKEMON_THROTTLE={"UPSTREAM": {"CAPACITY": 1, "RATE": 0.1}})
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_cached_pokemon_are_served_after_the_upstream_budget_is_spent(self, mock_get):
+        group = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(group)
+        get_pokemon_cache().put("squirtle", {"name": "squirtle", "types": [{"type": {"name": "water"}}]})
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"name": "psyduck", "types": [{"type": {"name": "water"}}]}
+
+        fetched = self.client.get(reverse("pokemon_detail", kwargs={"identifier": "psyduck"}))
+        throttled = self.client.get(reverse("pokemon_detail", kwargs={"identifier": "poliwag"}))
+        cached = self.client.get(reverse("pokemon_detail", kwargs={"identifier": "squirtle"}))
+
+        self.assertEqual(fetched.status_code, status.HTTP_200_OK)
+        self.assertEqual(throttled.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        mock_get.assert_called_once()
+
+    @override_settings(POKEMON_THROTTLE={"UPSTREAM": {"CAPACITY": 1, "RATE": 0.1}})
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_list_throttled_when_the_upstream_budget_is_spent(self, mock_get):
+        for name in ("fire", "water", "grass"):
+            self.user.pokemon_groups.add(PokemonTypeGroup.objects.create(name=name))
+        # Last known members are for outages, not for users out of budget
+        cache.set(last_known_members_key("water"), [{"name": "squirtle", "url": "dummy"}])
+        cache.set(last_known_members_key("grass"), [{"name": "bulbasaur", "url": "dummy"}])
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"pokemon": [{"pokemon": {"name": "charmander", "url": "dummy"}}]}
+
+        response = self.client.get(reverse("pokemon_list"))
+        streamed = self.client.get(reverse("pokemon_list"), {"stream": "ndjson"})
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "10")
+        self.assertNotIn("X-Stale-Types", response)
+        self.assertEqual(streamed.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        mock_get.assert_called_once()
+
+    # ---------------------------------------------------------
+    # CONDITIONAL REQUEST TESTS
+    # ---------------------------------------------------------
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_not_modified(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ([{"name": "charmander", "url": "dummy"}], False)
+
+        url = reverse("pokemon_list")
+        response = self.client.get(url)
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_list_pokemon_etag_changes_with_groups(self, mock_fetch):
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        water = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(fire)
+        mock_fetch.return_value = ([{"name": "charmander", "url": "dummy"}], False)
+
+        url = reverse("pokemon_list")
+        response = self.client.get(url)
+        self.user.pokemon_groups.add(water)
+        modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(modified["ETag"], response["ETag"])
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_pokemon_not_modified_without_fetching(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(group)
+        squirtle = {"id": 7, "name": "squirtle", "types": [{"type": {"name": "water"}}]}
+        remember_pokemon_types(squirtle)
+        get_pokemon_cache().get_or_fetch("squirtle", lambda: squirtle)
+        mock_fetch.return_value = (squirtle, False)
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
+        response = self.client.get(url)
+        mock_fetch.reset_mock()
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        mock_fetch.assert_not_called()
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_detail_pokemon_stale_etag_returns_body(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ({"name": "squirtle", "types": [{"type": {"name": "water"}}]}, False)
+
+        url = reverse("pokemon_detail", kwargs={"identifier": "squirtle"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"outdated"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "squirtle")
+        self.assertIn("ETag", response)
+
     # ---------------------------------------------------------
     # AUTH TESTS
     # ---------------------------------------------------------
 
+    # ---------------------------------------------------------
+    # BATCH VIEW TESTS
+    # ---------------------------------------------------------
+
+    @patch("pokemon_api.views.fetch_pokemon_or_stale")
+    def test_batch_pokemon_marks_every_item(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="water")
+        self.user.pokemon_groups.add(group)
+        remember_pokemon_types({"id": 4, "name": "charmander", "types": [{"type": {"name": "fire"}}]})
+
+        pokemon = {
+            "squirtle": {"id": 7, "name": "squirtle", "types": [{"type": {"name": "water"}}]},
+            "pikachu": {"id": 25, "name": "pikachu", "types": [{"type": {"name": "electric"}}]},
+        }
+        mock_fetch.side_effect = lambda key: (pokemon.get(key), False)
+
+        url = reverse("pokemon_batch")
+        response = self.client.get(url, {"ids": "squirtle,charmander,pikachu,missingno,squirtle", "fields": "name"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item["id"], item["status"]) for item in response.data["results"]],
+            [("squirtle", 200), ("charmander", 403), ("pikachu", 403), ("missingno", 404)],
+        )
+        self.assertEqual(response.data["results"][0]["data"], {"name": "squirtle"})
+        # Known forbidden Pokémon are not fetched
+        self.assertNotIn("charmander", [call.args[0] for call in mock_fetch.call_args_list])
+
+    def test_batch_pokemon_requires_ids(self):
+        url = reverse("pokemon_batch")
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"ids": ",".join(str(i) for i in range(101))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_metrics_record_requests_and_queries(self, mock_fetch):
+        group = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ([{"name": "charmander", "url": "dummy"}], False)
+        self.client.get(reverse("pokemon_list"))
+
+        response = self.client.get(reverse("metrics"))
+        text = response.content.decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('http_requests_total{endpoint="pokemon_list",method="GET",status="200"}', text)
+        self.assertIn('http_request_db_queries_count{endpoint="pokemon_list"}', text)
+        self.assertIn('pokemon_cache_lookups_total{cache="pokemon_list",result="miss"}', text)
+        self.assertIn('pokemon_fan_out_keys_total{result="ok"}', text)
+
+    def test_metrics_only_answer_allowed_clients(self):
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.7")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_staff_users_get_the_server_timing_of_a_request(self, mock_fetch):
+        self.user.is_staff = True
+        self.user.save()
+        group = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(group)
+        mock_fetch.return_value = ([{"name": "charmander", "url": "dummy"}], False)
+        response = self.client.post(
+            reverse("login"),
+            {"username": self.username, "password": self.password},
+            format="json"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+        response = self.client.get(reverse("pokemon_list"), HTTP_X_SERVER_TIMING="1")
+
+        phases = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+        self.assertEqual(phases, ["auth", "throttle", "groups", "db", "fan_out", "render", "total"])
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_server_timing_is_only_given_to_staff_users(self, mock_fetch):
+        mock_fetch.return_value = ([], False)
+
+        response = self.client.get(reverse("pokemon_list"), HTTP_X_SERVER_TIMING="1")
+        self.assertNotIn("Server-Timing", response)
+
+        with override_settings(POKEMON_SERVER_TIMING={"SAMPLE_RATE": 1}):
+            response = self.client.get(reverse("pokemon_list"))
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    @override_settings(POKEMON_SERVER_TIMING={"PROFILER": "cprofile"})
+    @patch("pokemon_api.services.server_timing.RequestProfiler.start")
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_requested_timings_of_other_users_are_not_profiled(self, mock_fetch, mock_start):
+        mock_fetch.return_value = ([], False)
+
+        self.client.get(reverse("pokemon_list"), HTTP_X_SERVER_TIMING="1")
+        self.client.credentials()
+        self.client.get(reverse("pokemon_list"), HTTP_X_SERVER_TIMING="1")
+
+        mock_start.assert_not_called()
+
+    @patch("pokemon_api.views.fetch_pokemon_by_type_or_stale")
+    def test_slow_timed_requests_are_profiled(self, mock_fetch):
+        mock_fetch.return_value = ([], False)
+
+        with tempfile.TemporaryDirectory() as directory:
+            timing_settings = {"SAMPLE_RATE": 1, "PROFILER": "cprofile", "PROFILE_DIR": directory, "SLOW_REQUEST_MS": 0}
+            with override_settings(POKEMON_SERVER_TIMING=timing_settings):
+                with self.assertLogs("pokemon_api.services.server_timing", level="WARNING"):
+                    self.client.get(reverse("pokemon_list"))
+
+            profiles = os.listdir(directory)
+
+        self.assertEqual(len(profiles), 1)
+        self.assertRegex(profiles[0], r"-pokemon_list-\d+ms-\d+\.prof$")
+
+    def test_detail_pokemon_replayed_from_recorded_fixtures(self):
+        group = PokemonTypeGroup.objects.create(name="electric")
+        self.user.pokemon_groups.add(group)
+
+        with tempfile.TemporaryDirectory() as directory:
+            FixtureStore(directory).put(
+                "pokemon/pikachu/", 200,
+                json.dumps({"id": 25, "name": "pikachu", "types": [{"type": {"name": "electric"}}]}).encode(),
+            )
+            pokeapi_client.reset_session()
+            self.addCleanup(pokeapi_client.reset_session)
+
+            with override_settings(POKEAPI_CLIENT={"TRANSPORT": "replay", "FIXTURES_DIR": directory}):
+                response = self.client.get(reverse("pokemon_detail", args=["pikachu"]))
+                missing = self.client.get(reverse("pokemon_detail", args=["raichu"]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], 25)
+        self.assertEqual(missing.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
     def test_list_requires_authentication(self):
         self.client.credentials()  # remove token
         url = reverse("pokemon_list")
@@ -162,3 +733,125 @@ class PokemonAPITest(APITestCase):
         url = reverse("pokemon_detail", kwargs={"identifier": "pikachu"})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncPokemonAPITest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_pokemon_cache()
+        reset_bucket_store()
+        self.addCleanup(reset_pokemon_cache)
+
+        self.username = "testuser"
+        self.password = "testpassword123"
+        self.user = User.objects.create_user(
+            username=self.username,
+            password=self.password
+        )
+        water = PokemonTypeGroup.objects.create(name="water")
+        fire = PokemonTypeGroup.objects.create(name="fire")
+        self.user.pokemon_groups.add(water, fire)
+
+        response = self.client.post(
+            reverse("login"),
+            {"username": self.username, "password": self.password},
+            format="json"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    @patch("pokemon_api.async_views.afetch_pokemon_by_type_or_stale", new_callable=AsyncMock)
+    def test_async_list_pokemon(self, mock_fetch):
+        indexed_fire = PokemonType.objects.create(name="fire", synced_at=timezone.now())
+        indexed_fire.pokemon.add(Pokemon.objects.create(name="charmander", pokeapi_id=4))
+        mock_fetch.return_value = ([{"name": "squirtle", "url": "dummy"}], False)
+
+        response = self.client.get(reverse("async_pokemon_list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["name"] for p in response.json()], ["charmander", "squirtle"])
+        self.assertIn("ETag", response)
+        mock_fetch.assert_awaited_once_with("water")
+
+    @patch("pokemon_api.async_views.afetch_pokemon_by_type_or_stale", new_callable=AsyncMock)
+    def test_async_list_pokemon_partial_response(self, mock_fetch):
+        mock_fetch.side_effect = lambda pokemon_type: (
+            ([{"name": "charmander", "url": "dummy"}], False) if pokemon_type == "fire" else 1 / 0
+        )
+
+        response = self.client.get(reverse("async_pokemon_list"), {"limit": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "next": None,
+            "results": [{"name": "charmander", "url": "/api/pokemon/charmander/"}],
+        })
+        self.assertEqual(response["X-Missing-Types"], "water")
+
+    @patch("pokemon_api.async_views.afetch_pokemon_by_type_or_stale", new_callable=AsyncMock)
+    def test_async_list_pokemon_invalid_cursor(self, mock_fetch):
+        mock_fetch.return_value = ([], False)
+
+        response = self.client.get(reverse("async_pokemon_list"), {"cursor": "not a cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {"detail": "Invalid cursor"})
+
+    @patch("pokemon_api.async_views.afetch_pokemon_or_stale", new_callable=AsyncMock)
+    def test_async_detail_pokemon(self, mock_fetch):
+        mock_fetch.return_value = ({
+            "id": 7,
+            "name": "squirtle",
+            "types": [{"type": {"name": "water"}}],
+        }, False)
+
+        url = reverse("async_pokemon_detail", kwargs={"identifier": "squirtle"})
+        response = self.client.get(url, {"fields": "name"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"name": "squirtle"})
+
+    @patch("pokemon_api.async_views.afetch_pokemon_or_stale", new_callable=AsyncMock)
+    def test_async_detail_pokemon_forbidden(self, mock_fetch):
+        mock_fetch.return_value = ({
+            "id": 25,
+            "name": "pikachu",
+            "types": [{"type": {"name": "electric"}}],
+        }, False)
+
+        url = reverse("async_pokemon_detail", kwargs={"identifier": "pikachu"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(POKEMON_THROTTLE={"REQUESTS": {"CAPACITY": 1, "RATE": 0.5}})
+    @patch("pokemon_api.async_views.afetch_pokemon_by_type_or_stale", new_callable=AsyncMock)
+    def test_async_views_are_throttled(self, mock_fetch):
+        mock_fetch.return_value = ([], False)
+
+        self.client.get(reverse("async_pokemon_list"))
+        response = self.client.get(reverse("async_pokemon_list"))
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "2")
+
+    @override_settings(POKEMON_THROTTLE={"UPSTREAM": {"CAPACITY": 1, "RATE": 0.5}})
+    @patch("pokemon_api.async_views.afetch_pokemon_by_type_or_stale", new_callable=AsyncMock)
+    def test_async_list_throttled_when_the_upstream_budget_is_spent(self, mock_fetch):
+        def fetch(pokemon_type):
+            charge_upstream()
+            return [], False
+        mock_fetch.side_effect = fetch
+
+        response = self.client.get(reverse("async_pokemon_list"))
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "2")
+
+    def test_async_views_require_authentication(self):
+        self.client.credentials()
+
+        response = self.client.get(reverse("async_pokemon_list"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", response)
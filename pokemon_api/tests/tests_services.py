@@ -1,13 +1,81 @@
-from unittest.mock import patch, MagicMock
-from django.test import TestCase
+import asyncio
+import json
+import os
+from datetime import timedelta
+from unittest.mock import patch, AsyncMock, MagicMock
+import tempfile
+import threading
+import time
 
-from pokemon_api.services.fetch_pokemon import fetch_pokemon
-from pokemon_api.services.fetch_pokemon_by_type import fetch_pokemon_by_type
+import httpx
+import requests
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+import access_management_api.services.load_pokemon_types as pokemon_types
+from pokemon_api.models import Pokemon, PokemonDocument, PokemonType
+
+from pokemon_api.services import pokeapi_client
+from pokemon_api.services.benchmark import (
+    baseline_record,
+    compare_results,
+    create_benchmark_user,
+    percentile,
+    run_benchmark,
+)
+from pokemon_api.services.circuit_breaker import (
+    CircuitBreaker,
+    UpstreamUnavailable,
+    get_circuit_breaker,
+    reset_circuit_breaker,
+)
+from pokemon_api.services.fan_out import async_fan_out, fan_out
+from pokemon_api.services.fetch_pokemon import afetch_pokemon, fetch_pokemon, fetch_pokemon_or_stale
+from pokemon_api.services.metrics import MetricsRegistry
+from pokemon_api.services.server_timing import Timings
+from pokemon_api.services.identifiers import IdentifierIndex, normalize_identifier
+from pokemon_api.services.payload_codec import decode_payload, encode_payload
+from pokemon_api.services.pokemon_access import check_pokemon_access, lookup_pokemon_types
+from pokemon_api.services.pokemon_cache import (
+    CacheEntry,
+    FileCacheBackend,
+    MemoryCacheBackend,
+    PokemonCache,
+    get_pokemon_cache,
+    reset_pokemon_cache,
+)
+from pokemon_api.services.fixture_store import FixtureStore
+from pokemon_api.services.fake_pokeapi import FakePokeAPI, synthetic_fixtures
+from pokemon_api.services.fetch_pokemon_by_type import fetch_pokemon_by_type, fetch_pokemon_by_type_or_stale
+from pokemon_api.services.token_bucket import (
+    CacheBucketStore,
+    MemoryBucketStore,
+    UpstreamBudget,
+    UpstreamBudgetExceeded,
+    take_token,
+    upstream_budget_scope,
+)
+from pokemon_api.services.project_fields import parse_field_paths, project_fields
+from pokemon_api.services.singleflight import AsyncSingleFlight, SingleFlight
+from pokemon_api.services.sync_pokeapi import pokemon_to_sync, sync_pokemon_documents
+from pokemon_api.services.type_index import (
+    check_index_access,
+    get_indexed_pokemon_names,
+    pokeapi_id_from_url,
+    sync_type_index,
+)
+from pokemon_api.services.type_masks import TypeMaskEngine
 
 
 class FetchPokemonTest(TestCase):
 
-    @patch("pokemon_api.services.fetch_pokemon.requests.get")
+    def setUp(self):
+        cache.clear()
+        reset_pokemon_cache()
+        self.addCleanup(reset_pokemon_cache)
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
     def test_fetch_pokemon_success(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -17,9 +85,69 @@ class FetchPokemonTest(TestCase):
         result = fetch_pokemon("pikachu")
 
         self.assertEqual(result, {"name": "pikachu"})
-        mock_get.assert_called_once_with("https://pokeapi.co/api/v2/pokemon/pikachu/")
+        mock_get.assert_called_once_with("pokemon/pikachu/")
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_aget", new_callable=AsyncMock)
+    async def test_afetch_pokemon_shares_the_cache(self, mock_aget):
+        mock_aget.return_value = httpx.Response(
+            200,
+            json={"name": "pikachu"},
+            request=httpx.Request("GET", "https://pokeapi.co/api/v2/pokemon/pikachu/"),
+        )
+
+        await afetch_pokemon("pikachu")
+        result = await afetch_pokemon("pikachu")
+
+        self.assertEqual(result, {"name": "pikachu"})
+        mock_aget.assert_awaited_once_with("pokemon/pikachu/")
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_aget", new_callable=AsyncMock)
+    async def test_afetch_pokemon_upstream_error(self, mock_aget):
+        mock_aget.side_effect = UpstreamUnavailable("PokeAPI request failed")
+
+        with self.assertRaises(UpstreamUnavailable):
+            await afetch_pokemon("pikachu")
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_ids_and_names_share_one_cache_entry(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"id": 25, "name": "pikachu"}
+        mock_get.return_value = mock_response
+
+        fetch_pokemon("Pikachu")
+        fetch_pokemon("pikachu ")
+        result = fetch_pokemon("025")
+
+        self.assertEqual(result, {"id": 25, "name": "pikachu"})
+        mock_get.assert_called_once_with("pokemon/pikachu/")
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_unknown_pokemon_is_rejected_by_a_complete_index(self, mock_get):
+        now = timezone.now()
+        PokemonType.objects.bulk_create([
+            PokemonType(name=name, synced_at=now) for name in pokemon_types.DEFAULT_POKEMON_TYPES
+        ])
+        Pokemon.objects.create(name="pikachu", pokeapi_id=25)
+
+        self.assertIsNone(fetch_pokemon("missingno"))
+        self.assertIsNone(fetch_pokemon("99999"))
+        mock_get.assert_not_called()
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_fetch_pokemon_is_cached(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"name": "pikachu"}
+        mock_get.return_value = mock_response
+
+        fetch_pokemon("pikachu")
+        result = fetch_pokemon("pikachu")
+
+        self.assertEqual(result, {"name": "pikachu"})
+        mock_get.assert_called_once()
 
-    @patch("pokemon_api.services.fetch_pokemon.requests.get")
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
     def test_fetch_pokemon_not_found(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 404
@@ -29,20 +157,69 @@ class FetchPokemonTest(TestCase):
 
         self.assertIsNone(result)
 
-    @patch("pokemon_api.services.fetch_pokemon.requests.get")
-    def test_fetch_pokemon_server_error(self, mock_get):
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_fetch_pokemon_not_found_is_cached(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_get.return_value = mock_response
+
+        fetch_pokemon("missingmon")
+        result = fetch_pokemon("missingmon")
+
+        self.assertIsNone(result)
+        mock_get.assert_called_once()
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_fetch_pokemon_rejected_identifier(self, mock_get):
         mock_response = MagicMock()
-        mock_response.status_code = 500
+        mock_response.status_code = 400
+        mock_response.raise_for_status.side_effect = requests.HTTPError()
         mock_get.return_value = mock_response
 
         result = fetch_pokemon("pikachu")
+        fetch_pokemon("pikachu")
 
         self.assertIsNone(result)
+        # Upstream errors are never cached
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_fetch_pokemon_upstream_unavailable(self, mock_get):
+        mock_get.side_effect = UpstreamUnavailable("PokeAPI answered 503")
+
+        with self.assertRaises(UpstreamUnavailable):
+            fetch_pokemon("pikachu")
+        with self.assertRaises(UpstreamUnavailable):
+            fetch_pokemon("pikachu")
+
+        # Unlike "not found", upstream failures are never cached
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_fetch_pokemon_serves_last_known_value_when_upstream_fails(self, mock_get):
+        # Expired long ago, past its stale window
+        entry = CacheEntry.from_value({"name": "pikachu"})._replace(stored_at=0)
+        get_pokemon_cache().backend.set("pikachu", entry)
+        mock_get.side_effect = UpstreamUnavailable("PokeAPI circuit is open")
+
+        self.assertEqual(fetch_pokemon_or_stale("pikachu"), ({"name": "pikachu"}, True))
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_fetch_pokemon_raises_a_spent_upstream_budget_instead_of_serving_stale(self, mock_get):
+        entry = CacheEntry.from_value({"name": "pikachu"})._replace(stored_at=0)
+        get_pokemon_cache().backend.set("pikachu", entry)
+        mock_get.side_effect = UpstreamBudgetExceeded(wait=4)
+
+        with self.assertRaises(UpstreamBudgetExceeded):
+            fetch_pokemon_or_stale("pikachu")
 
 
 class FetchPokemonByTypeTest(TestCase):
 
-    @patch("pokemon_api.services.fetch_pokemon_by_type.requests.get")
+    def setUp(self):
+        cache.clear()
+
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
     def test_fetch_pokemon_by_type_success(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -63,9 +240,9 @@ class FetchPokemonByTypeTest(TestCase):
                 {"name": "vulpix", "url": "dummy"},
             ]
         )
-        mock_get.assert_called_once_with("https://pokeapi.co/api/v2/type/fire/")
+        mock_get.assert_called_once_with("type/fire/")
 
-    @patch("pokemon_api.services.fetch_pokemon_by_type.requests.get")
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
     def test_fetch_pokemon_by_type_not_found(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 404
@@ -75,7 +252,7 @@ class FetchPokemonByTypeTest(TestCase):
 
         self.assertEqual(result, [])
 
-    @patch("pokemon_api.services.fetch_pokemon_by_type.requests.get")
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
     def test_fetch_pokemon_by_type_empty_list(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -86,7 +263,7 @@ class FetchPokemonByTypeTest(TestCase):
 
         self.assertEqual(result, [])
 
-    @patch("pokemon_api.services.fetch_pokemon_by_type.requests.get")
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
     def test_fetch_pokemon_by_type_missing_key(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -96,3 +273,926 @@ class FetchPokemonByTypeTest(TestCase):
         result = fetch_pokemon_by_type("fire")
 
         self.assertEqual(result, [])
+
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
+    def test_fetch_pokemon_by_type_upstream_unavailable(self, mock_get):
+        mock_get.side_effect = UpstreamUnavailable("PokeAPI request failed")
+
+        with self.assertRaises(UpstreamUnavailable):
+            fetch_pokemon_by_type("fire")
+
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
+    def test_fetch_pokemon_by_type_serves_last_known_members(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"pokemon": [{"pokemon": {"name": "vulpix", "url": "dummy"}}]}
+        mock_get.return_value = mock_response
+        fetch_pokemon_by_type("fire")
+
+        mock_get.side_effect = UpstreamUnavailable("PokeAPI circuit is open")
+
+        self.assertEqual(fetch_pokemon_by_type_or_stale("fire"), ([{"name": "vulpix", "url": "dummy"}], True))
+
+
+class PokeApiClientTest(TestCase):
+
+    def setUp(self):
+        pokeapi_client.reset_session()
+        reset_circuit_breaker()
+        self.addCleanup(pokeapi_client.reset_session)
+        self.addCleanup(reset_circuit_breaker)
+
+    def test_session_is_shared(self):
+        self.assertIs(pokeapi_client.get_session(), pokeapi_client.get_session())
+
+    @override_settings(POKEAPI_CLIENT={"POOL_MAXSIZE": 3, "MAX_RETRIES": 5})
+    def test_session_uses_configured_pool_and_retries(self):
+        adapter = pokeapi_client.get_session().get_adapter("https://pokeapi.co/")
+
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(adapter.max_retries.total, 5)
+
+    @override_settings(POKEAPI_CLIENT={"CONNECT_TIMEOUT": 1, "READ_TIMEOUT": 2})
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_pokeapi_get_uses_base_url_and_timeouts(self, mock_get):
+        mock_get.return_value.status_code = 200
+
+        pokeapi_client.pokeapi_get("pokemon/pikachu/")
+
+        mock_get.assert_called_once_with(
+            "https://pokeapi.co/api/v2/pokemon/pikachu/",
+            timeout=(1, 2),
+        )
+
+    @override_settings(POKEAPI_CIRCUIT_BREAKER={"FAILURE_THRESHOLD": 2})
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_pokeapi_get_stops_calling_upstream_once_the_circuit_opens(self, mock_get):
+        mock_get.return_value.status_code = 503
+
+        for _ in range(3):
+            with self.assertRaises(UpstreamUnavailable):
+                pokeapi_client.pokeapi_get("pokemon/pikachu/")
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_pokeapi_get_not_found_is_not_an_upstream_failure(self, mock_get):
+        mock_get.return_value.status_code = 404
+
+        response = pokeapi_client.pokeapi_get("pokemon/missingmon/")
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_pokeapi_get_connection_error_is_an_upstream_failure(self, mock_get):
+        mock_get.side_effect = requests.ConnectionError()
+
+        with self.assertRaises(UpstreamUnavailable):
+            pokeapi_client.pokeapi_get("pokemon/pikachu/")
+
+
+class TokenBucketTest(TestCase):
+
+    def test_take_token_refills_with_time(self):
+        state, wait = take_token(None, now=0, capacity=2, rate=1)
+        state, wait = take_token(state, now=0, capacity=2, rate=1)
+        self.assertEqual((state, wait), ((0, 0), 0))
+
+        state, wait = take_token(state, now=0.5, capacity=2, rate=1)
+        self.assertEqual(wait, 0.5)
+
+        state, wait = take_token(state, now=1, capacity=2, rate=1)
+        self.assertEqual(wait, 0)
+
+    def test_bucket_never_holds_more_than_its_capacity(self):
+        state, _wait = take_token((0, 0), now=100, capacity=2, rate=1)
+
+        self.assertEqual(state, (1, 100))
+
+    def test_stores_keep_one_bucket_per_key(self):
+        for store in (MemoryBucketStore(), CacheBucketStore()):
+            with self.subTest(store=type(store).__name__):
+                store.clear()
+                self.assertEqual(store.consume("a", capacity=1, rate=0.1), 0)
+                self.assertGreater(store.consume("a", capacity=1, rate=0.1), 9)
+                self.assertEqual(store.consume("b", capacity=1, rate=0.1), 0)
+
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_pokeapi_calls_are_charged_to_the_upstream_budget(self, mock_get):
+        mock_get.return_value.status_code = 200
+        budget = UpstreamBudget(MemoryBucketStore(), "pokemon_detail:1:upstream", capacity=1, rate=0.1)
+
+        with upstream_budget_scope(budget):
+            pokeapi_client.pokeapi_get("pokemon/pikachu/")
+            with self.assertRaises(UpstreamBudgetExceeded):
+                pokeapi_client.pokeapi_get("pokemon/pikachu/")
+
+        # Calls made outside of a request are not budgeted
+        pokeapi_client.pokeapi_get("pokemon/pikachu/")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_calls_stopped_by_the_open_circuit_are_not_charged(self, mock_get):
+        reset_circuit_breaker()
+        self.addCleanup(reset_circuit_breaker)
+        breaker = get_circuit_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        budget = UpstreamBudget(MemoryBucketStore(), "pokemon_list:1:upstream", capacity=1, rate=0.1)
+
+        with upstream_budget_scope(budget):
+            for _ in range(3):
+                with self.assertRaisesMessage(UpstreamUnavailable, "circuit is open"):
+                    pokeapi_client.pokeapi_get("type/fire/")
+
+        self.assertEqual(budget.wait(), 0)
+        mock_get.assert_not_called()
+
+    def test_fan_out_lookups_share_the_budget_of_the_caller(self):
+        budget = UpstreamBudget(MemoryBucketStore(), "pokemon_list:1:upstream", capacity=2, rate=0.1)
+
+        with upstream_budget_scope(budget):
+            results, missing = fan_out(lambda key: budget.charge(), ["fire", "water", "grass"])
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(missing), 1)
+
+
+class MetricsRegistryTest(TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter("requests_total", "Requests.", ["status"])
+        self.latency = self.registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+
+    def test_render_counters_and_cumulative_histograms(self):
+        self.requests.inc(status=200)
+        self.requests.inc(2, status=200)
+        self.latency.observe(0.05)
+        self.latency.observe(0.5)
+        self.latency.observe(5)
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{status="200"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("latency_seconds_count 3", text)
+
+    def test_samples_of_all_processes_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            other_process = MetricsRegistry()
+            other_process.counter("requests_total", "Requests.", ["status"]).inc(status=200)
+            with open(f"{directory}/metrics-0.json", "w") as f:
+                json.dump(other_process.snapshot(), f)
+            self.requests.inc(status=200)
+
+            with override_settings(POKEMON_METRICS={"MULTIPROCESS_DIR": directory}):
+                text = self.registry.render()
+
+        self.assertIn('requests_total{status="200"} 2', text)
+
+
+class TimingsTest(TestCase):
+
+    def test_header_lists_phases_in_order_and_adds_repeated_ones_up(self):
+        timings = Timings()
+        timings.add("auth", 0.0012)
+        timings.add("pokeapi", 0.1)
+        timings.add("pokeapi", 0.05)
+
+        self.assertEqual(
+            timings.header(total=0.2),
+            'auth;dur=1.2, pokeapi;dur=150.0;desc="2 calls", total;dur=200.0',
+        )
+
+
+class FakePokeAPITest(TestCase):
+
+    def setUp(self):
+        reset_circuit_breaker()
+        pokeapi_client.reset_session()
+        self.addCleanup(pokeapi_client.reset_session)
+        self.addCleanup(reset_circuit_breaker)
+
+    def test_serves_fixtures_and_counts_calls(self):
+        fixtures = synthetic_fixtures(["fire"], pokemon_per_type=2)
+
+        with FakePokeAPI(fixtures) as fake, override_settings(POKEAPI_CLIENT={"BASE_URL": fake.url}):
+            members = fetch_pokemon_by_type("fire")
+            pokemon = fetch_pokemon(members[0]["name"])
+            missing = fetch_pokemon("mewtwo")
+
+        self.assertEqual([member["name"] for member in members], ["firemon-1", "firemon-2"])
+        self.assertEqual(pokemon["id"], 1)
+        self.assertIsNone(missing)
+        self.assertEqual(fake.calls, {"type": 1, "pokemon": 2})
+
+    def test_injects_errors(self):
+        fake = FakePokeAPI(synthetic_fixtures(["fire"], pokemon_per_type=1), error_rate=1, seed=0)
+
+        self.assertEqual(fake.answer("/api/v2/type/fire/")[0], 503)
+
+
+class RecordReplayTransportTest(TestCase):
+
+    def setUp(self):
+        reset_circuit_breaker()
+        pokeapi_client.reset_session()
+        self.addCleanup(pokeapi_client.reset_session)
+        self.addCleanup(reset_circuit_breaker)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fixtures_dir = directory.name
+
+    def client_settings(self, mode, base_url="https://pokeapi.test/api/v2/"):
+        return {"BASE_URL": base_url, "TRANSPORT": mode, "FIXTURES_DIR": self.fixtures_dir, "MAX_RETRIES": 0}
+
+    def test_recorded_answers_are_replayed_without_network(self):
+        with FakePokeAPI(synthetic_fixtures(["fire"], pokemon_per_type=1)) as fake:
+            with override_settings(POKEAPI_CLIENT=self.client_settings("record", fake.url)):
+                recorded = pokeapi_client.pokeapi_get("pokemon/1/").json()
+                pokeapi_client.pokeapi_get("pokemon/mewtwo/")
+        pokeapi_client.reset_session()
+
+        with override_settings(POKEAPI_CLIENT=self.client_settings("replay")):
+            replayed = pokeapi_client.pokeapi_get("pokemon/1/")
+            not_found = pokeapi_client.pokeapi_get("pokemon/mewtwo/")
+            with self.assertRaises(UpstreamUnavailable):
+                pokeapi_client.pokeapi_get("pokemon/ditto/")
+
+        self.assertEqual(replayed.json(), recorded)
+        self.assertEqual(not_found.status_code, 404)
+        self.assertEqual(FixtureStore(self.fixtures_dir).paths(), ["pokemon/1/", "pokemon/mewtwo/"])
+
+    def test_unrecorded_paths_do_not_open_the_circuit(self):
+        FixtureStore(self.fixtures_dir).put("pokemon/1/", 200, b'{"id": 1}')
+
+        with override_settings(POKEAPI_CLIENT=self.client_settings("replay")):
+            for pokemon_id in range(2, 12):
+                with self.assertRaises(UpstreamUnavailable):
+                    pokeapi_client.pokeapi_get(f"pokemon/{pokemon_id}/")
+            with self.assertRaises(UpstreamUnavailable):
+                asyncio.run(pokeapi_client.pokeapi_aget("pokemon/12/"))
+            replayed = pokeapi_client.pokeapi_get("pokemon/1/")
+
+        self.assertEqual(replayed.json(), {"id": 1})
+
+    def test_async_client_records_and_replays(self):
+        with FakePokeAPI(synthetic_fixtures(["fire"], pokemon_per_type=1)) as fake:
+            with override_settings(POKEAPI_CLIENT=self.client_settings("record", fake.url)):
+                recorded = asyncio.run(pokeapi_client.pokeapi_aget("type/fire/")).json()
+
+        with override_settings(POKEAPI_CLIENT=self.client_settings("replay")):
+            replayed = asyncio.run(pokeapi_client.pokeapi_aget("type/fire/")).json()
+            with self.assertRaises(UpstreamUnavailable):
+                asyncio.run(pokeapi_client.pokeapi_aget("type/water/"))
+
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(FixtureStore(self.fixtures_dir).payloads(), {"type/fire/": recorded})
+
+    def test_transient_failures_are_not_recorded(self):
+        with FakePokeAPI({}, error_rate=1) as fake:
+            with override_settings(POKEAPI_CLIENT=self.client_settings("record", fake.url)):
+                with self.assertRaises(UpstreamUnavailable):
+                    pokeapi_client.pokeapi_get("pokemon/1/")
+
+        self.assertEqual(FixtureStore(self.fixtures_dir).paths(), [])
+
+
+class BenchmarkTest(TransactionTestCase):
+
+    def test_percentile_uses_the_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_results_are_compared_with_the_last_run_of_another_commit(self):
+        config = {"requests": 10}
+        result = {"driver": "wsgi", "scenario": "list", "p95_ms": 12, "rps": 90}
+        records = [
+            {"commit": "aaa", "dirty": False, "config": config, "results": [{**result, "p95_ms": 10, "rps": 100}]},
+            {"commit": "bbb", "dirty": False, "config": {"requests": 20}, "results": []},
+            {"commit": "ccc", "dirty": False, "config": config, "results": [result]},
+        ]
+
+        baseline = baseline_record(records, {"commit": "ccc", "dirty": False, "config": config})
+
+        self.assertEqual(baseline["commit"], "aaa")
+        self.assertEqual(compare_results(result, baseline), {"p95_ms": 20.0, "rps": -10.0})
+
+    def test_drives_both_handlers_against_the_fake_pokeapi(self):
+        create_benchmark_user(["fire"])
+        fixtures = synthetic_fixtures(["fire"], pokemon_per_type=3)
+
+        with FakePokeAPI(fixtures) as fake:
+            results = run_benchmark(fake, fixtures, ["fire"], scenarios=["list", "detail"], requests=6, concurrency=2)
+
+        self.assertEqual(
+            [(result["driver"], result["scenario"], result["statuses"]) for result in results],
+            [
+                ("wsgi", "list", {"200": 6}),
+                ("wsgi", "detail", {"200": 6}),
+                ("asgi", "list", {"200": 6}),
+                ("asgi", "detail", {"200": 6}),
+            ],
+        )
+        # The 3 Pokémon are fetched once each, then served from the cache
+        self.assertEqual(results[1]["upstream_calls"], {"pokemon": 3})
+
+
+class CircuitBreakerTest(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: self.now)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.retry_after(), 30)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 30
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_probe_opens_the_circuit_again(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 30
+        self.breaker.allow_request()
+
+        self.breaker.record_failure()
+
+        self.assertFalse(self.breaker.allow_request())
+        self.now = 60
+        self.assertTrue(self.breaker.allow_request())
+
+
+class FanOutTest(TestCase):
+
+    def test_fan_out_returns_all_results(self):
+        results, missing = fan_out(lambda key: key.upper(), ["fire", "water"])
+
+        self.assertEqual(results, {"fire": "FIRE", "water": "WATER"})
+        self.assertEqual(missing, set())
+
+    def test_fan_out_reports_failed_keys_as_missing(self):
+        def fetch(key):
+            if key == "water":
+                raise RuntimeError("upstream failure")
+            return key
+
+        results, missing = fan_out(fetch, ["fire", "water"])
+
+        self.assertEqual(results, {"fire": "fire"})
+        self.assertEqual(missing, {"water"})
+
+    def test_fan_out_closes_the_connections_of_pool_threads(self):
+        closed_on = []
+
+        with patch(
+            "pokemon_api.services.fan_out.connections.close_all",
+            side_effect=lambda: closed_on.append(threading.current_thread().name),
+        ):
+            fan_out(lambda key: PokemonType.objects.filter(name=key).exists(), ["fire", "water"])
+
+        self.assertEqual(len(closed_on), 2)
+        self.assertTrue(all(name.startswith("pokeapi-fan-out") for name in closed_on))
+
+    def test_fan_out_drops_keys_past_the_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def fetch(key):
+            if key == "slow":
+                release.wait(5)
+            return key
+
+        results, missing = fan_out(fetch, ["fast", "slow"], deadline=0.2)
+
+        self.assertEqual(results, {"fast": "fast"})
+        self.assertEqual(missing, {"slow"})
+
+    async def test_async_fan_out_limits_lookups_in_flight(self):
+        in_flight = []
+        peak = []
+
+        async def fetch(key):
+            in_flight.append(key)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(key)
+            if key == "water":
+                raise RuntimeError("upstream failure")
+            return key.upper()
+
+        results, missing = await async_fan_out(fetch, ["fire", "water", "grass", "ice"], limit=2)
+
+        self.assertEqual(results, {"fire": "FIRE", "grass": "GRASS", "ice": "ICE"})
+        self.assertEqual(missing, {"water"})
+        self.assertEqual(max(peak), 2)
+
+    async def test_async_fan_out_cancels_keys_past_the_deadline(self):
+        async def fetch(key):
+            if key == "slow":
+                await asyncio.sleep(5)
+            return key
+
+        results, missing = await async_fan_out(fetch, ["fast", "slow"], deadline=0.2)
+
+        self.assertEqual(results, {"fast": "fast"})
+        self.assertEqual(missing, {"slow"})
+
+
+class PokemonCacheTest(TestCase):
+
+    def make_cache(self, backend=None, ttl=60, stale_ttl=60, negative_ttl=60):
+        return PokemonCache(
+            backend=backend or MemoryCacheBackend(),
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            negative_ttl=negative_ttl,
+        )
+
+    def test_fresh_entry_is_served_without_fetching(self):
+        cache = self.make_cache()
+        fetch = MagicMock(return_value={"name": "pikachu"})
+
+        cache.get_or_fetch("pikachu", fetch)
+        result = cache.get_or_fetch("pikachu", fetch)
+
+        self.assertEqual(result, {"name": "pikachu"})
+        fetch.assert_called_once()
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        backend = MemoryCacheBackend()
+        backend.set("pikachu", CacheEntry(encode_payload({"name": "old"}), 10, time.time() - 90, None))
+        cache = self.make_cache(backend=backend)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return {"name": "new"}
+
+        result = cache.get_or_fetch("pikachu", fetch)
+
+        self.assertEqual(result, {"name": "old"})
+        self.assertTrue(refreshed.wait(5))
+
+    def test_expired_entry_is_fetched_again(self):
+        backend = MemoryCacheBackend()
+        backend.set("pikachu", CacheEntry(encode_payload({"name": "old"}), 10, time.time() - 150, None))
+        cache = self.make_cache(backend=backend)
+
+        result = cache.get_or_fetch("pikachu", lambda: {"name": "new"})
+
+        self.assertEqual(result, {"name": "new"})
+
+    def test_memory_backend_evicts_least_recently_used_entry(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", CacheEntry(encode_payload(1), 1, 0, None))
+        backend.set("b", CacheEntry(encode_payload(2), 1, 0, None))
+        backend.get("a")
+        backend.set("c", CacheEntry(encode_payload(3), 1, 0, None))
+
+        self.assertIsNone(backend.get("b"))
+        self.assertIsNotNone(backend.get("a"))
+        self.assertIsNotNone(backend.get("c"))
+
+    def test_memory_backend_evicts_to_stay_under_byte_limit(self):
+        backend = MemoryCacheBackend(max_bytes=100)
+        backend.set("a", CacheEntry(encode_payload(1), 60, 0, None))
+        backend.set("b", CacheEntry(encode_payload(2), 60, 0, None))
+
+        self.assertIsNone(backend.get("a"))
+        self.assertIsNotNone(backend.get("b"))
+
+    def test_file_backend_round_trip(self):
+        with tempfile.TemporaryDirectory() as path:
+            cache = self.make_cache(backend=FileCacheBackend(path))
+
+            cache.get_or_fetch("pikachu", lambda: {"name": "pikachu"})
+            result = cache.get_or_fetch("pikachu", MagicMock())
+            cache.get_or_fetch("missingno", lambda: None)
+            missing = cache.get_or_fetch("missingno", MagicMock())
+
+            self.assertEqual(result, {"name": "pikachu"})
+            self.assertIsNone(missing)
+
+    def test_file_backend_only_scans_the_directory_over_its_limits(self):
+        with tempfile.TemporaryDirectory() as path:
+            backend = FileCacheBackend(path, max_entries=2)
+            backend.set("a", CacheEntry(encode_payload(1), 1, 0, None))
+            os.utime(backend.file_path("a"), (0, 0))
+
+            with patch("pokemon_api.services.pokemon_cache.os.scandir", wraps=os.scandir) as scandir:
+                backend.set("b", CacheEntry(encode_payload(2), 1, 0, None))
+                backend.set("b", CacheEntry(encode_payload(3), 1, 0, None))
+                self.assertEqual(scandir.call_count, 0)
+
+                backend.set("c", CacheEntry(encode_payload(4), 1, 0, None))
+                self.assertEqual(scandir.call_count, 1)
+
+            self.assertIsNone(backend.get("a"))
+            self.assertEqual(backend.get("b").value, 3)
+            self.assertIsNotNone(backend.get("c"))
+
+    def test_entries_are_stored_encoded_and_decoded_when_read(self):
+        backend = MemoryCacheBackend()
+        cache = self.make_cache(backend=backend)
+
+        cache.get_or_fetch("pikachu", lambda: {"name": "pikachu"})
+        entry = backend.get("pikachu")
+
+        self.assertIsInstance(entry.payload, bytes)
+        self.assertEqual(entry.size, len(entry.payload))
+        self.assertEqual(entry.value, {"name": "pikachu"})
+        self.assertEqual(backend.stats(), {
+            "entries": 1,
+            "bytes": entry.size,
+            "entry_sizes": {"pikachu": entry.size},
+        })
+
+
+class IdentifierIndexTest(TestCase):
+
+    def test_normalize_identifier(self):
+        self.assertEqual(normalize_identifier(" Pikachu "), "pikachu")
+        self.assertEqual(normalize_identifier("025"), "25")
+        self.assertEqual(normalize_identifier(25), "25")
+
+    def test_canonical_key_is_the_id_when_known(self):
+        index = IdentifierIndex([("pikachu", 25), ("raichu", None)])
+
+        self.assertEqual(index.canonical_key("Pikachu"), "25")
+        self.assertEqual(index.canonical_key("25"), "25")
+        self.assertEqual(index.canonical_key("raichu"), "raichu")
+        self.assertEqual(index.canonical_key("Squirtle"), "squirtle")
+
+        index.add(7, "squirtle")
+        self.assertEqual(index.canonical_key("squirtle"), "7")
+
+    def test_complete_index_rejects_unknown_identifiers(self):
+        index = IdentifierIndex([("pikachu", 25)], complete=True)
+
+        self.assertEqual(index.canonical_key("pikachu"), "25")
+        self.assertIsNone(index.canonical_key("missingno"))
+        self.assertIsNone(index.canonical_key("0"))
+
+
+class PayloadCodecTest(TestCase):
+
+    payload = {"name": "pikachu", "moves": [{"move": {"name": "thunder-shock"}}] * 50}
+
+    def test_round_trip(self):
+        for codec in ("json", "zlib"):
+            with self.subTest(codec=codec), override_settings(POKEMON_PAYLOAD_CODEC=codec):
+                self.assertEqual(decode_payload(encode_payload(self.payload)), self.payload)
+
+    def test_zlib_is_smaller_than_json(self):
+        with override_settings(POKEMON_PAYLOAD_CODEC="json"):
+            plain = encode_payload(self.payload)
+        with override_settings(POKEMON_PAYLOAD_CODEC="zlib"):
+            compressed = encode_payload(self.payload)
+
+        self.assertLess(len(compressed), len(plain))
+
+    def test_payloads_stay_readable_after_codec_change(self):
+        with override_settings(POKEMON_PAYLOAD_CODEC="json"):
+            blob = encode_payload(self.payload)
+
+        with override_settings(POKEMON_PAYLOAD_CODEC="zlib"):
+            self.assertEqual(decode_payload(blob), self.payload)
+
+
+class TypeIndexTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def index_type(self, type_name, *pokemon):
+        pokemon_type = PokemonType.objects.create(name=type_name, synced_at=timezone.now())
+        for name, pokeapi_id in pokemon:
+            entry, _created = Pokemon.objects.get_or_create(name=name, pokeapi_id=pokeapi_id)
+            pokemon_type.pokemon.add(entry)
+        return pokemon_type
+
+    def test_pokeapi_id_from_url(self):
+        self.assertEqual(pokeapi_id_from_url("https://pokeapi.co/api/v2/pokemon/25/"), 25)
+        self.assertIsNone(pokeapi_id_from_url("dummy"))
+
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
+    def test_sync_type_index_stores_members(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "pokemon": [
+                {"pokemon": {"name": "charmander", "url": "https://pokeapi.co/api/v2/pokemon/4/"}},
+                {"pokemon": {"name": "charizard", "url": "https://pokeapi.co/api/v2/pokemon/6/"}},
+            ]
+        }
+        mock_get.return_value = mock_response
+
+        missing = sync_type_index(["fire"])
+
+        self.assertEqual(missing, set())
+        fire = PokemonType.objects.get(name="fire")
+        self.assertIsNotNone(fire.synced_at)
+        self.assertEqual(
+            sorted(fire.pokemon.values_list("name", "pokeapi_id")),
+            [("charizard", 6), ("charmander", 4)],
+        )
+
+    @patch("pokemon_api.services.fetch_pokemon_by_type.pokeapi_get")
+    def test_sync_type_index_reports_unknown_types(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_get.return_value = mock_response
+
+        missing = sync_type_index(["shadow"])
+
+        self.assertEqual(missing, {"shadow"})
+        self.assertFalse(PokemonType.objects.filter(name="shadow").exists())
+
+    def test_get_indexed_pokemon_names_skips_unindexed_types(self):
+        self.index_type("fire", ("charmander", 4))
+        PokemonType.objects.create(name="water")
+
+        result = get_indexed_pokemon_names({"fire", "water"})
+
+        self.assertEqual(result, {"fire": ["charmander"]})
+
+    def test_check_index_access(self):
+        self.index_type("fire", ("charizard", 6))
+        self.index_type("flying", ("charizard", 6), ("pidgey", 16))
+
+        self.assertTrue(check_index_access("charizard", {"fire"}))
+        self.assertTrue(check_index_access("6", {"flying"}))
+        self.assertFalse(check_index_access("pidgey", {"fire"}))
+
+    def test_check_index_access_unknown_without_index(self):
+        self.index_type("fire", ("charizard", 6))
+
+        # Pokémon not in the index
+        self.assertIsNone(check_index_access("squirtle", {"fire"}))
+        # Allowed type not in the index
+        self.assertIsNone(check_index_access("charizard", {"water"}))
+
+
+class TypeMaskEngineTest(TestCase):
+
+    def setUp(self):
+        self.engine = TypeMaskEngine(
+            ["fire", "flying", "water"],
+            {"fire", "flying"},
+            [
+                ("charizard", 6, "fire"),
+                ("charizard", 6, "flying"),
+                ("pidgey", 16, "flying"),
+                ("charmander", 4, "fire"),
+            ],
+        )
+
+    def test_types_get_one_bit_each(self):
+        self.assertEqual(self.engine.bits, {"fire": 1, "flying": 2, "water": 4})
+        self.assertEqual(self.engine.indexed_mask, 3)
+        self.assertEqual(self.engine.masks[self.engine.rows["charizard"]], 3)
+
+    def test_check(self):
+        self.assertTrue(self.engine.check("charizard", {"fire"}))
+        self.assertTrue(self.engine.check("16", {"flying", "fire"}))
+        self.assertFalse(self.engine.check("Pidgey", {"fire"}))
+        self.assertIsNone(self.engine.check("squirtle", {"fire"}))
+        self.assertIsNone(self.engine.check("pidgey", {"fire", "water"}))
+
+    def test_accessible_names(self):
+        self.assertEqual(
+            self.engine.accessible_names({"fire"}),
+            (["charizard", "charmander"], {"fire"}),
+        )
+        self.assertEqual(
+            self.engine.accessible_names({"flying", "water", "unknown"}),
+            (["charizard", "pidgey"], {"flying"}),
+        )
+        self.assertEqual(self.engine.accessible_names({"water"}), ([], set()))
+
+
+class PokemonAccessTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_pokemon_cache()
+        self.addCleanup(reset_pokemon_cache)
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_fetched_pokemon_types_are_remembered(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "id": 25,
+            "name": "pikachu",
+            "types": [{"type": {"name": "electric"}}],
+        }
+        mock_get.return_value = mock_response
+
+        fetch_pokemon("25")
+
+        self.assertEqual(lookup_pokemon_types("25"), {"electric"})
+        self.assertEqual(lookup_pokemon_types("Pikachu"), {"electric"})
+        self.assertTrue(check_pokemon_access("pikachu", {"electric"}))
+        self.assertFalse(check_pokemon_access("pikachu", {"fire"}))
+
+    def test_unknown_pokemon_needs_a_fetch(self):
+        self.assertIsNone(check_pokemon_access("pikachu", {"electric"}))
+
+
+class SingleFlightTest(TestCase):
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"name": "pikachu"}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("pikachu", fetch)))
+        leader.start()
+        started.wait(5)
+
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("pikachu", fetch)))
+            for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        while flight.coalesced < 3:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"name": "pikachu"}] * 4)
+        self.assertEqual(flight.coalesced, 3)
+
+    def test_exception_is_shared_and_key_released(self):
+        flight = SingleFlight()
+
+        with self.assertRaises(RuntimeError):
+            flight.do("pikachu", MagicMock(side_effect=RuntimeError()))
+
+        self.assertEqual(flight.do("pikachu", lambda: "retried"), "retried")
+
+    async def test_async_concurrent_calls_share_one_task(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"name": "pikachu"}
+
+        results = await asyncio.gather(*(flight.do("pikachu", fetch) for _ in range(4)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"name": "pikachu"}] * 4)
+        self.assertEqual(flight.coalesced, 3)
+
+    def test_nested_call_in_same_thread_does_not_deadlock(self):
+        flight = SingleFlight()
+
+        result = flight.do("pikachu", lambda: flight.do("pikachu", lambda: "inner"))
+
+        self.assertEqual(result, "inner")
+
+
+class MirrorTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_pokemon_cache()
+        self.addCleanup(reset_pokemon_cache)
+
+        self.pikachu = Pokemon.objects.create(name="pikachu", pokeapi_id=25)
+        self.raichu = Pokemon.objects.create(name="raichu", pokeapi_id=26)
+        electric = PokemonType.objects.create(name="electric", synced_at=timezone.now())
+        electric.pokemon.add(self.pikachu, self.raichu)
+
+    @patch("pokemon_api.services.fetch_pokemon.pokeapi_get")
+    def test_sync_pokemon_documents_stores_payloads(self, mock_get):
+        def get(path):
+            response = MagicMock()
+            if path == "pokemon/raichu/":
+                response.status_code = 404
+            else:
+                response.status_code = 200
+                response.json.return_value = {"id": 25, "name": "pikachu"}
+            return response
+
+        mock_get.side_effect = get
+
+        failed = sync_pokemon_documents(pokemon_to_sync(), workers=2)
+
+        self.assertEqual(failed, ["raichu"])
+        self.assertEqual(decode_payload(self.pikachu.document.payload), {"id": 25, "name": "pikachu"})
+        # Resuming only downloads what is still missing
+        self.assertEqual(pokemon_to_sync(), [(self.raichu.pk, "raichu")])
+
+    def test_pokemon_to_sync_with_max_age(self):
+        PokemonDocument.objects.create(
+            pokemon=self.pikachu,
+            payload=encode_payload({}),
+            synced_at=timezone.now() - timedelta(days=2),
+        )
+
+        self.assertEqual(pokemon_to_sync(max_age=timedelta(days=3)), [(self.raichu.pk, "raichu")])
+        self.assertEqual(len(pokemon_to_sync(max_age=timedelta(days=1))), 2)
+        self.assertEqual(len(pokemon_to_sync(full=True)), 2)
+
+    @override_settings(POKEAPI_OFFLINE=True)
+    @patch("pokemon_api.services.pokeapi_client.requests.Session.get")
+    def test_offline_mode_reads_the_mirror(self, mock_get):
+        PokemonDocument.objects.create(
+            pokemon=self.pikachu,
+            payload=encode_payload({"id": 25, "name": "pikachu"}),
+            synced_at=timezone.now(),
+        )
+
+        self.assertEqual(fetch_pokemon("25"), {"id": 25, "name": "pikachu"})
+        self.assertIsNone(fetch_pokemon("raichu"))
+        self.assertEqual(
+            fetch_pokemon_by_type("electric"),
+            [
+                {"name": "pikachu", "url": "https://pokeapi.co/api/v2/pokemon/25/"},
+                {"name": "raichu", "url": "https://pokeapi.co/api/v2/pokemon/26/"},
+            ],
+        )
+        self.assertEqual(fetch_pokemon_by_type("fire"), [])
+        mock_get.assert_not_called()
+
+
+class ProjectFieldsTest(TestCase):
+
+    def setUp(self):
+        self.pokemon = {
+            "id": 6,
+            "name": "charizard",
+            "types": [
+                {"slot": 1, "type": {"name": "fire", "url": "dummy"}},
+                {"slot": 2, "type": {"name": "flying", "url": "dummy"}},
+            ],
+            "sprites": {"front_default": "front.png", "back_default": "back.png"},
+        }
+
+    def test_parse_field_paths(self):
+        self.assertIsNone(parse_field_paths(""))
+        self.assertEqual(
+            parse_field_paths("id, sprites.front_default,sprites"),
+            {"id": None, "sprites": None},
+        )
+
+    def test_include_nested_paths_through_lists(self):
+        result = project_fields(self.pokemon, fields=parse_field_paths("name,types.type.name"))
+
+        self.assertEqual(result, {
+            "name": "charizard",
+            "types": [{"type": {"name": "fire"}}, {"type": {"name": "flying"}}],
+        })
+
+    def test_exclude_nested_paths(self):
+        result = project_fields(self.pokemon, exclude=parse_field_paths("types,sprites.back_default"))
+
+        self.assertEqual(result, {
+            "id": 6,
+            "name": "charizard",
+            "sprites": {"front_default": "front.png"},
+        })
+
+    def test_unknown_fields_are_ignored(self):
+        result = project_fields(self.pokemon, fields=parse_field_paths("id,unknown.path"))
+
+        self.assertEqual(result, {"id": 6})
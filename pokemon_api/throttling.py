@@ -0,0 +1,27 @@
+from rest_framework.throttling import BaseThrottle
+
+from pokemon_api.services.token_bucket import consume_request_budget, set_upstream_budget
+
+
+class PokemonUserThrottle(BaseThrottle):
+    """
+    Token-bucket throttle keyed by user and endpoint (the view's `throttle_scope`).
+    Every request takes a token from the user's request bucket, the PokeAPI calls
+    it makes are charged to a separate, smaller upstream bucket (see POKEMON_THROTTLE).
+    Throttled requests get a 429 with a Retry-After header.
+    """
+
+    def allow_request(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return True
+
+        scope = getattr(view, "throttle_scope", None) or view.__class__.__name__
+        self.retry_after, budget = consume_request_budget(scope, request.user.pk)
+        if self.retry_after:
+            return False
+
+        set_upstream_budget(budget)
+        return True
+
+    def wait(self):
+        return self.retry_after
@@ -1,8 +1,13 @@
 from django.urls import path
-from .views import PokemonDetailView, PokemonListView
+from .async_views import AsyncPokemonDetailView, AsyncPokemonListView
+from .views import PokemonBatchView, PokemonDetailView, PokemonListView
 
 
 urlpatterns = [
     path("pokemon/", PokemonListView.as_view(), name="pokemon_list"),
+    # Before the detail route, which would take "batch" for a Pokémon name
+    path("pokemon/batch/", PokemonBatchView.as_view(), name="pokemon_batch"),
     path("pokemon/<str:identifier>/", PokemonDetailView.as_view(), name="pokemon_detail"),
+    path("async/pokemon/", AsyncPokemonListView.as_view(), name="async_pokemon_list"),
+    path("async/pokemon/<str:identifier>/", AsyncPokemonDetailView.as_view(), name="async_pokemon_detail"),
 ]
@@ -1,59 +1,310 @@
+import json
+import math
+import time
+
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import exceptions, status
+
+from access_management_api.authentication import GroupClaimsJWTAuthentication
+from access_management_api.services.user_pokemon_types import get_user_pokemon_types
+from pokemon_api.conditional import apply_validators, conditional_response, make_etag, mark_stale
+from pokemon_api.pagination import PokemonCursorPagination
+from pokemon_api.services.circuit_breaker import UpstreamUnavailable, get_circuit_breaker
+from pokemon_api.services.fan_out import fan_out, iter_fan_out
+from pokemon_api.services.fetch_pokemon import fetch_pokemon_or_stale, peek_pokemon
+from pokemon_api.services.identifiers import canonical_pokemon_key
+from pokemon_api.services.fetch_pokemon_by_type import fetch_pokemon_by_type_or_stale
+from pokemon_api.services.metrics import get_metrics_settings, registry
+from pokemon_api.services.list_cache import (
+    cache_pokemon_list,
+    get_cached_pokemon_list,
+    make_pokemon_list_entry,
+)
+from pokemon_api.services.pokemon_access import check_pokemon_access
+from pokemon_api.services.pokemon_cache import measure_payload
+from pokemon_api.services.project_fields import parse_field_paths, project_fields
+from pokemon_api.services.server_timing import timed_phase
+from pokemon_api.services.token_bucket import (
+    UpstreamBudgetExceeded,
+    get_upstream_budget,
+    upstream_budget_scope,
+    upstream_wait,
+    with_upstream_budget,
+)
+from pokemon_api.services.type_masks import get_type_mask_engine
+from pokemon_api.throttling import PokemonUserThrottle
+
+
+def pokemon_entry(name):
+    return {
+        "name": name,
+        "url": f"/api/pokemon/{name}/"
+    }
+
+
+def merge_fetched_names(names, pokemon_by_type):
+    """
+    Sorted union of the given names and of the Pokémon names fetched per type,
+    `pokemon_by_type` mapping types to (entries, stale) results.
+    """
+    fetched_names = {
+        entry["name"]
+        for entries, _stale in pokemon_by_type.values()
+        for entry in entries
+    }
+    return sorted(fetched_names.union(names))
+
+
+def stale_types_of(pokemon_by_type):
+    return {pokemon_type for pokemon_type, (_entries, stale) in pokemon_by_type.items() if stale}
+
+
+def mark_incomplete(response, missing_types, stale_types):
+    """
+    Flag a list lacking the types that failed or missed the deadline,
+    or built from the last known members of types PokeAPI could not return.
+    """
+    if missing_types:
+        response["X-Partial-Response"] = "true"
+        response["X-Missing-Types"] = ",".join(sorted(missing_types))
+    if stale_types:
+        response["X-Stale-Types"] = ",".join(sorted(stale_types))
+        mark_stale(response)
+    return response
+
+
+UPSTREAM_UNAVAILABLE_MESSAGE = "PokeAPI is unavailable, try again later"
+UPSTREAM_BUDGET_EXCEEDED_MESSAGE = "Too many PokeAPI lookups, try again later"
+
+
+def raise_if_throttled(missing):
+    """
+    Lookups left out once the user's upstream budget ran out are throttled, not failed:
+    raises UpstreamBudgetExceeded, answered with a 429 and a Retry-After header.
+    """
+    if missing:
+        wait = upstream_wait()
+        if wait:
+            raise UpstreamBudgetExceeded(wait)
+
+
+def retry_after():
+    return str(max(1, math.ceil(get_circuit_breaker().retry_after())))
+
 
-from pokemon_api.services.fetch_pokemon import fetch_pokemon
-from pokemon_api.services.fetch_pokemon_by_type import fetch_pokemon_by_type
+def ndjson_line(data):
+    return json.dumps(data, separators=(",", ":")) + "\n"
 
 
-class PokemonListView(APIView):
+class PokemonAPIView(APIView):
+    """
+    Base of the Pokémon views: token authentication and per-user throttling.
+    The PokeAPI calls of a request are charged to the user's upstream budget,
+    a request running out of it is answered like a throttled one.
+    """
+    authentication_classes = [GroupClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [PokemonUserThrottle]
+
+    def dispatch(self, request, *args, **kwargs):
+        # The budget set by the throttle must not outlive the request on this thread
+        with upstream_budget_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with timed_phase("auth"):
+            super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        with timed_phase("throttle"):
+            super().check_throttles(request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, UpstreamBudgetExceeded):
+            exc = exceptions.Throttled(wait=exc.wait, detail=UPSTREAM_BUDGET_EXCEEDED_MESSAGE)
+        return super().handle_exception(exc)
+
+
+class PokemonListView(PokemonAPIView):
     """
     GET /api/pokemon/
     Returns all Pokémon the user is allowed to access,
-    based on the Pokémon types they belong to.
+    based on the Pokémon types they belong to, sorted by name.
+    Supports cursor pagination with ?limit=<n>&cursor=<cursor>,
+    and streaming one entry per line with ?stream=ndjson.
     """
-    permission_classes = [IsAuthenticated]
+    throttle_scope = "pokemon_list"
+    pagination_class = PokemonCursorPagination
 
     def get(self, request):
-        user = request.user
-        allowed_types = {g.name for g in user.pokemon_groups.all()}
+        with timed_phase("groups"):
+            allowed_types = get_user_pokemon_types(request.user)
 
-        if not allowed_types:
-            return Response([], status=status.HTTP_200_OK)
+        if request.query_params.get("stream") == "ndjson":
+            return self.stream_pokemon_list(allowed_types)
 
-        # Collect Pokémon from all allowed types
-        pokemon_dict = {}
+        # Users with the same type groups share one cached list
+        if allowed_types:
+            list_entry = get_cached_pokemon_list(allowed_types)
+        else:
+            list_entry = make_pokemon_list_entry(allowed_types, [])
+        missing_types, stale_types = set(), set()
 
-        for pokemon_type in allowed_types:
-            pokemon_entries = fetch_pokemon_by_type(pokemon_type)
+        if list_entry is None:
+            pokemon_list, missing_types, stale_types = self.build_pokemon_list(allowed_types)
+            if missing_types or stale_types:
+                list_entry = make_pokemon_list_entry(allowed_types, pokemon_list)
+            else:
+                list_entry = cache_pokemon_list(allowed_types, pokemon_list)
 
-            for entry in pokemon_entries:
-                name = entry["name"]
-                pokemon_dict[name] = {
-                    "name": name,
-                    "url": f"/api/pokemon/{name}/"
-                }
+        # Types that failed or missed the deadline are left out instead of failing the request,
+        # and incomplete lists are neither cached nor given validators
+        if missing_types or stale_types:
+            response = self.list_response(request, list_entry.pokemon_list)
+            return mark_incomplete(response, missing_types, stale_types)
+
+        # Answer an unchanged list with 304 before anything is rendered
+        etag = make_etag(list_entry.digest, request.get_full_path())
+        not_modified = conditional_response(request, etag, list_entry.created_at)
+        if not_modified is not None:
+            return not_modified
 
-        # Convert dict to list
-        pokemon_list = list(pokemon_dict.values())
+        response = self.list_response(request, list_entry.pokemon_list)
+        return apply_validators(response, etag, int(list_entry.created_at))
 
+    def list_response(self, request, pokemon_list):
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(pokemon_list, request, view=self)
+
+        if page is not None:
+            return paginator.get_paginated_response(page)
         return Response(pokemon_list, status=status.HTTP_200_OK)
 
+    def build_pokemon_list(self, allowed_types):
+        """
+        Returns (pokemon_list, missing_types, stale_types) for the given type groups.
+        """
+        # Indexed types are filtered from the in-memory type masks, already sorted and deduplicated
+        names, indexed_types = get_type_mask_engine().accessible_names(allowed_types)
+        missing_types, stale_types = set(), set()
+        unindexed_types = allowed_types - indexed_types
+
+        # The others are looked up concurrently on PokeAPI
+        if unindexed_types:
+            with timed_phase("fan_out"):
+                pokemon_by_type, missing_types = fan_out(fetch_pokemon_by_type_or_stale, unindexed_types)
+            raise_if_throttled(missing_types)
+            stale_types = stale_types_of(pokemon_by_type)
+            names = merge_fetched_names(names, pokemon_by_type)
+
+        return [pokemon_entry(name) for name in names], missing_types, stale_types
+
+    def stream_pokemon_list(self, allowed_types):
+        """
+        Stream the list as NDJSON, writing the entries of each type as soon as it resolves.
+        A partial list ends with a {"missing_types": [...]} line, a list with types
+        served from their last known members with a {"stale_types": [...]} one.
+        """
+        list_entry = get_cached_pokemon_list(allowed_types) if allowed_types else None
+
+        if list_entry is not None or not allowed_types:
+            pokemon_list = list_entry.pokemon_list if list_entry is not None else []
+            lines = (ndjson_line(entry) for entry in pokemon_list)
+        else:
+            # Read the index now, while the request still owns its database connection
+            indexed_names, indexed_types = get_type_mask_engine().accessible_names(allowed_types)
+            # The status cannot change once streaming, a user already out of budget is throttled now
+            raise_if_throttled(allowed_types - indexed_types)
+            # The types are fetched while streaming, after the request's budget scope ended
+            fetch = with_upstream_budget(get_upstream_budget(), fetch_pokemon_by_type_or_stale)
+            lines = self.iter_pokemon_lines(allowed_types, indexed_names, indexed_types, fetch)
+
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+    def iter_pokemon_lines(self, allowed_types, indexed_names, indexed_types, fetch):
+        seen = set()
+        missing_types = set()
+        stale_types = set()
+
+        def new_entries(names):
+            for name in names:
+                if name not in seen:
+                    seen.add(name)
+                    yield ndjson_line(pokemon_entry(name))
+
+        yield from new_entries(indexed_names)
+
+        unindexed_types = allowed_types - indexed_types
+        for pokemon_type, result, ok in iter_fan_out(fetch, unindexed_types):
+            if ok:
+                entries, stale = result
+                if stale:
+                    stale_types.add(pokemon_type)
+                yield from new_entries(entry["name"] for entry in entries)
+            else:
+                missing_types.add(pokemon_type)
+
+        trailer = {}
+        if missing_types:
+            trailer["missing_types"] = sorted(missing_types)
+        if stale_types:
+            trailer["stale_types"] = sorted(stale_types)
 
-class PokemonDetailView(APIView):
+        if trailer:
+            yield ndjson_line(trailer)
+        else:
+            cache_pokemon_list(allowed_types, [pokemon_entry(name) for name in sorted(seen)])
+
+
+class PokemonDetailView(PokemonAPIView):
     """
     GET /api/pokemon/<id or name>/
     Returns details for a single Pokémon,
     only if the user has access to at least one of its types.
+    Supports sparse fieldsets with nested paths, e.g. ?fields=id,name,sprites.front_default
+    or ?exclude=moves,game_indices.
     """
-    permission_classes = [IsAuthenticated]
+    throttle_scope = "pokemon_detail"
 
     def get(self, request, identifier):
-        user = request.user
-        allowed_types = {g.name for g in user.pokemon_groups.all()}
+        with timed_phase("groups"):
+            allowed_types = get_user_pokemon_types(request.user)
+        fields = request.query_params.get("fields", "")
+        exclude = request.query_params.get("exclude", "")
+        projection = f"fields={fields}&exclude={exclude}"
+
+        # Known Pokémon are authorized before their full payload is downloaded
+        access = check_pokemon_access(identifier, allowed_types)
+
+        if access is False:
+            return Response(
+                {"error": "Forbidden: you do not have access to this Pokémon"},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-        pokemon_data = fetch_pokemon(identifier)
+        # An allowed, cached Pokémon the client already has is answered without fetching or rendering
+        cache_entry = peek_pokemon(identifier)
+
+        if access and cache_entry is not None and cache_entry.payload is not None:
+            etag = make_etag(cache_entry.digest, projection, *sorted(allowed_types))
+            not_modified = conditional_response(request, etag, cache_entry.stored_at)
+            if not_modified is not None:
+                return not_modified
+
+        # While PokeAPI is down the last cached version is served, flagged as stale
+        try:
+            pokemon_data, stale = fetch_pokemon_or_stale(identifier)
+        except UpstreamBudgetExceeded:
+            raise
+        except UpstreamUnavailable:
+            return Response(
+                {"error": UPSTREAM_UNAVAILABLE_MESSAGE},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": retry_after()},
+            )
 
         if pokemon_data is None:
             return Response(
@@ -69,10 +320,146 @@ class PokemonDetailView(APIView):
 
         # Check the types of this Pokémon against the types the user is allowed to see.
         # If there is zero overlap, stop them right here with a 403 Forbidden error.
-        if not (pokemon_types & allowed_types):
+        if access is None and not (pokemon_types & allowed_types):
             return Response(
                 {"error": "Forbidden: you do not have access to this Pokémon"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        return Response(pokemon_data, status=status.HTTP_200_OK)
+        # Drop the fields the client did not ask for before anything is rendered
+        if stale:
+            pokemon_data = project_fields(
+                pokemon_data,
+                fields=parse_field_paths(fields),
+                exclude=parse_field_paths(exclude),
+            )
+            return mark_stale(Response(pokemon_data, status=status.HTTP_200_OK))
+
+        if cache_entry is not None and cache_entry.payload is not None:
+            digest, last_modified = cache_entry.digest, cache_entry.stored_at
+        else:
+            _size, digest = measure_payload(pokemon_data)
+            last_modified = time.time()
+
+        etag = make_etag(digest, projection, *sorted(allowed_types))
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        pokemon_data = project_fields(
+            pokemon_data,
+            fields=parse_field_paths(fields),
+            exclude=parse_field_paths(exclude),
+        )
+
+        response = Response(pokemon_data, status=status.HTTP_200_OK)
+        return apply_validators(response, etag, int(last_modified))
+
+
+class PokemonBatchView(PokemonAPIView):
+    """
+    GET /api/pokemon/batch/?ids=<id_or_name>,<id_or_name>,...
+    Returns the details of many Pokémon at once, in the order of the identifiers.
+    Every item carries its own status: 200 with its data, or 403, 404, 429 or 503 with an error.
+    Items served from the last cached version while PokeAPI is down have "stale": true.
+    Supports the same fields and exclude parameters as the detail endpoint.
+    """
+    throttle_scope = "pokemon_batch"
+    max_ids = 100
+
+    def get(self, request):
+        identifiers = list(dict.fromkeys(
+            identifier.strip()
+            for identifier in request.query_params.get("ids", "").split(",")
+            if identifier.strip()
+        ))
+
+        if not identifiers:
+            return Response(
+                {"error": "Missing ids parameter"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(identifiers) > self.max_ids:
+            return Response(
+                {"error": f"At most {self.max_ids} ids per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Loaded once and shared by every item
+        with timed_phase("groups"):
+            allowed_types = get_user_pokemon_types(request.user)
+        fields = parse_field_paths(request.query_params.get("fields", ""))
+        exclude = parse_field_paths(request.query_params.get("exclude", ""))
+
+        access_by_id = {
+            identifier: check_pokemon_access(identifier, allowed_types)
+            for identifier in identifiers
+        }
+        # Ids and names of the same Pokémon are fetched once, unknown identifiers not at all
+        key_by_id = {identifier: canonical_pokemon_key(identifier) for identifier in identifiers}
+
+        # Misses are fetched concurrently, cached Pokémon come straight from the detail cache
+        with timed_phase("fan_out"):
+            pokemon_by_key, unavailable = fan_out(
+                fetch_pokemon_or_stale,
+                {
+                    key_by_id[identifier]
+                    for identifier, access in access_by_id.items()
+                    if access is not False and key_by_id[identifier] is not None
+                },
+            )
+
+        # Lookups left out once the user's upstream budget ran out are throttled, not failed
+        unavailable_status = (
+            status.HTTP_429_TOO_MANY_REQUESTS if unavailable and upstream_wait()
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+        results = []
+        for identifier in identifiers:
+            access = access_by_id[identifier]
+            key = key_by_id[identifier]
+            pokemon_data, stale = pokemon_by_key.get(key, (None, False))
+
+            if access is False:
+                results.append(self.item_error(identifier, status.HTTP_403_FORBIDDEN))
+            elif key in unavailable:
+                results.append(self.item_error(identifier, unavailable_status))
+            elif pokemon_data is None:
+                results.append(self.item_error(identifier, status.HTTP_404_NOT_FOUND))
+            elif access is None and not (
+                {t["type"]["name"] for t in pokemon_data.get("types", [])} & allowed_types
+            ):
+                results.append(self.item_error(identifier, status.HTTP_403_FORBIDDEN))
+            else:
+                item = {
+                    "id": identifier,
+                    "status": status.HTTP_200_OK,
+                    "data": project_fields(pokemon_data, fields=fields, exclude=exclude),
+                }
+                if stale:
+                    item["stale"] = True
+                results.append(item)
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def item_error(self, identifier, status_code):
+        messages = {
+            status.HTTP_403_FORBIDDEN: "Forbidden: you do not have access to this Pokémon",
+            status.HTTP_404_NOT_FOUND: "Pokémon not found",
+            status.HTTP_429_TOO_MANY_REQUESTS: UPSTREAM_BUDGET_EXCEEDED_MESSAGE,
+            status.HTTP_503_SERVICE_UNAVAILABLE: UPSTREAM_UNAVAILABLE_MESSAGE,
+        }
+        return {"id": identifier, "status": status_code, "error": messages[status_code]}
+
+
+def metrics(request):
+    """
+    GET /metrics
+    Prometheus text exposition of the request, upstream, cache and fan-out metrics
+    of every worker process. Only answered to the clients in POKEMON_METRICS['ALLOWED_IPS'].
+    """
+    if request.META.get("REMOTE_ADDR") not in get_metrics_settings()["ALLOWED_IPS"]:
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
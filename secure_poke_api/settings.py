@@ -50,7 +50,97 @@ REST_FRAMEWORK = {
     )
 }
 
+# Shared upstream HTTP client used by every PokeAPI service
+POKEAPI_CLIENT = {
+    'BASE_URL': 'https://pokeapi.co/api/v2/',
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    'MAX_RETRIES': 2,
+    'BACKOFF_FACTOR': 0.3,
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 16,
+    'ASYNC_MAX_CONNECTIONS': 100,
+    # 'record' saves every PokeAPI answer to FIXTURES_DIR, 'replay' answers from it without any network access
+    'TRANSPORT': 'live',
+    'FIXTURES_DIR': BASE_DIR / 'pokemon_api' / 'fixtures' / 'pokeapi',
+}
+
+# Circuit breaker around PokeAPI: after FAILURE_THRESHOLD consecutive failures upstream is not
+# called for RESET_TIMEOUT seconds, then one probe request decides whether it is back
+POKEAPI_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+}
+
+# Per-user token buckets of each Pokémon endpoint (CAPACITY tokens, refilled at RATE per second).
+# REQUESTS is taken by every request, UPSTREAM by every PokeAPI call made for it.
+# 'pokemon_api.services.token_bucket.CacheBucketStore' (OPTIONS: alias) shares the buckets between workers.
+POKEMON_THROTTLE = {
+    'STORE': 'pokemon_api.services.token_bucket.MemoryBucketStore',
+    'OPTIONS': {},
+    'REQUESTS': {'CAPACITY': 120, 'RATE': 10},
+    'UPSTREAM': {'CAPACITY': 30, 'RATE': 1},
+}
+
+# Prometheus metrics served at /metrics to ALLOWED_IPS. With several worker processes, point
+# MULTIPROCESS_DIR at a directory they share: each one writes its samples there every SNAPSHOT_INTERVAL seconds
+POKEMON_METRICS = {
+    'MULTIPROCESS_DIR': None,
+    'SNAPSHOT_INTERVAL': 5,
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+# Phases of a request (auth, groups, fan_out, pokeapi, db, render) returned in a Server-Timing header,
+# for a SAMPLE_RATE share of requests and for staff users sending REQUEST_HEADER: 1. With a PROFILER
+# (cprofile, or pyinstrument when installed), timed requests slower than SLOW_REQUEST_MS are profiled to PROFILE_DIR
+POKEMON_SERVER_TIMING = {
+    'SAMPLE_RATE': 0,
+    'REQUEST_HEADER': 'X-Server-Timing',
+    'PROFILER': None,
+    'PROFILE_DIR': None,
+    'SLOW_REQUEST_MS': 500,
+}
+
+# Serve Pokémon data from the local mirror filled by `manage.py sync_pokeapi`, without calling PokeAPI
+POKEAPI_OFFLINE = False
+
+# Concurrent per-type lookups of GET /api/pokemon/ (ASYNC_LIMIT: per request, for the async views)
+POKEMON_FAN_OUT = {
+    'MAX_WORKERS': 8,
+    'DEADLINE': 5.0,
+    'ASYNC_LIMIT': 32,
+}
+
+# Cache in front of fetch_pokemon. Other backends:
+# 'pokemon_api.services.pokemon_cache.DjangoCacheBackend' (OPTIONS: alias)
+# 'pokemon_api.services.pokemon_cache.FileCacheBackend' (OPTIONS: path, max_entries, max_bytes)
+POKEMON_CACHE = {
+    'BACKEND': 'pokemon_api.services.pokemon_cache.MemoryCacheBackend',
+    'OPTIONS': {
+        'max_entries': 2048,
+        'max_bytes': 256 * 1024 * 1024,
+    },
+    'TTL': 24 * 60 * 60,
+    'STALE_TTL': 7 * 24 * 60 * 60,
+    'NEGATIVE_TTL': 60 * 60,
+}
+
+# Codec of the cached and mirrored Pokémon payloads: 'zlib', 'zstd' (needs the zstandard package) or 'json'.
+# max_bytes above counts encoded bytes, see MemoryCacheBackend.stats() for the size of every entry.
+POKEMON_PAYLOAD_CODEC = 'zlib'
+
+# Seconds after which the in-process set of known Pokémon types is reloaded from the registry in the background
+POKEMON_TYPES_TTL = 60 * 60
+
+# Load the type registry when the first request of a process starts instead of on first use
+POKEMON_TYPES_WARM_LOAD = True
+
+# Seconds clients may reuse a Pokémon response before revalidating it with its ETag
+POKEMON_HTTP_CACHE_MAX_AGE = 60
+
 MIDDLEWARE = [
+    'pokemon_api.middleware.MetricsMiddleware',
+    'pokemon_api.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,6 +181,20 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Use a shared backend (e.g. Redis or Memcached) when running several worker processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from pokemon_api.views import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("access_management_api.urls")),
     path("api/", include("pokemon_api.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
\ No newline at end of file